@@ -23,6 +23,8 @@ run_positive_test() {
     if [ $? -eq 0 ]; then
         if [[ "$testfile" == *"input_output_echo_read.ash" ]]; then
             echo "TestInput" | ./"$TMP_OUT" > "$TMP_RESULT"
+        elif [ -f "${base}.in" ]; then
+            ./"$TMP_OUT" < "${base}.in" > "$TMP_RESULT"
         else
             ./"$TMP_OUT" > "$TMP_RESULT"
         fi
@@ -59,6 +61,43 @@ run_negative_test() {
     fi
 }
 
+run_client_test() {
+    name="$1"
+    reply="$2"
+    echo -e "${YELLOW}Running client test: $name${NC}"
+
+    # A compile server that accepts the connection, then sends reply (or
+    # nothing at all): the client must give up and return None
+    python3 - "$reply" <<'PYTHON'
+import os, socket, sys, tempfile, threading
+sys.path.insert(0, "semantic")
+from ashc import client
+
+path = os.path.join(tempfile.mkdtemp(), "ashc.sock")
+server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+server.bind(path)
+server.listen()
+
+def answer():
+    conn, _ = server.accept()
+    conn.recv(4096)
+    conn.sendall(sys.argv[1].encode())
+
+if sys.argv[1]:
+    threading.Thread(target=answer, daemon=True).start()
+reply = client.request(path, {"ping": True}, timeout=0.5)
+os.unlink(path)
+sys.exit(0 if reply is None else 1)
+PYTHON
+    if [ $? -eq 0 ]; then
+        echo -e "${GREEN}PASS${NC}"
+        ((PASS++))
+    else
+        echo -e "${RED}FAIL: no fallback to an in-process compile${NC}"
+        ((FAIL++))
+    fi
+}
+
 # POSITIVE TESTS
 for file in tests/positive/*.ash; do
     run_positive_test "$file"
@@ -71,6 +110,12 @@ for file in tests/negative/*.ash; do
     echo
 done
 
+# CLIENT TESTS
+run_client_test "server never answers" ""
+echo
+run_client_test "truncated reply" $'{"ok": tr\n'
+echo
+
 rm -f "$TMP_OUT" "$TMP_RESULT"
 
 echo "=============================="
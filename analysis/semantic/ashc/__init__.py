@@ -0,0 +1,34 @@
+"""The Ash compiler as a library.
+
+    from ashc import compile_string, compile_file
+
+    result = compile_string('echo("hi");')
+    print(result.bash)
+
+Names are loaded on first use, so importing a submodule such as ashc.client
+does not drag in the whole compiler.
+"""
+from importlib import import_module
+
+_EXPORTS = {
+    "compile_string": "compiler",
+    "compile_file": "compiler",
+    "CompileResult": "compiler",
+    "CompileCache": "cache",
+    "AshError": "errors",
+    "AshSyntaxError": "errors",
+    "AshCompileError": "errors",
+    "AshTypeError": "errors",
+    "ReferenceParserError": "errors",
+    "COMPILER_VERSION": "version",
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    if name not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(import_module(f".{_EXPORTS[name]}", __name__), name)
+    globals()[name] = value
+    return value
@@ -0,0 +1,127 @@
+import functools
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing.util import Finalize
+
+from .cache import CompileCache
+from .compiler import ERROR_LABELS, compile_request
+
+_worker_cache = None  # one CompileCache per worker process
+
+
+def collect_sources(paths, output_dir):
+    """Map every .ash file under paths to its output script under output_dir.
+
+    Directories are searched recursively and keep their layout in output_dir;
+    files given directly are written at its top level.
+    """
+    jobs = []
+    for path in paths:
+        if os.path.isdir(path):
+            for root, dirs, files in os.walk(path):
+                dirs.sort()
+                for name in sorted(files):
+                    if name.endswith(".ash"):
+                        source = os.path.join(root, name)
+                        relative = os.path.relpath(source, path)
+                        jobs.append((source, os.path.join(output_dir, relative[:-4] + ".sh")))
+        else:
+            name = os.path.basename(path)
+            if name.endswith(".ash"):
+                name = name[:-4]
+            jobs.append((path, os.path.join(output_dir, name + ".sh")))
+    return jobs
+
+
+def _init_worker(cache_dir, use_cache):
+    global _worker_cache
+    _worker_cache = CompileCache(cache_dir) if use_cache else None
+    if _worker_cache:
+        # Pool workers leave through os._exit, skipping the atexit flush
+        Finalize(_worker_cache, _worker_cache.flush, exitpriority=0)
+
+
+def _compile_one(source, output, options):
+    """Compile one file; returns (ok, cached, message, source bytes, pass stats). Never raises."""
+    try:
+        size = os.path.getsize(source)
+        os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    except OSError as e:
+        return False, False, str(e), 0, []
+    request = dict(options, source=source, output=output)
+    reply = compile_request(request, _worker_cache)
+    if reply["ok"]:
+        return True, reply["cached"], output, size, reply["passes"]
+    return False, False, f"{ERROR_LABELS[reply['error']]}: {reply['message'].strip()}", 0, []
+
+
+def build(paths, output_dir, jobs=None, cache_dir=None, use_cache=True, report=print, time_passes=None,
+          **options):
+    """Compile every source under paths, reporting each file; returns the number of failures.
+
+    options are the compile_request fields shared by all files (external_check,
+    ash_binary, opt_level, enable_passes, ...). time_passes ("text" or
+    "json") also reports each pass's totals over all the files; with "json"
+    report gets only that JSON, and the progress lines go to stderr.
+    """
+    progress = functools.partial(print, file=sys.stderr) if time_passes == "json" else report
+    start = time.perf_counter()
+    ok = failed = cached = total_bytes = 0
+    pass_totals = {}
+
+    # Sources that would write the same script (x.ash in two directories
+    # given separately) would overwrite each other, perhaps from two workers
+    # at once: none of them is compiled
+    owners = {}
+    for source, output in collect_sources(paths, output_dir):
+        owners.setdefault(os.path.normpath(output), []).append(source)
+    sources = []
+    for output, owned in owners.items():
+        if len(owned) == 1:
+            sources.append((owned[0], output))
+            continue
+        for source in owned:
+            failed += 1
+            progress(f"❌ {source}: {output} is also the output of "
+                     f"{', '.join(other for other in owned if other != source)}")
+    jobs = jobs or os.cpu_count() or 1
+
+    args = [(source, output, options) for source, output in sources]
+    if jobs == 1 or len(sources) <= 1:
+        _init_worker(cache_dir, use_cache)
+        results = map(lambda a: _compile_one(*a), args)
+        executor = None
+    else:
+        executor = ProcessPoolExecutor(jobs, initializer=_init_worker, initargs=(cache_dir, use_cache))
+        results = executor.map(_compile_one, *zip(*args), chunksize=max(1, len(args) // (jobs * 8)))
+
+    try:
+        for (source, _), (success, hit, message, size, passes) in zip(sources, results):
+            if success:
+                ok += 1
+                cached += hit
+                total_bytes += size
+                for p in passes:
+                    totals = pass_totals.setdefault(p["name"], dict(p, seconds=0.0, visited=0, changed=0))
+                    for key in ("seconds", "visited", "changed"):
+                        totals[key] += p[key]
+                progress(f"✅ {source} -> {message}{' (cached)' if hit else ''}")
+            else:
+                failed += 1
+                progress(f"❌ {source}: {message}")
+    finally:
+        if executor:
+            executor.shutdown()
+
+    elapsed = max(time.perf_counter() - start, 1e-9)
+    progress(f"📊 {ok} compiled ({cached} cached), {failed} failed in {elapsed:.2f}s with {jobs} jobs: "
+           f"{len(sources) / elapsed:.1f} files/s, {total_bytes / 1024 / elapsed:.1f} KiB/s")
+    if time_passes:
+        from .passes import format_pass_stats
+        if time_passes == "text":
+            report(f"⏱️ Passes over {ok} files:")
+        for line in format_pass_stats(list(pass_totals.values()), time_passes, files=ok):
+            report(line)
+    return failed
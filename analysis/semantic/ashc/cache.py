@@ -0,0 +1,207 @@
+import atexit
+import fcntl
+import glob
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+
+from .version import COMPILER_VERSION
+
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+DEFAULT_MAX_AGE = 30 * 24 * 60 * 60  # seconds
+STATS_FLUSH_INTERVAL = 10  # seconds a long-lived process keeps its counts to itself
+
+
+def default_cache_dir():
+    if os.environ.get("ASHC_CACHE_DIR"):
+        return os.environ["ASHC_CACHE_DIR"]
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "ashc")
+
+
+def compiler_fingerprint():
+    """Identify this exact compiler: its version plus, when running from source, its code."""
+    digest = hashlib.sha256(COMPILER_VERSION.encode())
+    # Frozen builds (PyInstaller) have no .py files next to them; the version alone is used.
+    for path in sorted(glob.glob(os.path.join(os.path.dirname(os.path.abspath(__file__)), "*.py"))):
+        with open(path, "rb") as f:
+            digest.update(f.read())
+    return digest.hexdigest()
+
+
+class CompileCache:
+    """On-disk cache of generated Bash, keyed by source text, compiler and flags.
+
+    Entries are written to a temporary file and renamed into place, so
+    concurrent ashc processes sharing a directory only ever see complete
+    entries. Statistics and eviction are serialised with a lock file.
+
+    Hits and misses are counted in memory and added to stats.json by
+    flush(), which runs at exit and at most every STATS_FLUSH_INTERVAL
+    seconds. Eviction scans the directory on the first write, then again
+    only once the size written since takes it over max_bytes.
+    """
+
+    def __init__(self, directory=None, max_bytes=DEFAULT_MAX_BYTES, max_age=DEFAULT_MAX_AGE):
+        self.directory = directory or default_cache_dir()
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.fingerprint = compiler_fingerprint()
+        os.makedirs(self.directory, exist_ok=True)
+        self._pending = {}  # counts not yet in stats.json
+        self._flushed = time.monotonic()
+        self._size = None  # bytes in the directory, as far as this process knows
+        self._mutex = threading.Lock()  # the compile server shares one cache between threads
+        atexit.register(self.flush)
+
+    def key(self, source, flags=None):
+        digest = hashlib.sha256()
+        digest.update(self.fingerprint.encode())
+        digest.update(json.dumps(flags or {}, sort_keys=True).encode())
+        digest.update(b"\0")
+        digest.update(source.encode())
+        return digest.hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.directory, key[:2], key + ".sh")
+
+    def open(self, key):
+        """The entry for key opened for reading, or None on a miss."""
+        path = self._path(key)
+        try:
+            f = open(path)
+        except FileNotFoundError:
+            self._count("misses")
+            return None
+        try:
+            os.utime(path)  # eviction is least-recently-used
+        except FileNotFoundError:
+            pass  # evicted by another process since; f still reads the entry
+        self._count("hits")
+        return f
+
+    def get(self, key):
+        f = self.open(key)
+        if f is None:
+            return None
+        with f:
+            return f.read()
+
+    @contextmanager
+    def writer(self, key):
+        """Yield a text file for the entry of key; it is stored only if the block completes."""
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w") as f:
+                yield f
+        except BaseException:
+            os.unlink(tmp)
+            raise
+        os.replace(tmp, path)
+        if self._size is None:
+            self.evict()
+            return
+        try:
+            self._size += os.path.getsize(path)
+        except FileNotFoundError:
+            pass  # evicted by another process already
+        if self._size > self.max_bytes:
+            self.evict()
+
+    def put(self, key, bash):
+        with self.writer(key) as f:
+            f.write(bash)
+
+    def _entries(self):
+        entries = []
+        for path in glob.glob(os.path.join(self.directory, "??", "*.sh")):
+            try:
+                st = os.stat(path)
+            except FileNotFoundError:
+                continue  # evicted by another process
+            entries.append((st.st_mtime, st.st_size, path))
+        return entries
+
+    def evict(self):
+        """Drop entries older than max_age, then the least recently used until under max_bytes."""
+        with self._lock():
+            entries = sorted(self._entries())
+            total = sum(size for _, size, _ in entries)
+            cutoff = time.time() - self.max_age
+            removed = 0
+            for mtime, size, path in entries:
+                if mtime >= cutoff and total <= self.max_bytes:
+                    break
+                try:
+                    os.unlink(path)
+                except FileNotFoundError:
+                    pass
+                total -= size
+                removed += 1
+            self._size = total
+            if removed:
+                self._update_stats(lambda stats: stats.update(evictions=stats.get("evictions", 0) + removed))
+
+    def stats(self):
+        self.flush()
+        entries = self._entries()
+        with self._lock():
+            stats = self._read_stats()
+        stats.update(directory=self.directory, entries=len(entries),
+                     bytes=sum(size for _, size, _ in entries))
+        return stats
+
+    def _count(self, field):
+        with self._mutex:
+            self._pending[field] = self._pending.get(field, 0) + 1
+            due = time.monotonic() - self._flushed >= STATS_FLUSH_INTERVAL
+        if due:
+            self.flush()
+
+    def flush(self):
+        """Add the hits and misses counted so far to stats.json."""
+        with self._mutex:
+            pending, self._pending = self._pending, {}
+            self._flushed = time.monotonic()
+        if not pending:
+            return
+        try:
+            with self._lock():
+                self._update_stats(lambda stats: stats.update(
+                    {field: stats.get(field, 0) + n for field, n in pending.items()}))
+        except OSError:
+            pass  # the directory is gone; the counts with it
+
+    @contextmanager
+    def _lock(self):
+        with open(os.path.join(self.directory, ".lock"), "a") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def _stats_path(self):
+        return os.path.join(self.directory, "stats.json")
+
+    def _read_stats(self):
+        try:
+            with open(self._stats_path()) as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return {}
+
+    def _update_stats(self, change):
+        # Caller holds the lock
+        stats = self._read_stats()
+        change(stats)
+        fd, tmp = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        with os.fdopen(fd, "w") as f:
+            json.dump(stats, f)
+        os.replace(tmp, self._stats_path())
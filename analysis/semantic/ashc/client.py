@@ -0,0 +1,40 @@
+"""Client side of the compile server (see server.py).
+
+Kept free of compiler imports: forwarding a request must stay much cheaper
+than compiling in-process.
+"""
+import json
+import os
+import socket
+import tempfile
+
+
+def default_socket_path():
+    if os.environ.get("ASHC_SOCKET"):
+        return os.environ["ASHC_SOCKET"]
+    runtime_dir = os.environ.get("XDG_RUNTIME_DIR") or tempfile.gettempdir()
+    return os.path.join(runtime_dir, f"ashc-{os.getuid()}.sock")
+
+
+def request(socket_path, payload, timeout=60):
+    """Send one compile request; returns the reply, or None when no server gives one.
+
+    Any failure to talk to the server (none listening, no permission, no
+    answer within timeout seconds, a truncated reply) gives None, and the
+    caller compiles in-process.
+    """
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.settimeout(timeout)
+            sock.connect(socket_path)
+            sock.sendall(json.dumps(payload).encode() + b"\n")
+            with sock.makefile("rb") as reply:
+                line = reply.readline()
+    except OSError:  # socket.timeout included
+        return None
+    if not line:
+        return None  # server went away mid-request
+    try:
+        return json.loads(line)
+    except ValueError:
+        return None
@@ -0,0 +1,211 @@
+import io
+import os
+import shutil
+import subprocess
+import tempfile
+import time
+from contextlib import nullcontext
+
+from .emit import Tee
+from .errors import AshCompileError, AshError, AshSyntaxError, ReferenceParserError
+from .inline import DEFAULT_INLINE_LIMIT
+from .nodes import (ArrayVal, Cached, For, ForEach, FuncDecl, Index, IndexAssignment, MapVal, ParallelFor,
+                    Spawn, VarDecl, is_array, is_map, walk)
+from .parser import AshParser
+from .passes import DEFAULT_LEVEL, PassOptions, PassStats, run_passes, select_passes
+from .resolve import resolve
+from .typecheck import check_types
+
+# The Flex/Bison reference parser, built in analysis/ (see .github/workflows/test.yml)
+DEFAULT_ASH_BINARY = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "ash")
+
+
+class CompileResult:
+    """Outcome of a successful compilation."""
+
+    __slots__ = ("bash", "cached", "report", "passes")
+
+    def __init__(self, bash, cached=False, report=None, passes=None):
+        self.bash = bash  # the complete script, shebang included; None when streamed to a file
+        self.cached = cached  # True when served from a CompileCache
+        # What the optimizer did, and PassStats.as_dict() per pass; empty when cached
+        self.report = report or []
+        self.passes = passes or []
+
+    def __repr__(self):
+        size = "streamed" if self.bash is None else f"{len(self.bash)} chars"
+        return f"CompileResult({size}, cached={self.cached})"
+
+
+def declared_types(node):
+    """The types written in node: a let's, or a function's return and parameter types."""
+    if isinstance(node, VarDecl):
+        return [node.var_type]
+    if isinstance(node, FuncDecl):
+        return [node.return_type] + [type_ for type_, _ in node.params]
+    return []
+
+
+# Syntax added since the reference grammar (parser.y) was written, which it
+# would reject with a bare syntax error: (test on a node, what to call it)
+REFERENCE_GRAMMAR_GAPS = [
+    (lambda node: isinstance(node, For) and node.step is not None, "`step` in a for loop"),
+    (lambda node: isinstance(node, FuncDecl) and node.annotations, "annotations such as @memo"),
+    (lambda node: isinstance(node, ForEach), "for (x in ...) over a command or a collection"),
+    (lambda node: isinstance(node, ParallelFor), "parallel(N) loops"),
+    (lambda node: isinstance(node, Spawn) or "job" in declared_types(node), "spawn and the job type"),
+    (lambda node: isinstance(node, (ArrayVal, Index, IndexAssignment)) or any(map(is_array, declared_types(node))),
+     "arrays and [i] indexing"),
+    (lambda node: isinstance(node, MapVal) or any(map(is_map, declared_types(node))), "maps"),
+    (lambda node: isinstance(node, Cached), "cached(ttl) !(cmd)"),
+]
+
+
+def reference_grammar_gap(program):
+    """What program uses that the reference grammar does not know, or None."""
+    for node in walk(program):
+        for test, construct in REFERENCE_GRAMMAR_GAPS:
+            if test(node):
+                return construct
+    return None
+
+
+def external_syntax_check(code, binary):
+    """Run the Flex/Bison reference parser over code; returns an error message or None."""
+    result = subprocess.run([binary], input=code, capture_output=True, text=True)
+    # The reference parser reports errors on stderr but always exits 0
+    if result.returncode != 0 or result.stderr:
+        return result.stderr or result.stdout
+    return None
+
+
+def compile_source(code, passes=None, options=None, report=None, stats=None, out=None):
+    """Compile code to a Bash script, returned as a string or, given out, written to that text stream.
+
+    passes names the optimization passes to run (default: those of -O2).
+    A line per optimization made is appended to report and a PassStats per
+    pass, name resolution and type checking first, to stats.
+    """
+    program = AshParser(code).parse()
+    # Checked on the source as written, so errors do not depend on the passes run
+    for name, analysis in (("resolve", resolve), ("typecheck", check_types)):
+        analysis_stats = PassStats(name)
+        start = time.perf_counter()
+        analysis(program, analysis_stats)
+        analysis_stats.seconds = time.perf_counter() - start
+        if stats is not None:
+            stats.append(analysis_stats)
+    names = select_passes() if passes is None else passes
+    program, pass_stats = run_passes(program, names, options or PassOptions(),
+                                     [] if report is None else report)
+    if stats is not None:
+        stats.extend(pass_stats)
+    if out is None:
+        return "#!/bin/bash\n" + program.generate()
+    out.write("#!/bin/bash\n")
+    program.emit(out)
+    return None
+
+
+def compile_string(source, *, cache=None, external_check=False, ash_binary=None,
+                   opt_level=DEFAULT_LEVEL, enable_passes=(), disable_passes=(),
+                   memo_limit=0, inline_limit=DEFAULT_INLINE_LIMIT, out=None):
+    """Compile Ash source text to Bash and return a CompileResult.
+
+    Given a text stream out, the script is written to it as it is generated
+    instead of being returned (CompileResult.bash is then None).
+    opt_level (0-2) selects the optimization passes (see passes.PASSES),
+    enable_passes and disable_passes switch individual ones by name.
+    memo_limit caps the entries of each memo table (0: unbounded); functions
+    of up to inline_limit AST nodes are inlined.
+
+    Nothing is printed and no global state is touched, so this can be called
+    from several threads at once (a CompileCache may be shared between them).
+    Raises AshSyntaxError, ReferenceParserError or AshCompileError.
+    """
+    passes = select_passes(opt_level, enable_passes, disable_passes)
+    options = PassOptions(opt_level, memo_limit, inline_limit)
+    # Unchanged sources skip the whole front end and code generator
+    key = cache.key(source, {"external_check": external_check, "passes": passes, "opt_level": opt_level,
+                             "memo_limit": memo_limit, "inline_limit": inline_limit}) if cache else None
+    entry = cache.open(key) if cache else None
+    if entry is not None:
+        with entry:
+            if out is None:
+                return CompileResult(entry.read(), cached=True)
+            shutil.copyfileobj(entry, out)
+            return CompileResult(None, cached=True)
+
+    if external_check:
+        construct = reference_grammar_gap(AshParser(source).parse())
+        if construct:
+            raise ReferenceParserError(f"the reference grammar does not know {construct}; "
+                                       f"compile this source without --external-check")
+        error = external_syntax_check(source, ash_binary or DEFAULT_ASH_BINARY)
+        if error:
+            raise ReferenceParserError(error)
+    report, stats = [], []
+    buffer = io.StringIO() if out is None else None
+    try:
+        with cache.writer(key) if cache else nullcontext() as entry:
+            target = out or buffer
+            compile_source(source, passes, options, report, stats, Tee(target, entry) if entry else target)
+    except AshError:
+        raise
+    except Exception as e:
+        raise AshCompileError(str(e)) from e
+    bash_code = buffer.getvalue() if buffer is not None else None
+    return CompileResult(bash_code, report=report, passes=[s.as_dict() for s in stats])
+
+
+def compile_file(path, output=None, **options):
+    """Compile the Ash file at path, taking the same options as compile_string.
+
+    When output is given the script is streamed there instead (result.bash
+    is None) and made executable; it is replaced only once complete.
+    """
+    with open(path) as f:
+        source = f.read()
+    if output is None:
+        return compile_string(source, **options)
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(output)), suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w") as out_file:
+            result = compile_string(source, out=out_file, **options)
+        os.chmod(tmp, 0o755)
+        os.replace(tmp, output)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+    return result
+
+
+# compile_string options that a request may carry
+REQUEST_OPTIONS = ("external_check", "ash_binary", "opt_level", "enable_passes", "disable_passes",
+                   "memo_limit", "inline_limit")
+
+ERROR_LABELS = {
+    "reference": "Syntax error (reference parser)",
+    "syntax": "Syntax error",
+    "generation": "Semantic or generation error",
+}
+
+
+def compile_request(request, cache=None):
+    """Run compile_file for a request dict (as sent to the compile server) and describe the outcome.
+
+    The reply is {"ok": True, "cached": bool, "report": [str], "passes": [dict]}
+    or {"ok": False, "error": kind, "message": str}, kind being "reference",
+    "syntax" or "generation". Options missing from the request, or None, keep
+    compile_string's defaults.
+    """
+    options = {name: request[name] for name in REQUEST_OPTIONS if request.get(name) is not None}
+    try:
+        result = compile_file(request["source"], request["output"], cache=cache, **options)
+    except ReferenceParserError as e:
+        return {"ok": False, "error": "reference", "message": str(e)}
+    except AshSyntaxError as e:
+        return {"ok": False, "error": "syntax", "message": str(e)}
+    except Exception as e:
+        return {"ok": False, "error": "generation", "message": str(e)}
+    return {"ok": True, "cached": result.cached, "report": result.report, "passes": result.passes}
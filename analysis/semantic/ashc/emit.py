@@ -0,0 +1,70 @@
+INDENT = "    "
+# Deeper levels are written at this depth: past it indentation no longer
+# helps a reader, and it would make the script grow with depth squared
+MAX_INDENT_DEPTH = 16
+BUFFER_LINES = 2048  # lines collected before a write
+
+
+class Emitter:
+    """Writes generated code to a text stream line by line, indented by nesting depth.
+
+    Lines are collected and written BUFFER_LINES at a time, so the script is
+    never held in memory as a whole and no text is copied more than once,
+    however deeply it is nested. Call flush() at the end.
+    """
+
+    def __init__(self, out, indent=INDENT, buffer_lines=BUFFER_LINES):
+        self.out = out
+        self.prefixes = [indent * depth for depth in range(MAX_INDENT_DEPTH + 1)]
+        self.depth = 0
+        self.prefix = ""
+        self.buffer_lines = buffer_lines
+        self.parts = []
+
+    def line(self, text):
+        """Write one line at the current depth.
+
+        Only its start is indented: text spanning several lines (a string
+        literal with a newline in it) is written as it is.
+        """
+        parts = self.parts
+        parts.append(self.prefix + text + "\n")
+        if len(parts) >= self.buffer_lines:
+            self.flush()
+
+    def indented(self):
+        """Indent the lines written inside a `with` block on the result one level deeper."""
+        return _Indented(self)
+
+    def flush(self):
+        if self.parts:
+            self.out.write("".join(self.parts))
+            self.parts.clear()
+
+
+class _Indented:
+    __slots__ = ("emitter",)
+
+    def __init__(self, emitter):
+        self.emitter = emitter
+
+    def __enter__(self):
+        emitter = self.emitter
+        emitter.depth += 1
+        emitter.prefix = emitter.prefixes[min(emitter.depth, MAX_INDENT_DEPTH)]
+
+    def __exit__(self, *exc):
+        emitter = self.emitter
+        emitter.depth -= 1
+        emitter.prefix = emitter.prefixes[min(emitter.depth, MAX_INDENT_DEPTH)]
+
+
+class Tee:
+    """A writable stream copying everything to several others."""
+
+    def __init__(self, *streams):
+        self.streams = streams
+
+    def write(self, text):
+        for stream in self.streams:
+            stream.write(text)
@@ -0,0 +1,24 @@
+class AshError(Exception):
+    """Base class of every error the compiler reports about a program."""
+
+
+class AshSyntaxError(AshError):
+    """A lexical or syntax error, located in the source by line and column (both 1-based)."""
+
+    def __init__(self, message, line, column):
+        super().__init__(f"{message} at line {line}, column {column}")
+        self.message = message
+        self.line = line
+        self.column = column
+
+
+class AshCompileError(AshError):
+    """A well-formed program the code generator cannot translate."""
+
+
+class AshTypeError(AshCompileError):
+    """An expression whose type does not fit where it is used."""
+
+
+class ReferenceParserError(AshError):
+    """The Flex/Bison reference parser (--external-check) rejected the source."""
@@ -0,0 +1,196 @@
+from .nodes import *
+
+# Bash arithmetic is done on signed 64-bit integers
+INT_BITS = 64
+
+
+def wrap_int(value):
+    """Reduce value to a signed 64-bit integer, wrapping around like bash does."""
+    half = 1 << (INT_BITS - 1)
+    return (value + half) % (1 << INT_BITS) - half
+
+
+def fold_binop(op, left, right):
+    """Evaluate op on two int literals with bash semantics; None when it cannot be folded."""
+    if op == "PLUS":
+        return wrap_int(left + right)
+    if op == "MINUS":
+        return wrap_int(left - right)
+    if op == "MUL":
+        return wrap_int(left * right)
+    if op in ("DIV", "MOD"):
+        if right == 0:
+            return None  # leave the error for run time
+        # C semantics: the quotient is truncated toward zero
+        quotient = abs(left) // abs(right)
+        if (left < 0) != (right < 0):
+            quotient = -quotient
+        if op == "DIV":
+            return wrap_int(quotient)
+        return wrap_int(left - right * quotient)
+    if op == "EQ":
+        return left == right
+    if op == "NEQ":
+        return left != right
+    if op == "GT":
+        return left > right
+    if op == "LT":
+        return left < right
+    if op == "GTE":
+        return left >= right
+    if op == "LTE":
+        return left <= right
+    return None
+
+
+def constant(value):
+    return BoolVal(value) if isinstance(value, bool) else IntVal(value)
+
+
+class ConstantFolder:
+    def __init__(self):
+        self.visited = 0
+        self.changed = 0  # nodes replaced or removed
+
+    def expr(self, expr):
+        folded = self.fold_expr(expr)
+        if folded is not expr:
+            self.changed += 1
+        return folded
+
+    def fold_expr(self, expr):
+        self.visited += 1
+        if isinstance(expr, BinOp):
+            left = self.expr(expr.children[0])
+            right = self.expr(expr.children[1])
+            expr.children = [left, right]
+
+            if isinstance(left, IntVal) and isinstance(right, IntVal):
+                value = fold_binop(expr.op, left.value, right.value)
+                if value is not None:
+                    return constant(value)
+            if expr.op == "PLUS" and isinstance(left, StringVal) and isinstance(right, StringVal):
+                return StringVal(left.value + right.value)
+
+            # and/or short-circuit, so only a constant left operand decides the
+            # result; a constant right operand can go when it is the identity.
+            if expr.op == "AND":
+                if isinstance(left, BoolVal):
+                    return right if left.value else left
+                if isinstance(right, BoolVal) and right.value:
+                    return left
+            if expr.op == "OR":
+                if isinstance(left, BoolVal):
+                    return left if left.value else right
+                if isinstance(right, BoolVal) and not right.value:
+                    return left
+            return expr
+
+        if isinstance(expr, UnOp):
+            operand = self.expr(expr.children[0])
+            expr.children = [operand]
+            if expr.op in ("!", "NOT") and isinstance(operand, BoolVal):
+                return BoolVal(not operand.value)
+            if expr.op in ("-", "MINUS") and isinstance(operand, IntVal):
+                return IntVal(wrap_int(-operand.value))
+            if expr.op in ("+", "PLUS") and isinstance(operand, IntVal):
+                return operand
+            return expr
+
+        if isinstance(expr, (FuncCall, Builtin)):
+            expr.args = [self.expr(arg) for arg in expr.args]
+        elif isinstance(expr, Index):
+            expr.index = self.expr(expr.index)
+        elif isinstance(expr, ArrayVal):
+            expr.elements = [self.expr(element) for element in expr.elements]
+        elif isinstance(expr, MapVal):
+            expr.entries = [self.expr(entry) for entry in expr.entries]
+        elif isinstance(expr, Read) and expr.prompt is not None:
+            expr.prompt = self.expr(expr.prompt)
+        return expr
+
+    def statements(self, statements):
+        """Fold a statement list, splicing in the surviving branch of constant ifs."""
+        folded = []
+        for i, stmt in enumerate(statements):
+            result = self.statement(stmt)
+            if result is not stmt:
+                self.changed += 1
+            if isinstance(result, Block) and result is not stmt:
+                # Bash has no block scope, so a chosen branch can be inlined as is
+                folded.extend(result.children)
+            elif result is not None:
+                folded.append(result)
+            if folded and isinstance(folded[-1], Return):
+                self.changed += len(statements) - i - 1
+                break  # anything after it is unreachable
+        return folded
+
+    def block(self, block):
+        block.children = self.statements(block.children)
+        if not block.children:
+            # Bash rejects empty bodies
+            block.children = [InlineCommand(":")]
+        return block
+
+    def statement(self, stmt):
+        """Fold one statement; returns its replacement, a Block to splice in, or None to drop it."""
+        self.visited += 1
+        if isinstance(stmt, (VarDecl, Assignment)):
+            if stmt.value is not None:
+                stmt.value = self.expr(stmt.value)
+        elif isinstance(stmt, Echo):
+            stmt.expr = self.expr(stmt.expr)
+        elif isinstance(stmt, Return):
+            if stmt.expr is not None:
+                stmt.expr = self.expr(stmt.expr)
+        elif isinstance(stmt, (FuncCall, Builtin)):
+            stmt.args = [self.expr(arg) for arg in stmt.args]
+        elif isinstance(stmt, IndexAssignment):
+            stmt.index = self.expr(stmt.index)
+            stmt.value = self.expr(stmt.value)
+        elif isinstance(stmt, Block):
+            self.block(stmt)
+        elif isinstance(stmt, FuncDecl):
+            self.block(stmt.body)
+        elif isinstance(stmt, If):
+            stmt.condition = self.expr(stmt.condition)
+            if isinstance(stmt.condition, BoolVal):
+                branch = stmt.then_block if stmt.condition.value else stmt.else_block
+                if branch is None:
+                    return None
+                return Block(self.statements(branch.children))
+            self.block(stmt.then_block)
+            if stmt.else_block is not None:
+                self.block(stmt.else_block)
+        elif isinstance(stmt, While):
+            stmt.condition = self.expr(stmt.condition)
+            if isinstance(stmt.condition, BoolVal) and not stmt.condition.value:
+                return None
+            self.block(stmt.body)
+        elif isinstance(stmt, For):
+            stmt.start = self.expr(stmt.start)
+            stmt.end = self.expr(stmt.end)
+            if stmt.step is not None:
+                stmt.step = self.expr(stmt.step)
+            self.block(stmt.body)
+        elif isinstance(stmt, ForEach):
+            self.block(stmt.body)
+        elif isinstance(stmt, ParallelFor):
+            stmt.limit = self.expr(stmt.limit)
+            self.statement(stmt.loop)
+        return stmt
+
+
+def fold_constants(program, stats=None):
+    """Evaluate constant expressions at compile time and drop branches that can never run.
+
+    The program is rewritten in place and returned. When given, stats gets
+    the number of nodes visited and changed added to it.
+    """
+    folder = ConstantFolder()
+    program.children = folder.statements(program.children)
+    if stats is not None:
+        stats.visited += folder.visited
+        stats.changed += folder.changed
+    return program
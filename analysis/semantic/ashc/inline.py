@@ -0,0 +1,247 @@
+import copy
+
+from .nodes import *
+
+# Largest function body, in AST nodes, that is inlined by default
+DEFAULT_INLINE_LIMIT = 24
+
+# Strings are left alone until expressions are typed: `+` on a substituted
+# string argument would turn into arithmetic
+INLINE_TYPES = {"int", "bool", "void"}
+
+
+def size(func):
+    return sum(1 for _ in walk(func.body)) - 1
+
+
+def calls_in(node):
+    return {n.name for n in walk(node) if isinstance(n, FuncCall)}
+
+
+def recursive_functions(functions):
+    """Names of the functions that can end up calling themselves."""
+    graph = {name: calls_in(f.body) & functions.keys() for name, f in functions.items()}
+    recursive = set()
+    for start in graph:
+        seen, stack = set(), list(graph[start])
+        while stack:
+            name = stack.pop()
+            if name == start:
+                recursive.add(start)
+                break
+            if name not in seen:
+                seen.add(name)
+                stack.extend(graph[name])
+    return recursive
+
+
+def single_return(func):
+    """The expression of a body that is just `return expr;`, else None."""
+    body = func.body.children
+    if len(body) == 1 and isinstance(body[0], Return):
+        return body[0].expr
+    return None
+
+
+def single_exit(func):
+    """True if the only return of func, if any, is its last top-level statement."""
+    body = func.body.children
+    returns = [n for n in walk(func.body) if isinstance(n, Return)]
+    if not returns:
+        return func.return_type == "void"
+    return len(returns) == 1 and body[-1] is returns[0] \
+        and (returns[0].expr is not None) == (func.return_type != "void")
+
+
+def substitute(expr, bindings):
+    """Copy expr with the identifiers in bindings replaced by (copies of) their values."""
+    if isinstance(expr, Identifier) and expr.name in bindings:
+        return copy.deepcopy(bindings[expr.name])
+    expr = copy.copy(expr)
+    if isinstance(expr, (BinOp, UnOp)):
+        expr.children = [substitute(child, bindings) for child in expr.children]
+    elif isinstance(expr, (FuncCall, Builtin)):
+        expr.args = [substitute(arg, bindings) for arg in expr.args]
+    elif isinstance(expr, Index):
+        expr.index = substitute(expr.index, bindings)
+    elif isinstance(expr, Read) and expr.prompt is not None:
+        expr.prompt = substitute(expr.prompt, bindings)
+    return expr
+
+
+def rename_locals(body, renames):
+    """Rename the parameters and locals of an inlined body in place."""
+    for node in walk(body):
+        if isinstance(node, (Identifier, Assignment, VarDecl)) and node.name in renames:
+            node.name = renames[node.name]
+        elif isinstance(node, (For, ForEach)) and node.var in renames:
+            node.var = renames[node.var]
+
+
+class Inliner:
+    def __init__(self, program, limit):
+        functions = {f.name: f for f in program.children if isinstance(f, FuncDecl)}
+        recursive = recursive_functions(functions)
+        sizes = {name: size(f) for name, f in functions.items()}
+        self.candidates = {
+            name: f for name, f in functions.items()
+            if name not in recursive and "memo" not in f.annotations and sizes[name] <= limit
+            and f.return_type in INLINE_TYPES and all(t in INLINE_TYPES for t, _ in f.params)
+        }
+        self.sites = 0
+        self.inlined = set()
+        self.visited = sum(n + 1 for n in sizes.values())  # the bodies measured to pick the candidates
+
+    def expression_call(self, expr):
+        """Replace a call of a `return expr;` function by the expression itself."""
+        func = self.candidates.get(expr.name) if isinstance(expr, FuncCall) else None
+        if func is None or len(expr.args) != len(func.params):
+            return expr
+        body = single_return(func)
+        # Arguments may be duplicated or dropped, so they must not have effects
+        if body is None or any(has_side_effects(arg) for arg in expr.args):
+            return expr
+        self.sites += 1
+        self.inlined.add(func.name)
+        return substitute(body, {name: arg for (_, name), arg in zip(func.params, expr.args)})
+
+    def expr(self, expr):
+        if expr is None:
+            return None
+        self.visited += 1
+        if isinstance(expr, (BinOp, UnOp)):
+            expr.children = [self.expr(child) for child in expr.children]
+        elif isinstance(expr, FuncCall):
+            expr.args = [self.expr(arg) for arg in expr.args]
+            return self.expression_call(expr)
+        elif isinstance(expr, Builtin):
+            expr.args = [self.expr(arg) for arg in expr.args]
+        elif isinstance(expr, Index):
+            expr.index = self.expr(expr.index)
+        elif isinstance(expr, ArrayVal):
+            expr.elements = [self.expr(element) for element in expr.elements]
+        elif isinstance(expr, MapVal):
+            expr.entries = [self.expr(entry) for entry in expr.entries]
+        elif isinstance(expr, Read):
+            expr.prompt = self.expr(expr.prompt)
+        return expr
+
+    def statement_call(self, call, result):
+        """Splice a called body in place of a statement, or return None.
+
+        result is None for a bare call, else a function turning the returned
+        expression into the statement that stores it.
+        """
+        func = self.candidates.get(call.name)
+        if func is None or len(call.args) != len(func.params) or not single_exit(func):
+            return None
+        value = func.body.children[-1].expr if func.return_type != "void" else None
+        if result is None and has_side_effects(value) and not isinstance(value, FuncCall):
+            return None  # there would be no statement left to evaluate it
+        self.sites += 1
+        self.inlined.add(func.name)
+        prefix = f"__ash_in{self.sites}_"
+        body = copy.deepcopy(func.body)
+        own = {name for _, name in func.params}
+        own.update(n.name for n in walk(body) if isinstance(n, VarDecl))
+        own.update(n.var for n in walk(body) if isinstance(n, (For, ForEach)))
+        rename_locals(body, {name: prefix + name for name in own})
+        for node in walk(body):
+            if isinstance(node, VarDecl) and node.value is None:
+                # In the caller it may run again, in a loop, and must start over
+                node.value = default_value(node.var_type)
+
+        statements = [VarDecl(type_, prefix + name, arg) for (type_, name), arg in zip(func.params, call.args)]
+        statements += body.children
+        if statements and isinstance(statements[-1], Return):
+            value = statements.pop().expr
+            if result is not None:
+                statements.append(result(value))
+            elif isinstance(value, FuncCall):
+                statements.append(value)  # still made, for its effects
+        return statements
+
+    def statements(self, statements):
+        result = []
+        for stmt in statements:
+            spliced = None
+            self.statement(stmt)
+            # Calls that were not replaced by an expression can still be
+            # spliced in when they make up the whole statement
+            if isinstance(stmt, FuncCall):
+                spliced = self.statement_call(stmt, None)
+            elif isinstance(stmt, VarDecl) and isinstance(stmt.value, FuncCall):
+                decl = stmt
+                spliced = self.statement_call(stmt.value, lambda value: VarDecl(decl.var_type, decl.name, value))
+            elif isinstance(stmt, Assignment) and isinstance(stmt.value, FuncCall):
+                target = stmt.name
+                spliced = self.statement_call(stmt.value, lambda value: Assignment(target, value))
+            elif isinstance(stmt, Return) and isinstance(stmt.expr, FuncCall):
+                spliced = self.statement_call(stmt.expr, Return)
+            if spliced is not None:
+                # The spliced statements may hold further calls to inline
+                result.extend(self.statements(spliced))
+                continue
+            result.append(stmt)
+        return result
+
+    def statement(self, stmt):
+        self.visited += 1
+        if isinstance(stmt, (VarDecl, Assignment)):
+            stmt.value = self.expr(stmt.value)
+        elif isinstance(stmt, (Echo, Return)):
+            stmt.expr = self.expr(stmt.expr)
+        elif isinstance(stmt, (FuncCall, Builtin)):
+            stmt.args = [self.expr(arg) for arg in stmt.args]
+        elif isinstance(stmt, IndexAssignment):
+            stmt.index = self.expr(stmt.index)
+            stmt.value = self.expr(stmt.value)
+        elif isinstance(stmt, Block):
+            stmt.children = self.statements(stmt.children)
+        elif isinstance(stmt, FuncDecl):
+            stmt.body.children = self.statements(stmt.body.children)
+        elif isinstance(stmt, If):
+            stmt.condition = self.expr(stmt.condition)
+            stmt.then_block.children = self.statements(stmt.then_block.children)
+            if stmt.else_block is not None:
+                stmt.else_block.children = self.statements(stmt.else_block.children)
+        elif isinstance(stmt, While):
+            stmt.condition = self.expr(stmt.condition)
+            stmt.body.children = self.statements(stmt.body.children)
+        elif isinstance(stmt, For):
+            stmt.start = self.expr(stmt.start)
+            stmt.end = self.expr(stmt.end)
+            stmt.step = self.expr(stmt.step)
+            stmt.body.children = self.statements(stmt.body.children)
+        elif isinstance(stmt, ForEach):
+            stmt.body.children = self.statements(stmt.body.children)
+        elif isinstance(stmt, ParallelFor):
+            stmt.limit = self.expr(stmt.limit)
+            self.statement(stmt.loop)
+
+
+def inline_functions(program, limit=DEFAULT_INLINE_LIMIT, stats=None):
+    """Substitute the bodies of small non-recursive functions at their call sites.
+
+    A function whose body is `return expr;` is replaced by expr wherever its
+    arguments have no side effects; a body with a single exit at its end is
+    spliced in place of a call statement or of `let x = f(...);` and
+    `x = f(...);`, its parameters and locals renamed so they cannot clash
+    with the caller's. limit is the largest body, in AST nodes, that is
+    inlined (0 disables inlining). Functions left without callers are
+    dropped. Returns the names of the inlined functions; stats, when given,
+    gets the nodes visited and the call sites replaced added to it.
+    """
+    if limit <= 0:
+        return []  # disabled: nothing is looked at, stats stay as they are
+    inliner = Inliner(program, limit)
+    if inliner.candidates:
+        program.children = inliner.statements(program.children)
+        remaining = calls_in(program)
+        program.children = [stmt for stmt in program.children
+                            if not (isinstance(stmt, FuncDecl) and stmt.name in inliner.inlined
+                                    and stmt.name not in remaining)]
+    if stats is not None:
+        stats.visited += inliner.visited
+        stats.changed += inliner.sites
+    return sorted(inliner.inlined)
@@ -0,0 +1,78 @@
+from .errors import AshCompileError
+from .nodes import *
+
+# Parameter types that can be joined into a memo table key unambiguously
+KEY_TYPES = {"int", "bool"}
+
+
+def has_direct_effects(func):
+    """True if func does I/O, runs commands or touches variables other than its own.
+
+    Reading a global would make the result depend on more than the arguments,
+    so that counts too.
+    """
+    nodes = list(walk(func.body))
+    own = {name for _, name in func.params}
+    own.update(node.name for node in nodes if isinstance(node, VarDecl))
+    own.update(node.var for node in nodes if isinstance(node, (For, ForEach)))
+    for node in nodes:
+        if isinstance(node, (Echo, InlineCommand, CaptureCommand, Spawn, Cached, Read)) or is_input(node):
+            return True
+        if isinstance(node, (Identifier, Assignment)) and node.name not in own:
+            return True
+    return False
+
+
+def pure_functions(program):
+    """Names of the functions whose results depend only on their arguments."""
+    functions = {f.name: f for f in program.children if isinstance(f, FuncDecl)}
+    pure = {name for name, f in functions.items() if not has_direct_effects(f)}
+    callees = {name: {n.name for n in walk(functions[name].body) if isinstance(n, FuncCall)} for name in pure}
+    # A function calling an impure (or unknown) one is impure as well
+    changed = True
+    while changed:
+        changed = False
+        for name in list(pure):
+            if not callees[name] <= pure:
+                pure.discard(name)
+                changed = True
+    return pure
+
+
+def self_calls(func):
+    return sum(1 for n in walk(func.body) if isinstance(n, FuncCall) and n.name == func.name)
+
+
+def memoize_functions(program, auto=True, limit=0, stats=None):
+    """Give functions a memo table keyed on their arguments.
+
+    @memo forces it and @memo(false) prevents it; @memo(N) also caps the
+    table at N entries. With auto, pure int functions that call themselves
+    more than once (tree recursion, exponential without a memo) are picked
+    up too. limit caps every table without its own cap; 0 means unbounded.
+    Returns the names of the memoized functions; stats, when given, gets the
+    nodes examined and the functions memoized added to it.
+    """
+    pure = pure_functions(program) if auto else set()
+    if stats is not None:
+        stats.visited += sum(1 for _ in walk(program)) if auto else len(program.children)
+    memoized = []
+    for func in program.children:
+        if not isinstance(func, FuncDecl):
+            continue
+        annotation = func.annotations.get("memo")
+        if annotation is False:
+            continue
+        if annotation is None:
+            if not (func.name in pure and func.return_type == "int" and func.params
+                    and all(t in KEY_TYPES for t, _ in func.params) and self_calls(func) >= 2):
+                continue
+        elif func.return_type == "void" or any(t not in KEY_TYPES for t, _ in func.params):
+            raise AshCompileError(f"@memo function {func.name} must return a value "
+                                  f"and take only int or bool parameters")
+        # @memo(N) with N an int caps this table; bool True is plain @memo
+        func.memo = annotation if type(annotation) is int else limit
+        memoized.append(func.name)
+    if stats is not None:
+        stats.changed += len(memoized)
+    return memoized
@@ -0,0 +1,1313 @@
+import io
+import re
+import shlex
+
+from .emit import Emitter
+from .errors import AshCompileError
+from .runtime import PREFIX, runtime_code
+
+# Functions hand their result back through this global instead of echoing it,
+# so calls run in the current shell rather than in a $( ... ) subshell.
+RETURN_REGISTER = "__ash_ret"
+
+COMPARISON_OPS = {"EQ", "NEQ", "GT", "LT", "GTE", "LTE"}
+LOGICAL_OPS = {"AND", "OR"}
+
+# Binding strength of each operator inside a bash arithmetic context (as in C)
+PRECEDENCE = {
+    "OR": 1,
+    "AND": 2,
+    "EQ": 3, "NEQ": 3,
+    "GT": 4, "LT": 4, "GTE": 4, "LTE": 4,
+    "PLUS": 5, "MINUS": 5,
+    "MUL": 6, "DIV": 6, "MOD": 6,
+}
+
+
+def is_boolean(expr):
+    """True for expressions built from comparisons and and/or/not."""
+    if isinstance(expr, BinOp):
+        return expr.op in COMPARISON_OPS or expr.op in LOGICAL_OPS
+    if isinstance(expr, UnOp):
+        return expr.op in ("!", "NOT")
+    return isinstance(expr, BoolVal)
+
+
+def walk(node):
+    """Yield node and every node below it, parents first, in source order (nothing for None)."""
+    stack = [node] if node is not None else []
+    while stack:
+        node = stack.pop()
+        yield node
+        children = node.child_nodes()
+        children.reverse()
+        stack.extend(children)
+
+
+def is_array(type_):
+    return type_.endswith("[]")
+
+
+def is_map(type_):
+    return type_.startswith("map<")
+
+
+def is_collection(type_):
+    return is_array(type_) or is_map(type_)
+
+
+def map_type(value_type):
+    return f"map<string, {value_type}>"
+
+
+def element_type(type_):
+    """The type of the elements of an array type, or of the values of a map type."""
+    return type_[:-2] if is_array(type_) else type_[len("map<string, "):-1]
+
+
+def declare_options(type_):
+    """The declare/local options of a variable of type_, such as "-ai " for an int[].
+
+    Maps must be declared -A. Int variables, and arrays and maps of ints,
+    evaluate what is assigned to them as arithmetic (see integer_value).
+    """
+    options = "a" if is_array(type_) else "A" if is_map(type_) else ""
+    if (element_type(type_) if options else type_) == "int":
+        options += "i"
+    return f"-{options} " if options else ""
+
+
+def default_value(type_):
+    """The value a `let` of type_ without one starts with, written out.
+
+    A declaration run again in the same shell, as the passes that turn calls
+    into loops or splice bodies in make it, would otherwise keep the value
+    from the previous run.
+    """
+    if is_collection(type_):
+        value = ArrayVal([]) if is_array(type_) else MapVal([])
+        value.type = type_
+        return value
+    return {"int": IntVal(0), "bool": BoolVal(False)}.get(type_) or StringVal("")
+
+
+def declared_variables(statements):
+    """{name: type} of the variables and loop counters declared in statements, outside functions."""
+    names = {}
+    stack = list(statements)
+    while stack:
+        node = stack.pop()
+        if isinstance(node, VarDecl):
+            names[node.name] = node.var_type
+        elif isinstance(node, For):
+            names[node.var] = "int"
+        elif isinstance(node, ForEach):
+            names[node.var] = node.symbol.type
+        if not isinstance(node, FuncDecl):
+            stack.extend(node.child_nodes())
+    return names
+
+
+def integer_value(expr, ctx):
+    """The right-hand side of an assignment to a declare -i / local -i variable.
+
+    Bash evaluates text assigned to such a variable as arithmetic, so an
+    expression is given as it is, quoted, instead of going through a $(( ))
+    whose result would be evaluated again.
+    """
+    if isinstance(expr, (BinOp, UnOp)):
+        return quote_arith(expr.generate_arith(ctx))
+    return expr.generate(ctx)
+
+
+def element_value(expr, collection_type, ctx):
+    """An element of an array or a value of a map of collection_type, as a word to assign."""
+    if element_type(collection_type) == "int":
+        return integer_value(expr, ctx)  # declared -ai or -Ai, see declare_options
+    if expr.type == "string":
+        return f'"{expr.generate_quoted(ctx)}"'
+    return expr.generate(ctx)
+
+
+def map_key(expr, ctx):
+    return f'"{expr.generate_quoted(ctx)}"'
+
+
+def assign_collection(ctx, name, value, type_, declare):
+    """Write `name = value` for an array or a map; declare makes name a new local in a function."""
+    def assign(code):
+        return ctx.assign(name, code, type_) if declare else f"{name}={code}"
+
+    if isinstance(value, ArrayVal):
+        ctx.emit(assign("(" + " ".join(element_value(e, type_, ctx) for e in value.elements) + ")"))
+    elif isinstance(value, MapVal):
+        pairs = zip(value.entries[::2], value.entries[1::2])
+        ctx.emit(assign("(" + " ".join(f"[{map_key(key, ctx)}]={element_value(v, type_, ctx)}"
+                                       for key, v in pairs) + ")"))
+    elif isinstance(value, Builtin):
+        # read_lines(): mapfile fills the array itself
+        code = f"{value.generate(ctx)} {name}"
+        if declare and ctx.in_function:
+            ctx.emit(f"local {declare_options(type_)}{name}", code)
+        else:
+            ctx.emit(code)
+    elif is_array(type_):
+        ctx.emit(assign(f'("${{{value.name}[@]}}")'))
+    elif value.name != name:
+        # A map is copied key by key
+        key = ctx.new_temp()
+        ctx.emit(assign("()"))
+        if ctx.in_function:
+            ctx.line(f"local {key}")
+        ctx.line(f'for {key} in "${{!{value.name}[@]}}"; do '
+                 f'{name}["${key}"]=${{{value.name}["${key}"]}}; done')
+
+
+def quote_arith(code):
+    # A lone name or number needs no quotes; operators, spaces and parentheses
+    # do, and a map lookup must still be expanded (see Index.generate_arith)
+    if code.replace("_", "").isalnum():
+        return code
+    return f'"{code}"' if "$" in code else f"'{code}'"
+
+
+def has_side_effects(expr):
+    """True if evaluating expr runs a function or a command, or reads input."""
+    return any(isinstance(node, (FuncCall, CaptureCommand, Spawn, Cached, Read)) or is_input(node)
+               for node in walk(expr))
+
+
+def is_input(node):
+    return isinstance(node, Builtin) and node.name in INPUT_BUILTINS
+
+
+def is_arithmetic_condition(expr):
+    """True if expr can be tested as a single (( ... )), with && and || keeping their short-circuit."""
+    if isinstance(expr, BoolVal):
+        return True
+    if isinstance(expr, BinOp):
+        if expr.op in COMPARISON_OPS:
+            # Strings and bools are compared as text, see BinOp.generate_condition
+            return expr.children[0].type == "int"
+        if expr.op in LOGICAL_OPS:
+            left, right = expr.children
+            # Calls in the right operand would be hoisted out of the (( ))
+            # and run even when the left one decides the result
+            return is_arithmetic_condition(left) and is_arithmetic_condition(right) \
+                and not has_side_effects(right)
+    if isinstance(expr, UnOp) and expr.op in ("!", "NOT"):
+        return is_arithmetic_condition(expr.children[0])
+    return False
+
+
+class CodegenContext:
+    def __init__(self, emitter):
+        self.emitter = emitter
+        self.line = emitter.line
+        self.indented = emitter.indented
+        self.in_function = False
+        self.globals = set()  # the variables declared at the top level
+        self.integers = set()  # the int variables declared -i up front in the current function or program
+        self.memo = None  # (table, size cap) of the memoized function being generated
+        self.temp_count = 0
+        self.hoisted = []
+
+    def new_temp(self):
+        self.temp_count += 1
+        return f"__ash_t{self.temp_count}"
+
+    def assign(self, name, value, type_=None):
+        # Inside a function every variable we introduce must be local, otherwise
+        # a recursive call (now running in the same shell) would clobber it.
+        if type_ == "int" and name in self.integers:
+            return f"{name}={value}"
+        if self.in_function:
+            return f"local {declare_options(type_ or '')}{name}={value}"
+        return f"{name}={value}"
+
+    def hoist(self, code):
+        self.hoisted.append(code)
+
+    def take_hoisted(self):
+        hoisted, self.hoisted = self.hoisted, []
+        return hoisted
+
+    def emit(self, *lines):
+        """Write lines, preceded by the calls hoisted out of their expressions.
+
+        ctx.line(code) and `with ctx.indented():` go to the emitter directly.
+        """
+        if self.hoisted:
+            for code in self.take_hoisted():
+                self.line(code)
+        for code in lines:
+            self.line(code)
+
+    def condition(self, expr):
+        """Build an if/while condition list that re-runs hoisted calls each time it is tested."""
+        cond = expr.generate_condition(self)
+        return "; ".join(self.take_hoisted() + [cond])
+
+    def function_return(self):
+        """Leave the current function, first recording its result when it is memoized."""
+        if self.memo is not None:
+            table, limit = self.memo
+            store = f"{table}[$__ash_key]=${RETURN_REGISTER}"
+            if limit:
+                store = f"if (( ${{#{table}[@]}} < {limit} )); then {store}; fi"
+            self.line(store)
+        self.line("return")
+
+    def boolean_value(self, expr):
+        """Turn a condition into the string true/false; returns the name of the temporary holding it."""
+        cond = expr.generate_condition(self)
+        temp = self.new_temp()
+        self.hoist(f"if {cond}; then {self.assign(temp, 'true')}; else {self.assign(temp, 'false')}; fi")
+        return temp
+
+
+_SLOTS = {}  # node class -> every attribute name in its __slots__ chain
+
+
+class Node:
+    # Subclasses list their attributes in __slots__, so nodes carry no
+    # per-instance __dict__; the ones holding child nodes (a node, None or
+    # a list of nodes) are named in child_fields, in source order.
+    __slots__ = ()
+    child_fields = ()
+
+    def __init__(self, *children):
+        self.children = list(children)
+
+    def __deepcopy__(self, memo):
+        return self.clone()
+
+    def clone(self):
+        """Copy this subtree; attributes other than child nodes (names, symbols) are shared."""
+        cls = type(self)
+        fields = _SLOTS.get(cls)
+        if fields is None:
+            fields = _SLOTS[cls] = [name for c in cls.__mro__ for name in getattr(c, "__slots__", ())]
+        twin = object.__new__(cls)
+        for field in fields:
+            value = getattr(self, field)
+            if field in cls.child_fields:
+                if type(value) is list:
+                    value = [child.clone() for child in value]
+                elif value is not None:
+                    value = value.clone()
+            setattr(twin, field, value)
+        return twin
+
+    def child_nodes(self):
+        """The nodes directly below this one, in source order."""
+        nodes = []
+        for field in self.child_fields:
+            value = getattr(self, field)
+            if type(value) is list:
+                nodes.extend(value)
+            elif value is not None:
+                nodes.append(value)
+        return nodes
+
+    def generate(self, ctx):
+        """Return this expression as bash code, hoisting what must run before it into ctx."""
+        raise NotImplementedError("Each expression node must implement its own generate method.")
+
+    def emit(self, ctx):
+        """Write this statement to ctx's emitter."""
+        raise NotImplementedError("Each statement node must implement its own emit method.")
+
+    def generate_condition(self, ctx):
+        """Emit a command whose exit status is this expression's truth value."""
+        return f"[[ {self.generate(ctx)} == true ]]"
+
+    def generate_arith(self, ctx):
+        """Emit this expression for use inside an arithmetic context, (( )) or $(( ))."""
+        return self.generate(ctx)
+
+    def generate_quoted(self, ctx):
+        """Emit this expression's value as text to go inside a double-quoted word."""
+        return self.generate(ctx)
+
+
+class Program(Node):
+    __slots__ = ("children", "scope", "runtime")
+    child_fields = ("children",)
+
+    def __init__(self, statements):
+        super().__init__(*statements)
+        self.scope = None  # the global Scope, once resolved
+        self.runtime = set()  # the runtime.HELPERS it uses, recorded by the type checker
+
+    def emit(self, out):
+        """Write the script body to the text stream out."""
+        emitter = Emitter(out)
+        ctx = CodegenContext(emitter)
+        for code in runtime_code(self.runtime):
+            ctx.line(code)
+        # Every int variable is declared -i once here, so assignments in
+        # loops do not pay for a declare each time (see integer_value)
+        variables = declared_variables(self.children)
+        ctx.globals = set(variables)
+        ctx.integers = {name for name, type_ in variables.items() if type_ == "int"}
+        if ctx.integers:
+            ctx.line("declare -i " + " ".join(sorted(ctx.integers)))
+        # Arrays and maps too: a map must be declared before anything is
+        # stored in it, and what goes in an int array is arithmetic
+        collections = {}
+        for name, type_ in variables.items():
+            if is_collection(type_):
+                collections.setdefault(declare_options(type_), []).append(name)
+        for options, names in sorted(collections.items()):
+            ctx.line(f"declare {options}" + " ".join(sorted(names)))
+        for child in self.children:
+            child.emit(ctx)
+        emitter.flush()
+
+    def generate(self):
+        """The script body as a string."""
+        out = io.StringIO()
+        self.emit(out)
+        return out.getvalue()
+
+
+class VarDecl(Node):
+    __slots__ = ("var_type", "name", "value", "symbol")
+    child_fields = ("value",)
+
+    def __init__(self, var_type, name, value=None):
+        self.var_type = var_type
+        self.name = name
+        self.value = value
+        self.symbol = None  # set by the resolver, like every symbol below
+
+    def emit(self, ctx):
+        if self.value is None:
+            if is_collection(self.var_type):
+                ctx.line(ctx.assign(self.name, "()", self.var_type))  # an array or map starts out empty
+            elif ctx.in_function:
+                ctx.line(f"local -i {self.name}" if self.var_type == "int" else f"local {self.name}")
+            else:
+                ctx.line(f"# declared {self.var_type} {self.name}")
+        elif isinstance(self.value, Read):
+            # read stores into the variable itself, there is no `=`
+            read = f"{self.value.generate(ctx)} {self.name}"
+            if ctx.in_function and self.name not in ctx.integers:
+                ctx.emit(f"local {self.name}", read)
+            else:
+                ctx.emit(read)
+        elif isinstance(self.value, FuncCall):
+            self.value.emit(ctx)
+            ctx.line(ctx.assign(self.name, '$' + RETURN_REGISTER, self.var_type))
+        elif self.var_type == "int" and self.name in ctx.integers:
+            ctx.emit(ctx.assign(self.name, integer_value(self.value, ctx), "int"))
+        elif is_collection(self.var_type):
+            assign_collection(ctx, self.name, self.value, self.var_type, declare=True)
+        else:
+            # `local -i x='x + 1'` would read the new, empty local: the value
+            # must be expanded before local runs
+            ctx.emit(ctx.assign(self.name, self.value.generate(ctx), self.var_type))
+
+
+class Assignment(Node):
+    __slots__ = ("name", "value", "symbol")
+    child_fields = ("value",)
+
+    def __init__(self, name, value):
+        self.name = name
+        self.value = value
+        self.symbol = None
+
+    def emit(self, ctx):
+        if isinstance(self.value, Read):
+            ctx.emit(f"{self.value.generate(ctx)} {self.name}")
+        elif isinstance(self.value, FuncCall):
+            self.value.emit(ctx)
+            ctx.line(f"{self.name}=${RETURN_REGISTER}")
+        elif is_collection(self.value.type):
+            assign_collection(ctx, self.name, self.value, self.value.type, declare=False)
+        elif self.value.type == "int":
+            value = self.value
+            if isinstance(value, BinOp) and value.op == "PLUS" and isinstance(value.children[0], Identifier) \
+                    and value.children[0].name == self.name:
+                # x = x + e: += adds arithmetically to an integer variable
+                ctx.emit(f"{self.name}+={quote_arith(value.children[1].generate_arith(ctx))}")
+            else:
+                ctx.emit(f"{self.name}={integer_value(value, ctx)}")
+        else:
+            ctx.emit(f"{self.name}={self.value.generate(ctx)}")
+
+class FuncCall(Node):
+    __slots__ = ("name", "args", "type", "builtin")
+    child_fields = ("args",)
+
+    def __init__(self, name, args):
+        self.name = name
+        self.args = args
+        self.type = None  # the return type, set by the type checker like every type below
+        self.builtin = False  # set by the type checker for await() and the other typecheck.BUILTINS
+
+    def emit(self, ctx):
+        """Make the call as a statement; the result is left in RETURN_REGISTER."""
+        ctx.emit(f'{self.callee()} {self.generate_args(ctx)}'.rstrip())
+
+    def callee(self):
+        # Builtins are functions of the runtime, see runtime.py
+        return PREFIX + self.name if self.builtin else self.name
+
+    def generate_args(self, ctx):
+        # Quoted strings reach the function as one argument, spaces and all
+        return " ".join(f'"{arg.generate_quoted(ctx)}"' if arg.type == "string" else arg.generate(ctx)
+                        for arg in self.args)
+
+    def generate(self, ctx):
+        return f'${self.hoist_call(ctx)}'
+
+    def generate_arith(self, ctx):
+        return self.hoist_call(ctx)
+
+    def generate_quoted(self, ctx):
+        return f'${{{self.hoist_call(ctx)}}}'
+
+    def hoist_call(self, ctx):
+        """Run the call ahead of the enclosing statement and return the temporary holding its result.
+
+        This way the expression itself never needs a subshell.
+        """
+        args_str = self.generate_args(ctx)
+        temp = ctx.new_temp()
+        ctx.hoist(f'{self.callee()} {args_str}'.rstrip())
+        ctx.hoist(ctx.assign(temp, '$' + RETURN_REGISTER))
+        return temp
+
+
+class Builtin(Node):
+    """A call of one of the INLINE_BUILTINS, written out in place rather than run as a function."""
+    __slots__ = ("name", "args", "type")
+    child_fields = ("args",)
+
+    def __init__(self, name, args):
+        self.name = name
+        self.args = args
+        self.type = None
+
+    def emit(self, ctx):
+        code = INLINE_BUILTINS[self.name](self, ctx)
+        # Void builtins are commands and bool ones tests, an array one fills
+        # MAPFILE when no name follows; a value is thrown away by `:`
+        ctx.emit(code if self.type in ("void", "bool") or is_array(self.type) else f": {code}")
+
+    def generate(self, ctx):
+        if self.type == "bool":
+            return f"${ctx.boolean_value(self)}"
+        if self.type == "string" and not is_input(self):
+            return f'"{INLINE_BUILTINS[self.name](self, ctx)}"'
+        # What is read is left unquoted, as by !(cmd): removing the quotes from
+        # a whole file would copy it once more
+        return INLINE_BUILTINS[self.name](self, ctx)
+
+    def generate_condition(self, ctx):
+        return INLINE_BUILTINS[self.name](self, ctx)
+
+    def generate_quoted(self, ctx):
+        if self.type == "string":
+            return INLINE_BUILTINS[self.name](self, ctx)
+        return self.generate(ctx)
+
+
+def string_name(expr, ctx):
+    """The name of a variable holding the string expr, for a ${name...} expansion.
+
+    Anything but a variable is first stored in a temporary.
+    """
+    if isinstance(expr, Identifier):
+        return expr.name
+    temp = ctx.new_temp()
+    ctx.hoist(ctx.assign(temp, f'"{expr.generate_quoted(ctx)}"'))
+    return temp
+
+
+def arith_operand(expr, ctx):
+    # Parenthesized, so that a negative offset is not read as ${s:-default}
+    code = expr.generate_arith(ctx)
+    return code if code.replace("_", "").isalnum() else f"({code})"
+
+
+def _len(call, ctx):
+    arg = call.args[0]
+    if arg.type == "string":
+        return f"${{#{string_name(arg, ctx)}}}"
+    return f"${{#{arg.name}[@]}}"
+
+
+def _substr(call, ctx):
+    text, start, length = call.args
+    return f"${{{string_name(text, ctx)}:{arith_operand(start, ctx)}:{arith_operand(length, ctx)}}}"
+
+
+def _replace(call, ctx):
+    text, old, new = call.args
+    # Quoted, the text to find is no pattern and & in the replacement is no reference to it
+    return f'${{{string_name(text, ctx)}//"{old.generate_quoted(ctx)}"/"{new.generate_quoted(ctx)}"}}'
+
+
+def _starts_with(call, ctx):
+    text, prefix = call.args
+    return f'[[ "{text.generate_quoted(ctx)}" == "{prefix.generate_quoted(ctx)}"* ]]'
+
+
+def _ends_with(call, ctx):
+    text, suffix = call.args
+    return f'[[ "{text.generate_quoted(ctx)}" == *"{suffix.generate_quoted(ctx)}" ]]'
+
+
+def _index_of(call, ctx):
+    text, part = call.args
+    name, part = string_name(text, ctx), part.generate_quoted(ctx)
+    # What comes before the first occurrence, then its length; -1 if there is none
+    temp = ctx.new_temp()
+    before = ctx.assign(temp, f'${{{name}%%"{part}"*}}')
+    ctx.hoist(f'if [[ ${name} == *"{part}"* ]]; then {before}; {temp}=${{#{temp}}}; '
+              f'else {ctx.assign(temp, "-1")}; fi')
+    return f"${temp}"
+
+
+def _upper(call, ctx):
+    return f"${{{string_name(call.args[0], ctx)}^^}}"
+
+
+def _lower(call, ctx):
+    return f"${{{string_name(call.args[0], ctx)},,}}"
+
+
+def _trim(call, ctx):
+    name = string_name(call.args[0], ctx)
+    # Strip the leading whitespace into a temporary, then the trailing
+    temp = ctx.new_temp()
+    ctx.hoist(ctx.assign(temp, f'${{{name}#"${{{name}%%[![:space:]]*}}"}}'))
+    return f'${{{temp}%"${{{temp}##*[![:space:]]}}"}}'
+
+
+def _has(call, ctx):
+    table, key = call.args
+    return f"[[ -v {table.name}[{map_key(key, ctx)}] ]]"
+
+
+def _delete(call, ctx):
+    table, key = call.args
+    # unset expands the single-quoted subscript itself, once: a key held in a
+    # variable may contain quotes, ] or spaces, written out it could not
+    return f"unset -v '{table.name}[${string_name(key, ctx)}]'"
+
+
+def _append(call, ctx):
+    array, value = call.args
+    return f"{array.name}+=({element_value(value, array.type, ctx)})"
+
+
+def _read_file(call, ctx):
+    # Bash reads a $(< file) itself, in large blocks, without a subshell
+    return f'$(< "{call.args[0].generate_quoted(ctx)}")'
+
+
+def _read_lines(call, ctx):
+    # Like read, followed by the name of the array to fill, see assign_collection
+    return "mapfile -t"
+
+
+# name -> function(call, ctx) returning the code of the value (unquoted for
+# a string), of the test for a bool one or of the statement for a void one;
+# arrays and maps are passed by name (an Identifier). Strings go through
+# parameter expansion and [[ ]] patterns, so none of them forks.
+INLINE_BUILTINS = {
+    "len": _len,
+    "append": _append,
+    "has": _has,
+    "delete": _delete,
+    "substr": _substr,
+    "replace": _replace,
+    "starts_with": _starts_with,
+    "ends_with": _ends_with,
+    "index_of": _index_of,
+    "upper": _upper,
+    "lower": _lower,
+    "trim": _trim,
+    "read_file": _read_file,
+    "read_lines": _read_lines,
+}
+# Builtins reading the script's input or a file, which inlining must not repeat or drop
+INPUT_BUILTINS = {"read_file", "read_lines"}
+
+
+class Echo(Node):
+    __slots__ = ("expr",)
+    child_fields = ("expr",)
+
+    def __init__(self, expr):
+        self.expr = expr
+
+    def emit(self, ctx):
+        if self.expr.type == "string":
+            # Quoted, so that the value is neither split into words nor globbed
+            ctx.emit(f'echo "{self.expr.generate_quoted(ctx)}"')
+        elif is_array(self.expr.type):
+            ctx.emit(f'echo "${{{self.expr.name}[*]}}"')  # the elements, separated by spaces
+        else:
+            ctx.emit(f'echo {self.expr.generate(ctx)}')
+
+
+class Return(Node):
+    __slots__ = ("expr",)
+    child_fields = ("expr",)
+
+    def __init__(self, expr):
+        self.expr = expr
+
+    def emit(self, ctx):
+        if self.expr is None:
+            ctx.line("return")
+            return
+        if is_boolean(self.expr) and not isinstance(self.expr, BoolVal):
+            cond = self.expr.generate_condition(ctx)
+            ctx.emit(f'if {cond}; then {RETURN_REGISTER}=true; else {RETURN_REGISTER}=false; fi')
+        elif isinstance(self.expr, FuncCall):
+            # The callee already leaves its result in the register
+            self.expr.emit(ctx)
+        else:
+            ctx.emit(f"{RETURN_REGISTER}={self.expr.generate(ctx)}")
+        ctx.function_return()
+
+
+class Continue(Node):
+    """Start the next iteration of the enclosing loop, or of the levels-th one out.
+
+    Not part of the language; passes use it when they introduce loops.
+    """
+    __slots__ = ("levels",)
+
+    def __init__(self, levels=1):
+        self.levels = levels
+
+    def emit(self, ctx):
+        ctx.line("continue" if self.levels == 1 else f"continue {self.levels}")
+
+
+class InlineCommand(Node):
+    __slots__ = ("command",)
+
+    def __init__(self, command):
+        self.command = command
+
+    def emit(self, ctx):
+        ctx.line(self.command)
+
+
+class CaptureCommand(Node):
+    __slots__ = ("command",)
+    type = "string"
+
+    def __init__(self, command):
+        self.command = command
+
+    def generate(self, ctx):
+        return f'$( {self.command} )'
+
+
+class Spawn(Node):
+    """`spawn !(cmd)`: start cmd in the background; the value is its job, which await() and status() take."""
+    __slots__ = ("command",)
+    type = "job"
+
+    def __init__(self, command):
+        self.command = command
+
+    def generate(self, ctx):
+        # The job names its output file; its pid is kept for status() to wait on
+        temp = ctx.new_temp()
+        ctx.hoist("[[ -n $__ash_jobs ]] || __ash_jobs_start")
+        ctx.hoist("__ash_jobs_count+=1")
+        ctx.hoist(ctx.assign(temp, "$BASHPID.$__ash_jobs_count"))
+        ctx.hoist(f'{{ {self.command} ; }} > "$__ash_jobs/${temp}" &')
+        ctx.hoist(f'__ash_jobs_pid[${temp}]=$!')
+        return f"${temp}"
+
+
+class Cached(Node):
+    """`cached(ttl) !(cmd)`: cmd's output, reused from the cache for ttl seconds after a run."""
+    __slots__ = ("ttl", "command")
+    child_fields = ("ttl",)
+    type = "string"
+
+    def __init__(self, ttl, command):
+        self.ttl = ttl
+        self.command = command
+
+    def generate(self, ctx):
+        # The key is the command's text with the values of the variables it
+        # expands, so !(ssh $host uptime) is cached once per host
+        names = dict.fromkeys(re.findall(r"\$\{?([A-Za-z_]\w*)", self.command))
+        key = " ".join([shlex.quote(self.command)] + [f'"${name}"' for name in names])
+        ctx.hoist(f"if ! {PREFIX}cache_get {self.ttl.generate(ctx)} {key}; then "
+                  f"{RETURN_REGISTER}=$( {self.command} ) && {PREFIX}cache_put; fi")
+        temp = ctx.new_temp()
+        ctx.hoist(ctx.assign(temp, f"${RETURN_REGISTER}"))
+        return f"${temp}"
+
+
+class IntVal(Node):
+    __slots__ = ("value",)
+    type = "int"
+
+    def __init__(self, value):
+        self.value = value
+
+    def generate(self, ctx):
+        return str(self.value)
+
+    def generate_arith(self, ctx):
+        return str(self.value)
+
+
+class StringVal(Node):
+    __slots__ = ("value",)
+    type = "string"
+
+    def __init__(self, value):
+        self.value = value
+
+    def generate(self, ctx):
+        return f'"{self.value}"'
+
+    def generate_quoted(self, ctx):
+        return self.value
+
+
+class BoolVal(Node):
+    __slots__ = ("value",)
+    type = "bool"
+
+    def __init__(self, value):
+        self.value = value
+
+    def generate(self, ctx):
+        return "true" if self.value else "false"
+
+    def generate_condition(self, ctx):
+        return "true" if self.value else "false"
+
+    def generate_arith(self, ctx):
+        return "1" if self.value else "0"
+
+
+class ArrayVal(Node):
+    """`[a, b, ...]`; only ever the whole value of a let or an assignment."""
+    __slots__ = ("elements", "type")
+    child_fields = ("elements",)
+
+    def __init__(self, elements):
+        self.elements = elements
+        self.type = None  # the array type, which for [] only the variable tells
+
+
+class MapVal(Node):
+    """`{key: value, ...}`; only ever the whole value of a let or an assignment."""
+    __slots__ = ("entries", "type")
+    child_fields = ("entries",)
+
+    def __init__(self, entries):
+        self.entries = entries  # key, value, key, value, ...
+        self.type = None
+
+
+class Index(Node):
+    """`arr[i]` or `map[key]`: an element of an array or the value of a key in a map.
+
+    Out of range or missing, it is empty (0 for an int).
+    """
+    __slots__ = ("array", "index", "type")
+    child_fields = ("array", "index")
+
+    def __init__(self, array, index):
+        self.array = array  # an Identifier
+        self.index = index
+        self.type = None
+
+    def subscript(self, ctx):
+        if is_map(self.array.type):
+            return f"{self.array.name}[{map_key(self.index, ctx)}]"
+        # Indexed array subscripts are arithmetic, negative ones counting from the end
+        return f"{self.array.name}[{self.index.generate_arith(ctx)}]"
+
+    def generate(self, ctx):
+        if self.type == "int":
+            return f"${{{self.subscript(ctx)}}}"
+        return f'"${{{self.subscript(ctx)}}}"'
+
+    def generate_arith(self, ctx):
+        if is_map(self.array.type):
+            # Expanded first: a quoted key means nothing to arithmetic
+            return f"${{{self.subscript(ctx)}:-0}}"
+        return self.subscript(ctx)
+
+    def generate_quoted(self, ctx):
+        return f"${{{self.subscript(ctx)}}}"
+
+
+class IndexAssignment(Node):
+    """`arr[i] = value;` or `map[key] = value;`"""
+    __slots__ = ("array", "index", "value")
+    child_fields = ("array", "index", "value")
+
+    def __init__(self, array, index, value):
+        self.array = array  # an Identifier
+        self.index = index
+        self.value = value
+
+    def emit(self, ctx):
+        if is_map(self.array.type):
+            subscript = f"{self.array.name}[{map_key(self.index, ctx)}]"
+        else:
+            subscript = f"{self.array.name}[{self.index.generate_arith(ctx)}]"
+        if isinstance(self.value, FuncCall):
+            self.value.emit(ctx)
+            ctx.line(f"{subscript}=${RETURN_REGISTER}")
+        else:
+            value = element_value(self.value, self.array.type, ctx)
+            ctx.emit(f"{subscript}={value}")
+
+
+class Identifier(Node):
+    __slots__ = ("name", "symbol", "type")
+
+    def __init__(self, name, type_=None):
+        self.name = name
+        self.symbol = None
+        self.type = type_
+
+    def generate(self, ctx):
+        return f"${self.name}"
+
+    def generate_arith(self, ctx):
+        # Arithmetic contexts look variables up themselves, no expansion needed
+        return self.name
+
+    def generate_quoted(self, ctx):
+        return f"${{{self.name}}}"  # braces keep it apart from text that follows
+
+class Read(Node):
+    __slots__ = ("prompt",)
+    child_fields = ("prompt",)
+    type = "string"
+
+    def __init__(self, prompt=None):
+        self.prompt = prompt
+
+    def generate(self, ctx):
+        if self.prompt:
+            return f'read -p "{self.prompt.generate_quoted(ctx)}"'
+        return 'read'
+
+class BinOp(Node):
+    __slots__ = ("op", "children", "type")
+    child_fields = ("children",)
+
+    def __init__(self, op, left, right, type_=None):
+        self.op = op
+        super().__init__(left, right)
+        self.type = type_
+
+    op_map = {
+        "PLUS": "+",
+        "MINUS": "-",
+        "MUL": "*",
+        "DIV": "/",
+        "MOD": "%",
+        "EQ": "==",
+        "NEQ": "!=",
+        "GT": ">",
+        "LT": "<",
+        "GTE": ">=",
+        "LTE": "<=",
+        "AND": "&&",
+        "OR": "||"
+    }
+
+    def generate(self, ctx):
+        if self.op not in self.op_map:
+            raise AshCompileError(f"Unknown binary operator: {self.op}")
+
+        # Truth values are stored as the strings true/false
+        if is_boolean(self):
+            return f"${ctx.boolean_value(self)}"
+        if self.type == "string":
+            return f'"{self.generate_quoted(ctx)}"'
+        # The whole tree goes into one arithmetic expansion
+        return f"$(( {self.generate_arith(ctx)} ))"
+
+    def generate_quoted(self, ctx):
+        if self.type == "string":
+            # Concatenation is just writing the operands next to each other
+            return "".join(child.generate_quoted(ctx) for child in self.children)
+        if is_boolean(self):
+            return f"${{{ctx.boolean_value(self)}}}"
+        return self.generate(ctx)
+
+    def generate_arith(self, ctx):
+        if self.op not in self.op_map:
+            raise AshCompileError(f"Unknown binary operator: {self.op}")
+        precedence = PRECEDENCE[self.op]
+        left, right = self.children
+        left_code = left.generate_arith(ctx)
+        right_code = right.generate_arith(ctx)
+        # Only parenthesise where bash's precedence would regroup the tree;
+        # all binary operators are left-associative.
+        if isinstance(left, BinOp) and PRECEDENCE[left.op] < precedence:
+            left_code = f"({left_code})"
+        if isinstance(right, BinOp) and PRECEDENCE[right.op] <= precedence:
+            right_code = f"({right_code})"
+        return f"{left_code} {self.op_map[self.op]} {right_code}"
+
+    def generate_condition(self, ctx):
+        if is_arithmetic_condition(self):
+            return f"(( {self.generate_arith(ctx)} ))"
+        if self.op in ("EQ", "NEQ"):
+            left, right = (f'"{child.generate_quoted(ctx)}"' for child in self.children)
+            return f"[[ {left} {self.op_map[self.op]} {right} ]]"
+        if self.op not in LOGICAL_OPS:
+            return super().generate_condition(ctx)
+
+        left = self.children[0].generate_condition(ctx)
+        # Calls in the right operand must only run when it is evaluated,
+        # so they are kept inside it instead of being hoisted further.
+        outer = ctx.take_hoisted()
+        right = self.children[1].generate_condition(ctx)
+        inner = ctx.take_hoisted()
+        ctx.hoisted = outer
+        if inner or isinstance(self.children[1], BinOp) and self.children[1].op in LOGICAL_OPS:
+            right = "{ " + "; ".join(inner + [right]) + "; }"
+        return f"{left} {self.op_map[self.op]} {right}"
+
+class UnOp(Node):
+    __slots__ = ("op", "children", "type")
+    child_fields = ("children",)
+
+    def __init__(self, op, expr, type_=None):
+        self.op = op
+        super().__init__(expr)
+        self.type = type_
+
+    def generate(self, ctx):
+        if self.op in ("!", "NOT"):
+            return f"${ctx.boolean_value(self)}"
+        return f"$(( {self.generate_arith(ctx)} ))"
+
+    def generate_quoted(self, ctx):
+        if self.op in ("!", "NOT"):
+            return f"${{{ctx.boolean_value(self)}}}"
+        return self.generate(ctx)
+
+    def generate_arith(self, ctx):
+        operand = self.children[0]
+        value = operand.generate_arith(ctx)
+        if isinstance(operand, BinOp) or value.startswith(("-", "+")):
+            value = f"({value})"  # keep "- -1" from reading as "--1"
+        # The parser hands us token types (PLUS/MINUS/NOT)
+        if self.op in ("+", "PLUS"):
+            return f"+{value}"
+        elif self.op in ("-", "MINUS"):
+            return f"-{value}"
+        elif self.op in ("!", "NOT"):
+            return f"!{value}"
+        else:
+            raise AshCompileError(f"Unknown unary operator {self.op}")
+
+    def generate_condition(self, ctx):
+        if self.op not in ("!", "NOT"):
+            return super().generate_condition(ctx)
+        if is_arithmetic_condition(self):
+            return f"(( {self.generate_arith(ctx)} ))"
+        operand = self.children[0]
+        cond = operand.generate_condition(ctx)
+        if isinstance(operand, BinOp) and operand.op in LOGICAL_OPS:
+            cond = f"{{ {cond}; }}"
+        return f"! {cond}"
+
+class Block(Node):
+    __slots__ = ("children",)
+    child_fields = ("children",)
+
+    def __init__(self, statements):
+        super().__init__(*statements)
+
+    def emit(self, ctx):
+        for stmt in self.children:
+            stmt.emit(ctx)
+
+
+class FuncDecl(Node):
+    __slots__ = ("return_type", "name", "params", "body", "annotations", "memo", "scope")
+    child_fields = ("body",)
+
+    def __init__(self, return_type, name, params, body, annotations=None):
+        self.return_type = return_type
+        self.name = name
+        self.params = params
+        self.body = body
+        self.annotations = annotations or {}
+        self.memo = None  # size cap of the memo table (0: unbounded) once memoized
+        self.scope = None  # Scope of the parameters and locals, once resolved
+
+    def emit(self, ctx):
+        memo = None
+        if self.memo is not None:
+            memo = (f"__ash_memo_{self.name}", self.memo)
+            ctx.line(f"declare -gA {memo[0]}=()")
+        ctx.line(f"{self.name}() {{")
+        outer = ctx.in_function, ctx.memo, ctx.integers
+        # Int locals are made local -i at once on entry, except those named
+        # like a global: until declared, the global is the one in use
+        params = {name for _, name in self.params}
+        ctx.integers = {name for type_, name in self.params if type_ == "int"}
+        ctx.integers.update(name for name, type_ in declared_variables(self.body.children).items()
+                            if type_ == "int" and (name in params or name not in ctx.globals))
+        ctx.in_function, ctx.memo = True, memo
+        with ctx.indented():
+            if memo is not None:
+                # Results are looked up by argument list before running the body
+                # and recorded by every return (see CodegenContext.function_return)
+                table = memo[0]
+                ctx.line("local __ash_key=" + ",".join(f"${i + 1}" for i in range(len(self.params))))
+                ctx.line(f"if [[ -v {table}[$__ash_key] ]]; then "
+                         f"{RETURN_REGISTER}=${{{table}[$__ash_key]}}; return; fi")
+            # One local per type: parameters first, then int locals
+            args = [(type_, f"{name}=${i + 1}") for i, (type_, name) in enumerate(self.params)]
+            ints = [arg for type_, arg in args if type_ == "int"]
+            ints += sorted(ctx.integers - params)
+            others = [arg for type_, arg in args if type_ != "int"]
+            if ints:
+                ctx.line("local -i " + " ".join(ints))
+            if others:
+                ctx.line("local " + " ".join(others))
+            self.body.emit(ctx)
+        ctx.in_function, ctx.memo, ctx.integers = outer
+        ctx.line("}")
+
+class If(Node):
+    __slots__ = ("condition", "then_block", "else_block")
+    child_fields = ("condition", "then_block", "else_block")
+
+    def __init__(self, condition, then_block, else_block=None):
+        self.condition = condition
+        self.then_block = then_block
+        self.else_block = else_block
+
+    def emit(self, ctx):
+        ctx.line(f"if {ctx.condition(self.condition)}; then")
+        with ctx.indented():
+            self.then_block.emit(ctx)
+        if self.else_block is not None:
+            ctx.line("else")
+            with ctx.indented():
+                self.else_block.emit(ctx)
+        ctx.line("fi")
+
+class While(Node):
+    __slots__ = ("condition", "body")
+    child_fields = ("condition", "body")
+
+    def __init__(self, condition, body):
+        self.condition = condition
+        self.body = body
+
+    def emit(self, ctx):
+        ctx.line(f"while {ctx.condition(self.condition)}; do")
+        with ctx.indented():
+            self.body.emit(ctx)
+        ctx.line("done")
+
+
+class For(Node):
+    __slots__ = ("var", "start", "end", "body", "step", "symbol")
+    child_fields = ("start", "end", "step", "body")
+
+    def __init__(self, var, start, end, body, step=None):
+        self.var = var
+        self.start = start
+        self.end = end
+        self.body = body
+        self.step = step
+        self.symbol = None
+
+    def emit(self, ctx):
+        self.emit_loop(ctx, self.body.emit)
+
+    def emit_loop(self, ctx, emit_body):
+        """Write the loop, with emit_body(ctx) writing what each iteration runs."""
+        # Bounds are evaluated once, before the first iteration, like the
+        # $(seq ...) this replaces, but the range is never materialised.
+        start = self.start.generate_arith(ctx)
+        end = self._once(self.end, ctx)
+        if self.step is None:
+            step = 1
+        elif isinstance(self.step, UnOp) and self.step.op == "MINUS" and isinstance(self.step.children[0], IntVal):
+            step = -self.step.children[0].value
+        else:
+            step = self._once(self.step, ctx)
+
+        if isinstance(step, int):
+            cond = f"{self.var} <= {end}" if step > 0 else f"{self.var} >= {end}"
+            if abs(step) == 1:
+                incr = f"{self.var}++" if step > 0 else f"{self.var}--"
+            else:
+                incr = f"{self.var} += {step}" if step > 0 else f"{self.var} -= {-step}"
+        else:
+            # Direction is only known at runtime
+            cond = f"{step} > 0 ? {self.var} <= {end} : {self.var} >= {end}"
+            incr = f"{self.var} += {step}"
+
+        header = f"for (( {self.var} = {start}; {cond}; {incr} )); do"
+        if ctx.in_function and self.var not in ctx.integers:
+            ctx.emit(f"local -i {self.var}", header)
+        else:
+            ctx.emit(header)
+        with ctx.indented():
+            emit_body(ctx)
+        ctx.line("done")
+
+    @staticmethod
+    def _once(expr, ctx):
+        """Snapshot a bound into a temporary unless it is a literal."""
+        if isinstance(expr, IntVal):
+            return expr.value
+        temp = ctx.new_temp()
+        ctx.hoist(ctx.assign(temp, expr.generate(ctx)))
+        return temp
+
+
+class ForEach(Node):
+    """`for (line in !(cmd))`, `for (line in read_lines())` or `for (x in arr)`.
+
+    Runs the body once per line the command prints or the script reads, or
+    per element.
+    """
+    __slots__ = ("var", "iterable", "body", "symbol")
+    child_fields = ("iterable", "body")
+
+    def __init__(self, var, iterable, body):
+        self.var = var
+        self.iterable = iterable
+        self.body = body
+        self.symbol = None
+
+    def emit(self, ctx):
+        self.emit_loop(ctx, self.body.emit)
+
+    def emit_loop(self, ctx, emit_body):
+        """Write the loop, with emit_body(ctx) writing what each iteration runs."""
+        if isinstance(self.iterable, Identifier):
+            # The elements are expanded once, so appending in the body does
+            # not make the loop longer
+            if ctx.in_function and self.var not in ctx.integers:
+                ctx.line(f"local {declare_options(self.symbol.type)}{self.var}")
+            # A map's keys, an array's elements
+            keys = "!" if is_map(self.iterable.type) else ""
+            ctx.line(f'for {self.var} in "${{{keys}{self.iterable.name}[@]}}"; do')
+            with ctx.indented():
+                emit_body(ctx)
+            ctx.line("done")
+            return
+        if isinstance(self.iterable, Builtin):
+            # read_lines() looped over is streamed: a line at a time, never
+            # the whole input in an array
+            if ctx.in_function:
+                ctx.line(f"local {self.var}")
+            ctx.line(f"while IFS= read -r {self.var} || [[ -n ${self.var} ]]; do")
+            with ctx.indented():
+                emit_body(ctx)
+            ctx.line("done")
+            return
+        # The lines are read as the command prints them, through a process
+        # substitution rather than $( ), so its output is never held in memory
+        # and the body runs in this shell. The loop reads from descriptor 3,
+        # leaving stdin to read() and the commands in the body; a nested loop
+        # redirects 3 only until it is done, so one number does for all.
+        if ctx.in_function:
+            ctx.line(f"local {self.var}")
+        # The || test keeps a last line that has no newline
+        ctx.line(f"while IFS= read -r -u 3 {self.var} || [[ -n ${self.var} ]]; do")
+        with ctx.indented():
+            emit_body(ctx)
+        ctx.line(f"done 3< <({self.iterable.command})")
+
+
+class ParallelFor(Node):
+    """`parallel(limit) for (...) { ... }`: run the iterations of a for loop as background jobs.
+
+    At most limit run at once. With ordered, the output of each iteration is
+    held back until the ones before it have printed theirs.
+    """
+    __slots__ = ("limit", "loop", "ordered")
+    child_fields = ("limit", "loop")
+
+    def __init__(self, limit, loop, ordered=False):
+        self.limit = limit
+        self.loop = loop  # a For or a ForEach
+        self.ordered = ordered
+
+    def emit(self, ctx):
+        if isinstance(self.limit, IntVal):
+            limit = self.limit.value
+        else:
+            limit = ctx.new_temp()
+            value = self.limit.generate_arith(ctx)
+            ctx.hoist(ctx.assign(limit, f"$(( {value} > 1 ? {value} : 1 ))"))
+        # jobs maps the pid of each running iteration to its number; failed
+        # keeps the exit status of the first one to fail
+        jobs, failed, pid, status = (ctx.new_temp() for _ in range(4))
+        lines = [ctx.assign(jobs, "()"), ctx.assign(failed, "0")]
+        if ctx.in_function:
+            lines.append(f"local {pid} {status}")
+        if self.ordered:
+            outputs, done, count, printed = (ctx.new_temp() for _ in range(4))
+            lines += [ctx.assign(outputs, "$(mktemp -d)"), ctx.assign(done, "()"),
+                      ctx.assign(count, "0"), ctx.assign(printed, "0")]
+        ctx.emit(*lines)
+
+        def reap():
+            """Wait for one of the iterations to finish."""
+            ctx.line(f'wait -n -p {pid} "${{!{jobs}[@]}}"; {status}=$?')
+            ctx.line(f"if (( {status} != 0 && {failed} == 0 )); then {failed}=${status}; fi")
+            if self.ordered:
+                # Print every finished output that is next in line
+                ctx.line(f"{done}[{jobs}[{pid}]]=1")
+                ctx.line(f'unset "{jobs}[${pid}]"')
+                ctx.line(f"while [[ -v {done}[{printed}] ]]; do "
+                         f'cat "${outputs}/${printed}"; {printed}=$(( {printed} + 1 )); done')
+            else:
+                ctx.line(f'unset "{jobs}[${pid}]"')
+
+        def iteration(ctx):
+            ctx.line(f"if (( ${{#{jobs}[@]}} >= {limit} )); then")
+            with ctx.indented():
+                reap()
+            ctx.line("fi")
+            ctx.line("{")
+            with ctx.indented():
+                self.loop.body.emit(ctx)
+            if self.ordered:
+                ctx.line(f'}} > "${outputs}/${count}" &')
+                ctx.line(f"{jobs}[$!]=${count}; {count}=$(( {count} + 1 ))")
+            else:
+                ctx.line("} &")
+                ctx.line(f"{jobs}[$!]=1")
+
+        self.loop.emit_loop(ctx, iteration)
+        ctx.line(f"while (( ${{#{jobs}[@]}} > 0 )); do")
+        with ctx.indented():
+            reap()
+        ctx.line("done")
+        if self.ordered:
+            ctx.line(f'rm -rf "${outputs}"')
+        # The loop's own exit status is that of the first failed iteration
+        ctx.line(f"(( {failed} == 0 )) || (exit ${failed})")
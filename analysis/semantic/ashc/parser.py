@@ -0,0 +1,531 @@
+from .tokenizer import Tokenizer
+from .nodes import *
+
+# Annotations accepted in front of a function declaration
+ANNOTATIONS = {"memo"}
+
+class AshParser:
+    def __init__(self, source_code):
+        self.tokenizer = Tokenizer(source_code)
+        self.tokenizer.select_next()
+
+    def error(self, message, token=None):
+        """Build an AshSyntaxError located at token (default: the current token)."""
+        token = token or self.tokenizer.next
+        return self.tokenizer.error(message, token.pos)
+
+    def parse(self):
+        return self.parse_program()
+
+    def parse_program(self):
+        items = []
+        while self.tokenizer.next.type != "EOF":
+            if self.tokenizer.next.type == "AT":
+                annotations = self.parse_annotations()
+                if not self.at_function_declaration():
+                    raise self.error("Expected a function declaration after annotation")
+                items.append(self.parse_function_declaration(annotations))
+            elif self.at_function_declaration():
+                items.append(self.parse_function_declaration())
+            else:
+                items.append(self.parse_statement())
+        return Program(items)
+
+    def parse_annotations(self):
+        """Parse `@name` or `@name(literal)` annotations in front of a function."""
+        annotations = {}
+        while self.tokenizer.next.type == "AT":
+            self.tokenizer.select_next()
+            token = self.tokenizer.next
+            if token.type != "IDENTIFIER" or token.value not in ANNOTATIONS:
+                raise self.error("Unknown annotation")
+            self.tokenizer.select_next()
+            value = True
+            if self.tokenizer.next.type == "LPAREN":
+                self.tokenizer.select_next()
+                if self.tokenizer.next.type not in {"INT", "BOOL"}:
+                    raise self.error("Expected an integer or boolean annotation argument")
+                value = self.tokenizer.next.value
+                self.tokenizer.select_next()
+                if self.tokenizer.next.type != "RPAREN":
+                    raise self.error("Expected ')' after annotation argument")
+                self.tokenizer.select_next()
+            annotations[token.value] = value
+        return annotations
+
+    def at_type(self):
+        token = self.tokenizer.next
+        # 'map' and 'job' are contextual, types only where a type is expected
+        return token.type.endswith("_TYPE") or (token.type == "IDENTIFIER" and token.value in ("map", "job"))
+
+    def at_function_declaration(self):
+        """True at the return type of a function declaration.
+
+        A statement can start with a variable named job, so after `job` this
+        looks one or two tokens ahead for `function` or `[]`, then comes back.
+        """
+        token = self.tokenizer.next
+        if token.type.endswith("_TYPE"):
+            return True
+        if token.type != "IDENTIFIER" or token.value != "job":
+            return False
+        position = self.tokenizer.position
+        self.tokenizer.select_next()
+        if self.tokenizer.next.type == "LBRACKET":
+            self.tokenizer.select_next()
+            found = self.tokenizer.next.type == "RBRACKET"
+        else:
+            found = self.tokenizer.next.type == "FUNCTION"
+        self.tokenizer.position = position
+        self.tokenizer.next = token
+        return found
+
+    def parse_type(self):
+        """Parse the type at the current token: `int`, an array type such as `int[]` or a map type."""
+        token = self.tokenizer.next
+        if token.type == "IDENTIFIER" and token.value == "map":
+            return self.parse_map_type()
+        if token.type == "IDENTIFIER" and token.value == "job":
+            type_ = "job"
+        else:
+            type_ = token.type.replace("_TYPE", "").lower()
+        self.tokenizer.select_next()
+        if self.tokenizer.next.type == "LBRACKET":
+            if type_ == "void":
+                raise self.error("An array cannot hold void", token)
+            self.tokenizer.select_next()
+            if self.tokenizer.next.type != "RBRACKET":
+                raise self.error("Expected ']'")
+            self.tokenizer.select_next()
+            type_ += "[]"
+        return type_
+
+    def parse_map_type(self):
+        """Parse `map<string, T>`; T is a type that is neither void nor an array or a map."""
+        self.tokenizer.select_next()
+        if self.tokenizer.next.type != "LT":
+            raise self.error("Expected '<' after map")
+        self.tokenizer.select_next()
+        if self.tokenizer.next.type != "STRING_TYPE":
+            raise self.error("The keys of a map must be strings")
+        self.tokenizer.select_next()
+        if self.tokenizer.next.type != "COMMA":
+            raise self.error("Expected ','")
+        self.tokenizer.select_next()
+        token = self.tokenizer.next
+        if not self.at_type():
+            raise self.error("Expected the type of the values of the map")
+        value_type = self.parse_type()
+        if value_type == "void" or is_collection(value_type):
+            raise self.error(f"A map cannot hold {value_type}", token)
+        if self.tokenizer.next.type != "GT":
+            raise self.error("Expected '>'")
+        self.tokenizer.select_next()
+        return map_type(value_type)
+
+    def parse_function_declaration(self, annotations=None):
+        return_type = self.parse_type()
+        if self.tokenizer.next.type != "FUNCTION":
+            raise self.error("Expected 'function'")
+        self.tokenizer.select_next()
+        if self.tokenizer.next.type != "IDENTIFIER":
+            raise self.error("Expected function name")
+        name = self.tokenizer.next.value
+        self.tokenizer.select_next()
+        args = self.parse_parameter_list()
+        body = self.parse_block()
+        return FuncDecl(return_type, name, args, body, annotations)
+
+    def parse_parameter_list(self):
+        params = []
+        if self.tokenizer.next.type != "LPAREN":
+            raise self.error("Expected '(' after function name")
+        self.tokenizer.select_next()
+        if self.tokenizer.next.type != "RPAREN":
+            param_type = self.parse_type()
+            if self.tokenizer.next.type != "IDENTIFIER":
+                raise self.error("Expected parameter name")
+            name = self.tokenizer.next.value
+            self.tokenizer.select_next()
+            params.append((param_type, name))
+            while self.tokenizer.next.type == "COMMA":
+                self.tokenizer.select_next()
+                param_type = self.parse_type()
+                if self.tokenizer.next.type != "IDENTIFIER":
+                    raise self.error("Expected parameter name")
+                name = self.tokenizer.next.value
+                self.tokenizer.select_next()
+                params.append((param_type, name))
+        if self.tokenizer.next.type != "RPAREN":
+            raise self.error("Expected ')' after parameter list")
+        self.tokenizer.select_next()
+        return params
+
+    def parse_block(self):
+        if self.tokenizer.next.type != "LBRACE":
+            raise self.error("Expected '{'")
+        self.tokenizer.select_next()
+        stmts = []
+        while self.tokenizer.next.type != "RBRACE":
+            stmts.append(self.parse_statement())
+        self.tokenizer.select_next()
+        return Block(stmts)
+
+    def parse_statement(self):
+        if self.tokenizer.next.type == "LET":
+            return self.parse_variable_declaration()
+        elif self.tokenizer.next.type == "IF":
+            return self.parse_if()
+        elif self.tokenizer.next.type == "FOR":
+            return self.parse_for()
+        elif self.tokenizer.next.type == "WHILE":
+            return self.parse_while()
+        elif self.tokenizer.next.type == "ECHO_KW":
+            return self.parse_echo()
+        elif self.tokenizer.next.type == "RETURN":
+            return self.parse_return()
+        elif self.tokenizer.next.type == "BANG_LINE":
+            content = self.tokenizer.next.value
+            self.tokenizer.select_next()
+            if self.tokenizer.next.type != "SEMI":
+                raise self.error("Expected ';'")
+            self.tokenizer.select_next()
+            return InlineCommand(content)
+        elif self.tokenizer.next.type == "IDENTIFIER":
+            name = self.tokenizer.next.value
+            self.tokenizer.select_next()
+            if self.tokenizer.next.type == "ASSIGN":
+                self.tokenizer.select_next()
+                value = self.parse_expression()
+                if self.tokenizer.next.type != "SEMI":
+                    raise self.error("Expected ';'")
+                self.tokenizer.select_next()
+                return Assignment(name, value)
+            elif self.tokenizer.next.type == "LBRACKET":
+                index = self.parse_index()
+                if self.tokenizer.next.type != "ASSIGN":
+                    raise self.error("Expected '='")
+                self.tokenizer.select_next()
+                value = self.parse_expression()
+                if self.tokenizer.next.type != "SEMI":
+                    raise self.error("Expected ';'")
+                self.tokenizer.select_next()
+                return IndexAssignment(Identifier(name), index, value)
+            elif self.tokenizer.next.type == "LPAREN":
+                paren = self.tokenizer.next
+                args = self.parse_argument_list()
+                # 'parallel' is contextual, like 'step': parallel(N) for (...)
+                if name == "parallel" and self.tokenizer.next.type == "FOR":
+                    return self.parse_parallel_for(args, paren)
+                if self.tokenizer.next.type != "SEMI":
+                    raise self.error("Expected ';'")
+                self.tokenizer.select_next()
+                return self.call(name, args)
+        raise self.error("Invalid statement")
+
+    def call(self, name, args):
+        # Builtins written out in place get a node of their own
+        return Builtin(name, args) if name in INLINE_BUILTINS else FuncCall(name, args)
+
+    def parse_index(self):
+        """Parse `[expression]` after an array name."""
+        self.tokenizer.select_next()
+        index = self.parse_expression()
+        if self.tokenizer.next.type != "RBRACKET":
+            raise self.error("Expected ']'")
+        self.tokenizer.select_next()
+        return index
+
+    def parse_variable_declaration(self):
+        self.tokenizer.select_next()
+        if self.tokenizer.next.type != "IDENTIFIER":
+            raise self.error("Expected variable name")
+        name = self.tokenizer.next.value
+        self.tokenizer.select_next()
+        if self.tokenizer.next.type != "COLON":
+            raise self.error("Expected ':'")
+        self.tokenizer.select_next()
+        if not self.at_type():
+            raise self.error("Expected type after ':'")
+        var_type = self.parse_type()
+
+        init_value = None
+        if self.tokenizer.next.type == "ASSIGN":
+            self.tokenizer.select_next()
+            init_value = self.parse_expression()
+
+        if self.tokenizer.next.type != "SEMI":
+            raise self.error("Expected ';'")
+        self.tokenizer.select_next()
+        return VarDecl(var_type, name, init_value)
+
+    def parse_if(self):
+        self.tokenizer.select_next()
+        if self.tokenizer.next.type != "LPAREN":
+            raise self.error("Expected '(' after if")
+        self.tokenizer.select_next()
+        cond = self.parse_expression()
+        if self.tokenizer.next.type != "RPAREN":
+            raise self.error("Expected ')'")
+        self.tokenizer.select_next()
+        brace = self.tokenizer.next
+        then_block = self.parse_block()
+        if not then_block.children:
+            raise self.error("Empty 'then' block in if statement", brace)
+        else_block = None
+        if self.tokenizer.next.type == "ELSE":
+            self.tokenizer.select_next()
+            brace = self.tokenizer.next
+            else_block = self.parse_block()
+            if not else_block.children:
+                raise self.error("Empty 'else' block in if statement", brace)
+        return If(cond, then_block, else_block)
+
+    def parse_for(self):
+        self.tokenizer.select_next()
+        if self.tokenizer.next.type != "LPAREN":
+            raise self.error("Expected '(' after for")
+        self.tokenizer.select_next()
+        if self.tokenizer.next.type != "IDENTIFIER":
+            raise self.error("Expected identifier")
+        var = self.tokenizer.next.value
+        self.tokenizer.select_next()
+        if self.tokenizer.next.type != "IN":
+            raise self.error("Expected 'in'")
+        self.tokenizer.select_next()
+        if self.tokenizer.next.type == "BANG_EXPR":
+            command = CaptureCommand(self.tokenizer.next.value)
+            self.tokenizer.select_next()
+            if self.tokenizer.next.type != "RPAREN":
+                raise self.error("Expected ')'")
+            self.tokenizer.select_next()
+            return ForEach(var, command, self.parse_block())
+        start = self.parse_expression()
+        if self.tokenizer.next.type == "RPAREN":
+            # for (x in arr): the type checker makes sure start is an array
+            self.tokenizer.select_next()
+            return ForEach(var, start, self.parse_block())
+        if self.tokenizer.next.type != "DOTDOT":
+            raise self.error("Expected '..'")
+        self.tokenizer.select_next()
+        end = self.parse_expression()
+        step = None
+        # 'step' is contextual so it stays usable as a variable name
+        if self.tokenizer.next.type == "IDENTIFIER" and self.tokenizer.next.value == "step":
+            self.tokenizer.select_next()
+            step_token = self.tokenizer.next
+            step = self.parse_expression()
+            if isinstance(step, IntVal) and step.value == 0:
+                raise self.error("Step of a for loop cannot be 0", step_token)
+        if self.tokenizer.next.type != "RPAREN":
+            raise self.error("Expected ')'")
+        self.tokenizer.select_next()
+        body = self.parse_block()
+        return For(var, start, end, body, step)
+
+    def parse_parallel_for(self, args, paren):
+        if not 1 <= len(args) <= 2:
+            raise self.error("Expected parallel(limit) or parallel(limit, ordered)", paren)
+        limit = args[0]
+        if isinstance(limit, IntVal) and limit.value < 1:
+            raise self.error("Limit of a parallel loop must be at least 1", paren)
+        ordered = len(args) == 2
+        if ordered and not (isinstance(args[1], Identifier) and args[1].name == "ordered"):
+            raise self.error("Expected 'ordered' as the second argument of parallel", paren)
+        return ParallelFor(limit, self.parse_for(), ordered)
+
+    def parse_while(self):
+        self.tokenizer.select_next()
+        if self.tokenizer.next.type != "LPAREN":
+            raise self.error("Expected '(' after while")
+        self.tokenizer.select_next()
+        cond = self.parse_expression()
+        if self.tokenizer.next.type != "RPAREN":
+            raise self.error("Expected ')'")
+        self.tokenizer.select_next()
+        brace = self.tokenizer.next
+        body = self.parse_block()
+        if not body.children:
+            raise self.error("Empty body in while loop", brace)
+        return While(cond, body)
+
+    def parse_echo(self):
+        self.tokenizer.select_next()
+        if self.tokenizer.next.type != "LPAREN":
+            raise self.error("Expected '('")
+        self.tokenizer.select_next()
+        expr = self.parse_expression()
+        if self.tokenizer.next.type != "RPAREN":
+            raise self.error("Expected ')'")
+        self.tokenizer.select_next()
+        if self.tokenizer.next.type != "SEMI":
+            raise self.error("Expected ';'")
+        self.tokenizer.select_next()
+        return Echo(expr)
+
+    def parse_return(self):
+        self.tokenizer.select_next()
+        if self.tokenizer.next.type == "SEMI":
+            self.tokenizer.select_next()
+            return Return(None)
+        expr = self.parse_expression()
+        if self.tokenizer.next.type != "SEMI":
+            raise self.error("Expected ';'")
+        self.tokenizer.select_next()
+        return Return(expr)
+
+    def parse_expression(self):
+        return self.parse_b_expression()
+
+    def parse_b_expression(self):
+        left = self.parse_b_term()
+        while self.tokenizer.next.type == "OR":
+            op = self.tokenizer.next.type
+            self.tokenizer.select_next()
+            right = self.parse_b_term()
+            left = BinOp(op, left, right)
+        return left
+
+    def parse_b_term(self):
+        left = self.parse_rel_expression()
+        while self.tokenizer.next.type == "AND":
+            op = self.tokenizer.next.type
+            self.tokenizer.select_next()
+            right = self.parse_rel_expression()
+            left = BinOp(op, left, right)
+        return left
+
+    def parse_rel_expression(self):
+        left = self.parse_simple_expression()
+        if self.tokenizer.next.type in {"EQ", "NEQ", "GT", "LT", "GTE", "LTE"}:
+            op = self.tokenizer.next.type
+            self.tokenizer.select_next()
+            right = self.parse_simple_expression()
+            return BinOp(op, left, right)
+        return left
+
+    def parse_simple_expression(self):
+        left = self.parse_term()
+        while self.tokenizer.next.type in {"PLUS", "MINUS"}:
+            op = self.tokenizer.next.type
+            self.tokenizer.select_next()
+            right = self.parse_term()
+            left = BinOp(op, left, right)
+        return left
+
+    def parse_term(self):
+        left = self.parse_factor()
+        while self.tokenizer.next.type in {"MUL", "DIV", "MOD"}:
+            op = self.tokenizer.next.type
+            self.tokenizer.select_next()
+            right = self.parse_factor()
+            left = BinOp(op, left, right)
+        return left
+
+    def parse_factor(self):
+        token = self.tokenizer.next
+        if token.type == "INT":
+            self.tokenizer.select_next()
+            return IntVal(token.value)
+        elif token.type == "STRING":
+            self.tokenizer.select_next()
+            return StringVal(token.value)
+        elif token.type == "BOOL":
+            self.tokenizer.select_next()
+            return BoolVal(token.value)
+        elif token.type == "IDENTIFIER":
+            name = token.value
+            self.tokenizer.select_next()
+            # 'spawn' is contextual too: spawn !(cmd)
+            if name == "spawn" and self.tokenizer.next.type == "BANG_EXPR":
+                command = self.tokenizer.next.value
+                self.tokenizer.select_next()
+                return Spawn(command)
+            if self.tokenizer.next.type == "LPAREN":
+                paren = self.tokenizer.next
+                args = self.parse_argument_list()
+                # and so is 'cached': cached(ttl) !(cmd)
+                if name == "cached" and self.tokenizer.next.type == "BANG_EXPR":
+                    if len(args) != 1:
+                        raise self.error("Expected cached(ttl_seconds) !(cmd)", paren)
+                    command = self.tokenizer.next.value
+                    self.tokenizer.select_next()
+                    return Cached(args[0], command)
+                return self.call(name, args)
+            if self.tokenizer.next.type == "LBRACKET":
+                return Index(Identifier(name), self.parse_index())
+            return Identifier(name)
+        elif token.type == "READ":
+            self.tokenizer.select_next()
+            if self.tokenizer.next.type != "LPAREN":
+                raise self.error("Expected '(' after read")
+            self.tokenizer.select_next()
+            # Allow empty argument list for read()
+            if self.tokenizer.next.type == "RPAREN":
+                self.tokenizer.select_next()
+                return Read()
+            else:
+                # Parse the prompt argument if provided
+                prompt = self.parse_expression()
+                if self.tokenizer.next.type != "RPAREN":
+                    raise self.error("Expected ')' after read argument")
+                self.tokenizer.select_next()
+                return Read(prompt)
+        elif token.type == "BANG_EXPR":
+            self.tokenizer.select_next()
+            return CaptureCommand(token.value)
+        elif token.type == "LBRACKET":
+            self.tokenizer.select_next()
+            elements = []
+            if self.tokenizer.next.type != "RBRACKET":
+                elements.append(self.parse_expression())
+                while self.tokenizer.next.type == "COMMA":
+                    self.tokenizer.select_next()
+                    elements.append(self.parse_expression())
+            if self.tokenizer.next.type != "RBRACKET":
+                raise self.error("Expected ']'")
+            self.tokenizer.select_next()
+            return ArrayVal(elements)
+        elif token.type == "LBRACE":
+            self.tokenizer.select_next()
+            entries = []
+            while self.tokenizer.next.type != "RBRACE":
+                if entries:
+                    if self.tokenizer.next.type != "COMMA":
+                        raise self.error("Expected ',' or '}'")
+                    self.tokenizer.select_next()
+                entries.append(self.parse_expression())
+                if self.tokenizer.next.type != "COLON":
+                    raise self.error("Expected ':' after a key")
+                self.tokenizer.select_next()
+                entries.append(self.parse_expression())
+            self.tokenizer.select_next()
+            return MapVal(entries)
+        elif token.type in {"PLUS", "MINUS", "NOT"}:
+            op = token.type
+            self.tokenizer.select_next()
+            return UnOp(op, self.parse_factor())
+        elif token.type == "LPAREN":
+            self.tokenizer.select_next()
+            expr = self.parse_expression()
+            if self.tokenizer.next.type != "RPAREN":
+                raise self.error("Expected ')'")
+            self.tokenizer.select_next()
+            return expr
+        else:
+            raise self.error(f"Unexpected token in expression: {token.type}")
+        
+    def parse_argument_list(self):
+        args = []
+        if self.tokenizer.next.type != "LPAREN":
+            raise self.error("Expected '('")
+        self.tokenizer.select_next()
+        if self.tokenizer.next.type != "RPAREN":
+            args.append(self.parse_expression())
+            while self.tokenizer.next.type == "COMMA":
+                self.tokenizer.select_next()
+                args.append(self.parse_expression())
+        if self.tokenizer.next.type != "RPAREN":
+            raise self.error("Expected ')'")
+        self.tokenizer.select_next()
+        return args
\ No newline at end of file
@@ -0,0 +1,119 @@
+"""Optimization passes run between parsing and code generation.
+
+Passes are registered by name with the lowest -O level that enables them
+and always run in registration order. Each run gets a PassStats to add
+its counters to, and a report list for human-readable notes.
+"""
+import json
+import time
+
+from .errors import AshCompileError
+from .fold import fold_constants
+from .inline import DEFAULT_INLINE_LIMIT, inline_functions
+from .memo import memoize_functions
+from .tailcall import loop_tail_calls
+
+DEFAULT_LEVEL = 2
+
+
+class Pass:
+    def __init__(self, name, level, description, run):
+        self.name = name
+        self.level = level  # lowest -O level that runs this pass
+        self.description = description
+        self.run = run
+
+
+PASSES = {}
+
+
+def register(name, level, description):
+    """Decorator adding run(program, options, stats, report) to the pipeline."""
+    def decorator(run):
+        PASSES[name] = Pass(name, level, description, run)
+        return run
+    return decorator
+
+
+class PassStats:
+    __slots__ = ("name", "seconds", "visited", "changed")
+
+    def __init__(self, name):
+        self.name = name
+        self.seconds = 0.0
+        self.visited = 0  # AST nodes the pass looked at
+        self.changed = 0  # nodes it replaced, removed or rewrote
+
+    def as_dict(self):
+        return {"name": self.name, "seconds": self.seconds, "visited": self.visited, "changed": self.changed}
+
+
+class PassOptions:
+    """Settings shared by all passes of one compilation."""
+
+    def __init__(self, level=DEFAULT_LEVEL, memo_limit=0, inline_limit=DEFAULT_INLINE_LIMIT):
+        self.level = level
+        self.memo_limit = memo_limit
+        self.inline_limit = inline_limit
+
+
+def select_passes(level=DEFAULT_LEVEL, enable=(), disable=()):
+    """Names of the passes to run at -O level, with individual passes switched on or off."""
+    levels = range(max(p.level for p in PASSES.values()) + 1)
+    if level not in levels:
+        raise AshCompileError(f"Unknown optimization level {level!r} (available: {levels.start}-{levels.stop - 1})")
+    unknown = (set(enable) | set(disable)) - PASSES.keys()
+    if unknown:
+        raise AshCompileError(f"Unknown optimization pass {', '.join(sorted(unknown))} "
+                              f"(available: {', '.join(PASSES)})")
+    return [name for name, p in PASSES.items()
+            if (p.level <= level or name in enable) and name not in disable]
+
+
+def run_passes(program, names, options, report):
+    """Run the named passes over program; returns (program, [PassStats])."""
+    all_stats = []
+    for name in names:
+        stats = PassStats(name)
+        start = time.perf_counter()
+        program = PASSES[name].run(program, options, stats, report) or program
+        stats.seconds = time.perf_counter() - start
+        all_stats.append(stats)
+    return program, all_stats
+
+
+@register("inline", 2, "substitute small non-recursive functions at their call sites")
+def _inline(program, options, stats, report):
+    for name in inline_functions(program, options.inline_limit, stats):
+        report.append(f"{name}: inlined")
+
+
+@register("fold", 1, "evaluate constant expressions and drop dead branches")
+def _fold(program, options, stats, report):
+    return fold_constants(program, stats)
+
+
+@register("tailcall", 1, "rewrite tail and accumulator self-recursion as loops")
+def _tailcall(program, options, stats, report):
+    for name, kind in loop_tail_calls(program, stats).items():
+        report.append(f"{name}: {kind} recursion rewritten as a loop")
+
+
+@register("memo", 0, "memoize @memo functions, and from -O1 pure tree-recursive ones")
+def _memo(program, options, stats, report):
+    for name in memoize_functions(program, options.level >= 1, options.memo_limit, stats):
+        report.append(f"{name}: memoized")
+
+
+def format_pass_stats(passes, fmt="text", **extra):
+    """Lines describing pass_stats dicts as an aligned table, or one JSON object holding extra too."""
+    if fmt == "json":
+        return [json.dumps(dict(extra, passes=passes))]
+    rows = [(p["name"], f"{p['seconds'] * 1000:.3f}", str(p["visited"]), str(p["changed"])) for p in passes]
+    rows.append(("total", f"{sum(p['seconds'] for p in passes) * 1000:.3f}",
+                 str(sum(p["visited"] for p in passes)), str(sum(p["changed"] for p in passes))))
+    header = ("pass", "ms", "visited", "changed")
+    widths = [max(len(row[i]) for row in rows + [header]) for i in range(4)]
+    return ["   " + "  ".join(cell.ljust(w) if i == 0 else cell.rjust(w)
+                              for i, (cell, w) in enumerate(zip(row, widths)))
+            for row in [header] + rows]
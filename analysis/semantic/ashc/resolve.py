@@ -0,0 +1,127 @@
+from .errors import AshCompileError
+from .nodes import *
+
+
+class Symbol:
+    __slots__ = ("name", "type", "kind", "function")
+
+    def __init__(self, name, type_, kind, function=None):
+        self.name = name
+        self.type = type_
+        self.kind = kind  # "var", "param" or "loop"
+        self.function = function  # name of the declaring function, None for a global
+
+    def __repr__(self):
+        return f"Symbol({self.name!r}, {self.type!r}, {self.kind!r}, {self.function!r})"
+
+
+class Scope:
+    """The variables of the top level or of one function.
+
+    Bash has no block scope: a `let` inside an if or a loop is visible to the
+    rest of the function (or, at the top level, of the program).
+    """
+    __slots__ = ("symbols", "function")
+
+    def __init__(self, function=None):
+        self.symbols = {}
+        self.function = function
+
+    def declare(self, name, type_, kind):
+        symbol = self.symbols.get(name)
+        if symbol is None:
+            symbol = self.symbols[name] = Symbol(name, type_, kind, self.function)
+        elif symbol.type != type_:
+            raise AshCompileError(f"Variable {name} is already declared as {symbol.type}{_where(self.function)}")
+        return symbol
+
+
+def _where(function):
+    return f" in function {function}" if function is not None else ""
+
+
+class Resolver:
+    def __init__(self):
+        self.globals = Scope()
+        # References from function bodies to globals, which may be declared
+        # further down the program than the function
+        self.deferred = []
+        self.visited = 0
+
+    def lookup(self, node, name, scope):
+        symbol = scope.symbols.get(name)
+        if symbol is not None:
+            return symbol
+        if scope is not self.globals:
+            self.deferred.append((node, scope.function))
+            return None
+        raise AshCompileError(f"Undeclared variable {name}")
+
+    def element_type(self, iterable, scope):
+        """The type of the variable of a loop over iterable: a line of a command's output, an element or a key."""
+        if not isinstance(iterable, Identifier):
+            return "string"  # a command, or something the type checker rejects
+        symbol = iterable.symbol or self.globals.symbols.get(iterable.name)
+        if symbol is None:
+            # Left to the end like other globals, it would come too late to type the loop
+            raise AshCompileError(f"Array {iterable.name} must be declared before the loop over it"
+                                  f"{_where(scope.function)}")
+        return element_type(symbol.type) if is_array(symbol.type) else "string"
+
+    def visit(self, node, scope):
+        self.visited += 1
+        if isinstance(node, Identifier):
+            node.symbol = self.lookup(node, node.name, scope)
+        elif isinstance(node, VarDecl):
+            # `let x: int = x + 1;` in a function reads the global x
+            if node.value is not None:
+                self.visit(node.value, scope)
+            node.symbol = scope.declare(node.name, node.var_type, "var")
+        elif isinstance(node, Assignment):
+            self.visit(node.value, scope)
+            node.symbol = self.lookup(node, node.name, scope)
+        elif isinstance(node, For):
+            for bound in (node.start, node.end, node.step):
+                if bound is not None:
+                    self.visit(bound, scope)
+            node.symbol = scope.declare(node.var, "int", "loop")
+            self.visit(node.body, scope)
+        elif isinstance(node, ForEach):
+            self.visit(node.iterable, scope)
+            node.symbol = scope.declare(node.var, self.element_type(node.iterable, scope), "loop")
+            self.visit(node.body, scope)
+        elif isinstance(node, FuncDecl):
+            node.scope = Scope(node.name)
+            for type_, name in node.params:
+                node.scope.declare(name, type_, "param")
+            self.visit(node.body, node.scope)
+        else:
+            for child in node.child_nodes():
+                self.visit(child, scope)
+
+    def resolve(self, program):
+        program.scope = self.globals
+        for stmt in program.children:
+            self.visit(stmt, self.globals)
+        for node, function in self.deferred:
+            node.symbol = self.globals.symbols.get(node.name)
+            if node.symbol is None:
+                raise AshCompileError(f"Undeclared variable {node.name}{_where(function)}")
+
+
+def resolve(program, stats=None):
+    """Link every variable reference and declaration in program to its Symbol.
+
+    One walk builds a Scope for the globals (program.scope) and one per
+    function (FuncDecl.scope) holding its parameters, locals and loop
+    variables, and sets .symbol on each Identifier, Assignment, VarDecl, For
+    and ForEach, the variable of a loop over an array taking the type of its
+    elements. Raises AshCompileError for undeclared variables, for a variable
+    declared again with another type and for a loop over an array declared
+    further down. stats, when given, gets the nodes visited added to it.
+    """
+    resolver = Resolver()
+    resolver.resolve(program)
+    if stats is not None:
+        stats.visited += resolver.visited
+    return program
@@ -0,0 +1,146 @@
+"""Bash helpers written at the top of the scripts that use them.
+
+Builtin functions (see typecheck.BUILTINS) are bash functions named
+PREFIX + their Ash name; like compiled functions they leave their result in
+__ash_ret. The type checker records in Program.runtime which of these a
+program needs.
+"""
+
+PREFIX = "__ash_"
+
+# name -> (helpers it needs defined first, code)
+HELPERS = {
+    # Jobs started by spawn write their output to $__ash_jobs/<job>, see
+    # Spawn; a job is the spawning shell's pid and a count, never reused as a
+    # pid can be. The directory is made by the first spawn, and removed at
+    # exit before running the EXIT trap the script has set by then (trap -p
+    # prints it quoted, ready for eval); a trap set later replaces both.
+    "jobs": ((), """\
+__ash_jobs_start() {
+    local exit_trap
+    __ash_jobs=$(mktemp -d)
+    exit_trap=$(trap -p EXIT)
+    exit_trap=${exit_trap#"trap -- "}
+    eval "trap -- 'rm -rf \\"\\$__ash_jobs\\"; '${exit_trap%" EXIT"} EXIT"
+}
+declare -i __ash_jobs_count=0
+declare -A __ash_jobs_pid __ash_jobs_status"""),
+    # The exit status of job $1, waiting for it the first time; bash can
+    # only wait for a process once, so it is kept for the next call
+    "status": (("jobs",), """\
+__ash_status() {
+    if [[ -z ${__ash_jobs_status[$1]} ]]; then
+        wait "${__ash_jobs_pid[$1]}"
+        __ash_jobs_status[$1]=$?
+    fi
+    __ash_ret=${__ash_jobs_status[$1]}
+}"""),
+    # The output of job $1 once it is done, trailing newlines removed as by $( )
+    "await": (("status",), """\
+__ash_await() {
+    __ash_status "$1"
+    IFS= read -r -d '' __ash_ret < "$__ash_jobs/$1"
+    __ash_ret=${__ash_ret%"${__ash_ret##*[!$'\\n']}"}
+}"""),
+    # All of the script's input, trailing newlines removed as by $( ). $(< )
+    # reads in blocks without a subshell, but it opens /dev/stdin again, which
+    # starts a file over: once read() has taken lines from one (its offset in
+    # fdinfo is not 0), the rest is read with read -d '' instead, testing only
+    # the last character, as a pattern would scan all of it.
+    "read_all": ((), """\
+__ash_read_all() {
+    local field offset
+    if [[ -f /dev/stdin ]]; then
+        read -r -u 3 field offset 3< /proc/self/fdinfo/0
+    fi
+    if [[ -f /dev/stdin && $offset != 0 ]]; then
+        IFS= read -r -d '' __ash_ret
+        while [[ ${__ash_ret: -1} == $'\\n' ]]; do
+            __ash_ret=${__ash_ret%$'\\n'}
+        done
+    else
+        __ash_ret=$(< /dev/stdin)
+    fi
+}"""),
+    # Output of cached(ttl) !(cmd), kept per user across runs, see Cached.
+    # An entry is a file named after the key, holding the time it was written
+    # and its ttl on a first line, then the output.
+    "cache": ((), """\
+__ash_cache_hits=0
+__ash_cache_misses=0"""),
+    # Look up the entry of command $2, with the values of the variables after
+    # it, run in this directory: the file named by the FNV-1a hash of them
+    # all, computed here rather than by a sha256sum process. Leaves its output
+    # in __ash_ret, or fails if none was written less than $1 seconds ago.
+    # The directory is looked up on each call, so a script can set
+    # ASH_CACHE_DIR; with ASH_CACHE_DEBUG set, hits and misses are counted
+    # on stderr.
+    "cache_get": (("cache",), """\
+__ash_cache_get() {
+    local IFS=$'\\x1f' text hash=-3750763034362895579 i code written ttl
+    __ash_cache=${ASH_CACHE_DIR:-${XDG_CACHE_HOME:-$HOME/.cache}/ash}
+    text="$PWD$IFS${*:2}"
+    for (( i = 0; i < ${#text}; i++ )); do
+        printf -v code '%d' "'${text:i:1}"
+        (( hash = (hash ^ code) * 1099511628211 ))
+    done
+    printf -v __ash_cache_entry '%s/%016x' "$__ash_cache" "$hash"
+    __ash_cache_ttl=$1
+    { IFS=' ' read -r written ttl && IFS= read -r -d '' __ash_ret; } 2> /dev/null < "$__ash_cache_entry"
+    if [[ -n $written ]] && (( EPOCHSECONDS - written < $1 )); then
+        __ash_cache_hits=$(( __ash_cache_hits + 1 ))
+        [[ -z $ASH_CACHE_DEBUG ]] || echo "ash cache: hit ($__ash_cache_hits hits, $__ash_cache_misses misses): $2" >&2
+        return 0
+    fi
+    __ash_cache_misses=$(( __ash_cache_misses + 1 ))
+    [[ -z $ASH_CACHE_DEBUG ]] || echo "ash cache: miss ($__ash_cache_hits hits, $__ash_cache_misses misses): $2" >&2
+    return 1
+}"""),
+    # Store __ash_ret as the entry looked up last. It is written to a file of
+    # this process first and renamed into place, so that scripts running at
+    # the same time only ever read whole entries. The cache is best effort:
+    # a directory that cannot be written only means running the command again.
+    "cache_put": (("cache", "cache_evict"), """\
+__ash_cache_put() {
+    local temp=$__ash_cache/.$BASHPID.tmp
+    {
+        [[ -d $__ash_cache ]] || mkdir -p -m 700 "$__ash_cache" || return
+        printf '%s %s\\n%s' "$EPOCHSECONDS" "$__ash_cache_ttl" "$__ash_ret" > "$temp" &&
+            mv -f "$temp" "$__ash_cache_entry"
+    } 2> /dev/null
+    __ash_cache_evict
+}"""),
+    # At most once an hour, remove the entries older than their ttl and the
+    # files of writers that died before renaming them
+    "cache_evict": (("cache",), """\
+__ash_cache_evict() {
+    local swept entry written ttl pid old=()
+    read -r swept 2> /dev/null < "$__ash_cache/.swept"
+    (( EPOCHSECONDS - ${swept:-0} >= 3600 )) || return 0
+    echo "$EPOCHSECONDS" 2> /dev/null > "$__ash_cache/.swept" || return 0
+    for entry in "$__ash_cache"/*; do
+        read -r written ttl < "$entry" && (( EPOCHSECONDS - written >= ttl )) && old+=("$entry")
+    done 2> /dev/null
+    for entry in "$__ash_cache"/.*.tmp; do
+        pid=${entry##*/.}
+        [[ -e $entry ]] && ! kill -0 "${pid%.tmp}" 2> /dev/null && old+=("$entry")
+    done
+    (( ${#old[@]} == 0 )) || rm -f -- "${old[@]}"
+}"""),
+}
+
+
+def runtime_code(names):
+    """The code of the helpers in names and of those they need, each needed one first."""
+    done = []
+
+    def add(name):
+        if name not in done:
+            needs, _ = HELPERS[name]
+            for need in needs:
+                add(need)
+            done.append(name)
+
+    for name in sorted(names):
+        add(name)
+    return [HELPERS[name][1] for name in done]
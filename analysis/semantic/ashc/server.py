@@ -0,0 +1,79 @@
+"""Persistent compile server behind `ashc --serve`.
+
+The server keeps the compiler imported behind a Unix socket. Each
+connection carries newline-delimited JSON requests, as accepted by
+compiler.compile_request, and gets one JSON reply line per request.
+See client.py for the other end.
+"""
+import json
+import os
+import socketserver
+
+from .client import request
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    def handle(self):
+        for line in self.rfile:
+            reply = self.server.compile(json.loads(line))
+            self.wfile.write(json.dumps(reply).encode() + b"\n")
+            self.wfile.flush()
+
+
+class CompileServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, socket_path):
+        # Imported here so clients never pay for the compiler
+        from .cache import CompileCache, compiler_fingerprint
+        from .compiler import compile_request, compile_source
+        from .version import COMPILER_VERSION
+
+        compile_source("let warm: int = 1 + 2;")  # fault in every code path once
+        self._compile_request = compile_request
+        self._cache_class = CompileCache
+        self._caches = {}
+        self.version = COMPILER_VERSION
+        self.fingerprint = compiler_fingerprint()  # of the code loaded now, whatever changes on disk later
+
+        if os.path.exists(socket_path):
+            if request(socket_path, {"ping": True}, timeout=1) is not None:
+                raise OSError(f"a compile server is already listening on {socket_path}")
+            os.unlink(socket_path)  # stale socket from a server that died
+        old_umask = os.umask(0o177)  # socket is private to this user
+        try:
+            super().__init__(socket_path, _Handler)
+        finally:
+            os.umask(old_umask)
+
+    def compile(self, payload):
+        if payload.get("ping"):
+            return {"ok": True}
+        if (payload.get("version"), payload.get("fingerprint")) != (self.version, self.fingerprint):
+            return {"ok": False, "error": "version",
+                    "message": f"the compile server runs ashc {self.version}, another build than the client's"}
+        cache = None
+        if not payload.get("no_cache"):
+            cache_dir = payload.get("cache_dir")
+            if cache_dir not in self._caches:
+                self._caches[cache_dir] = self._cache_class(cache_dir)
+            cache = self._caches[cache_dir]
+        return self._compile_request(payload, cache)
+
+    def server_close(self):
+        super().server_close()
+        for cache in self._caches.values():
+            cache.flush()
+        try:
+            os.unlink(self.server_address)
+        except FileNotFoundError:
+            pass
+
+
+def serve(socket_path):
+    with CompileServer(socket_path) as server:
+        print(f"🔥 Compile server listening on {socket_path}")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
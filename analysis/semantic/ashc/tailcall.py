@@ -0,0 +1,183 @@
+from .nodes import *
+
+# Operators an accumulator can carry: associative and commutative even with
+# bash's 64-bit wraparound, so `x op f(...)` can be folded in before the call
+ACCUMULATORS = {"PLUS": 0, "MUL": 1}
+ACCUMULATOR = "__ash_acc"
+
+
+def is_self_call(expr, func):
+    return isinstance(expr, FuncCall) and expr.name == func.name
+
+
+def count_self_calls(node, func):
+    return sum(1 for n in walk(node) if is_self_call(n, func))
+
+
+def own_variables(func):
+    """The parameters and locals of func, which a call of func cannot change for the caller."""
+    nodes = list(walk(func.body))
+    own = {name for _, name in func.params}
+    own.update(node.name for node in nodes if isinstance(node, VarDecl))
+    own.update(node.var for node in nodes if isinstance(node, (For, ForEach)))
+    return own
+
+
+def classify_return(ret, func):
+    """Describe a return of func as ("base",), ("tail", call) or ("accumulate", op, other, call).
+
+    None means it calls func in some other way, so it cannot be turned into a jump.
+    """
+    expr = ret.expr
+    if expr is None or count_self_calls(expr, func) == 0:
+        return ("base",)
+    if is_self_call(expr, func):
+        if any(count_self_calls(arg, func) for arg in expr.args):
+            return None
+        return ("tail", expr)
+    if isinstance(expr, BinOp) and expr.op in ACCUMULATORS:
+        for call, other in (expr.children, reversed(expr.children)):
+            # other is evaluated before the remaining recursion instead of
+            # after it, so it must not have side effects, nor read a global
+            # (or an array or map) the recursion could change
+            if is_self_call(call, func) and not has_side_effects(other) \
+                    and reads_only(other, own_variables(func)) \
+                    and not any(count_self_calls(arg, func) for arg in call.args):
+                return ("accumulate", expr.op, other, call)
+    return None
+
+
+def reads_only(expr, names):
+    # An array or map read by arr[i] is an Identifier below the Index
+    return all(node.name in names for node in walk(expr) if isinstance(node, Identifier))
+
+
+def tail_statements(statements, func):
+    """Calls of func made as statements in tail position (nothing runs after them)."""
+    if not statements:
+        return []
+    last = statements[-1]
+    if is_self_call(last, func):
+        return [last]
+    if isinstance(last, If):
+        else_children = last.else_block.children if last.else_block is not None else []
+        return tail_statements(last.then_block.children, func) + tail_statements(else_children, func)
+    if isinstance(last, Block):
+        return tail_statements(last.children, func)
+    return []
+
+
+def plan(func):
+    """Decide whether func can become a loop; returns (ok, accumulator operator or None).
+
+    Every call of func to itself must be the value, or one operand of the
+    value, of a return statement, or a statement in tail position, and all of
+    them must agree on the operator.
+    """
+    returns = [n for n in walk(func.body) if isinstance(n, Return)]
+    kinds = [classify_return(ret, func) for ret in returns]
+    if None in kinds:
+        return False, None
+    jumps = [k for k in kinds if k[0] != "base"]
+    jumps += [("tail", call) for call in tail_statements(func.body.children, func)]
+    if not jumps or len(jumps) != count_self_calls(func.body, func):
+        return False, None
+    ops = {k[1] for k in jumps if k[0] == "accumulate"}
+    if len(ops) > 1:
+        return False, None
+    op = ops.pop() if ops else None
+    if op is not None and (func.return_type != "int" or any(ret.expr is None for ret in returns)):
+        return False, None
+    return True, op
+
+
+def rebind_params(func, args):
+    """Statements giving the parameters the values of a call's arguments, all evaluated first."""
+    changes = [(type_, name, arg) for (type_, name), arg in zip(func.params, args)
+               if not (isinstance(arg, Identifier) and arg.name == name)]
+    if len(changes) == 1:
+        _, name, arg = changes[0]
+        return [Assignment(name, arg)]
+    temps = [VarDecl(type_, f"__ash_next_{name}", arg) for type_, name, arg in changes]
+    return temps + [Assignment(name, Identifier(temp.name, temp.var_type))
+                    for (_, name, _), temp in zip(changes, temps)]
+
+
+def rewrite(statements, func, op, depth):
+    """Replace the recursive calls in statements by parameter updates and a jump back to the top."""
+    result = []
+    for stmt in statements:
+        if is_self_call(stmt, func):
+            # plan() made sure this is in tail position
+            result.extend(rebind_params(func, stmt.args))
+            result.append(Continue(depth))
+            continue
+        if isinstance(stmt, Return):
+            kind = classify_return(stmt, func)
+            if kind[0] == "base":
+                if op is not None:
+                    value = stmt.expr
+                    if not (isinstance(value, IntVal) and value.value == ACCUMULATORS[op]):
+                        value = BinOp(op, Identifier(ACCUMULATOR, "int"), value, "int")
+                    else:
+                        value = Identifier(ACCUMULATOR, "int")
+                    stmt = Return(value)
+                result.append(stmt)
+                continue
+            if kind[0] == "accumulate":
+                _, _, other, call = kind
+                result.append(Assignment(ACCUMULATOR, BinOp(op, Identifier(ACCUMULATOR, "int"), other, "int")))
+            else:
+                call = kind[1]
+            result.extend(rebind_params(func, call.args))
+            result.append(Continue(depth))
+            continue
+
+        if isinstance(stmt, If):
+            stmt.then_block.children = rewrite(stmt.then_block.children, func, op, depth)
+            if stmt.else_block is not None:
+                stmt.else_block.children = rewrite(stmt.else_block.children, func, op, depth)
+        elif isinstance(stmt, (While, For, ForEach)):
+            stmt.body.children = rewrite(stmt.body.children, func, op, depth + 1)
+        elif isinstance(stmt, Block):
+            stmt.children = rewrite(stmt.children, func, op, depth)
+        result.append(stmt)
+    return result
+
+
+def loop_tail_calls(program, stats=None):
+    """Turn self-recursive functions whose recursion is a jump back to the top into loops.
+
+    That covers tail calls (`return f(...)`) and accumulator recursion
+    (`return n * f(n - 1)`, with + or *): the pending operand is folded into
+    an accumulator before jumping. The body is wrapped in `while (true)`, so
+    the function runs in constant stack. Returns {function name: "tail" or
+    "accumulator"} for the functions that were rewritten; stats, when given,
+    gets the nodes examined and the recursive calls rewritten added to it.
+    """
+    transformed = {}
+    for func in program.children:
+        if not isinstance(func, FuncDecl):
+            continue
+        if stats is not None:
+            stats.visited += sum(1 for _ in walk(func.body))
+        ok, op = plan(func)
+        if not ok:
+            continue
+        if stats is not None:
+            stats.changed += count_self_calls(func.body, func)
+        for node in walk(func.body):
+            if isinstance(node, VarDecl) and node.value is None:
+                # Declared again on each turn of the loop, it must start over
+                node.value = default_value(node.var_type)
+        body = rewrite(func.body.children, func, op, 1)
+        if body and isinstance(body[-1], Continue) and body[-1].levels == 1:
+            body.pop()  # the loop goes back to the top by itself
+        elif not (body and isinstance(body[-1], Return)):
+            body.append(Return(None))  # falling off the end must not loop again
+        statements = [While(BoolVal(True), Block(body))]
+        if op is not None:
+            statements.insert(0, VarDecl("int", ACCUMULATOR, IntVal(ACCUMULATORS[op])))
+        func.body = Block(statements)
+        transformed[func.name] = "accumulator" if op is not None else "tail"
+    return transformed
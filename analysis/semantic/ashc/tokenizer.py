@@ -0,0 +1,144 @@
+# ash_tokenizer.py
+import re
+
+from .errors import AshSyntaxError
+
+
+class Token:
+    __slots__ = ("type", "value", "pos")
+
+    def __init__(self, type_, value, pos=None):
+        self.type = type_
+        self.value = value
+        self.pos = pos  # offset of the token's first character in the source
+
+    def __repr__(self):
+        return f"Token({self.type}, {repr(self.value)})"
+
+
+KEYWORDS = {
+    "let": "LET",
+    "function": "FUNCTION",
+    "if": "IF",
+    "else": "ELSE",
+    "for": "FOR",
+    "while": "WHILE",
+    "return": "RETURN",
+    "echo": "ECHO_KW",
+    "read": "READ",
+    "in": "IN",
+    "and": "AND",
+    "or": "OR",
+    "not": "NOT",
+    "int": "INT_TYPE",
+    "string": "STRING_TYPE",
+    "bool": "BOOL_TYPE",
+    "void": "VOID_TYPE",
+    "true": "BOOL",
+    "false": "BOOL"
+}
+
+KEYWORD_VALUES = {"true": True, "false": False}
+
+# Characters matched before a token's value group ("!(", "\"", "!")
+VALUE_OFFSETS = {"BANG_EXPR": 2, "STRING": 1, "BANG_LINE": 1}
+
+OPERATORS = {
+    "==": "EQ",
+    "!=": "NEQ",
+    ">=": "GTE",
+    "<=": "LTE",
+    "..": "DOTDOT",
+    "=": "ASSIGN",
+    "+": "PLUS",
+    "-": "MINUS",
+    "*": "MUL",
+    "/": "DIV",
+    "%": "MOD",
+    "(": "LPAREN",
+    ")": "RPAREN",
+    "{": "LBRACE",
+    "}": "RBRACE",
+    ";": "SEMI",
+    ":": "COLON",
+    ",": "COMMA",
+    "<": "LT",
+    ">": "GT",
+    "@": "AT",
+    "[": "LBRACKET",
+    "]": "RBRACKET"
+}
+
+# One alternative per token class, tried in order at the current position
+# (two-character operators before their one-character prefixes).
+# Leading whitespace is skipped by the same match, so every token costs a
+# single regex call and its value is a slice of the source.
+TOKEN_PATTERN = re.compile(r"""
+    \s*
+    (?:
+        (?P<WORD>[^\W\d]\w*)                  # identifiers and keywords
+      | (?P<OPERATOR>==|!=|>=|<=|\.\.|[-=+*/%(){};:,<>@\[\]])
+      | !\((?P<BANG_EXPR>[^)]*)\)             # command capture: !(...)
+      | (?P<UNTERMINATED_BANG>!\()
+      | !(?P<BANG_LINE>[^\n;]*)               # inline shell command: !some text;
+      | (?P<INT>\d+)
+      | "(?P<STRING>[^"]*)"
+      | (?P<UNTERMINATED_STRING>")
+      | (?P<EOF>\Z)
+      | (?P<INVALID>.)
+    )
+""", re.VERBOSE | re.DOTALL)
+
+
+class Tokenizer:
+    def __init__(self, source):
+        self.source = source
+        self.position = 0
+        self.next = None
+
+    def error(self, message, pos=None):
+        """Build an AshSyntaxError pointing at pos (default: the current position)."""
+        if pos is None:
+            pos = self.position
+        line = self.source.count("\n", 0, pos) + 1
+        column = pos - self.source.rfind("\n", 0, pos)
+        return AshSyntaxError(message, line, column)
+
+    def select_next(self):
+        match = TOKEN_PATTERN.match(self.source, self.position)
+        kind = match.lastgroup
+        start = match.start(kind)
+        self.position = match.end()
+
+        if kind == "WORD":
+            word = match.group(kind)
+            token_type = KEYWORDS.get(word)
+            if token_type is None:
+                self.next = Token("IDENTIFIER", word, start)
+            else:
+                self.next = Token(token_type, KEYWORD_VALUES.get(word, word), start)
+        elif kind == "OPERATOR":
+            op = match.group(kind)
+            self.next = Token(OPERATORS[op], op, start)
+        elif kind == "INT":
+            self.next = Token("INT", int(match.group(kind)), start)
+        elif kind in VALUE_OFFSETS:
+            self.next = Token(kind, match.group(kind), start - VALUE_OFFSETS[kind])
+        elif kind == "EOF":
+            self.next = Token("EOF", None, start)
+        else:
+            self.position = start
+            if kind == "UNTERMINATED_BANG":
+                raise self.error("Unterminated command expression")
+            if kind == "UNTERMINATED_STRING":
+                raise self.error("Unterminated string literal")
+            raise self.error(f"Invalid character: {match.group(kind)}")
+
+    def all_tokens(self):
+        tokens = []
+        self.select_next()
+        while self.next.type != "EOF":
+            tokens.append(self.next)
+            self.select_next()
+        tokens.append(self.next)
+        return tokens
@@ -0,0 +1,296 @@
+from .errors import AshTypeError
+from .nodes import *
+
+# How operators are written in Ash, for error messages
+OPERATOR_NAMES = dict(BinOp.op_map, AND="and", OR="or", NOT="not")
+ARITHMETIC_OPS = {"MINUS", "MUL", "DIV", "MOD"}
+ORDERING_OPS = {"GT", "LT", "GTE", "LTE"}
+
+# Functions every program can call: name -> (params, return type), params
+# written as in a FuncDecl. "array" and "map" stand for a variable of any
+# array or map type, "collection" for either, "sized" for either or a
+# string, and "element" for a value of the type of its elements. Those in
+# nodes.INLINE_BUILTINS are written out in place, the others run the
+# runtime.HELPERS of the same name.
+BUILTINS = {
+    "await": ([("job", "job")], "string"),
+    "status": ([("job", "job")], "int"),
+    "len": ([("sized", "value")], "int"),
+    "append": ([("array", "array"), ("element", "value")], "void"),
+    "has": ([("map", "map"), ("string", "key")], "bool"),
+    "delete": ([("map", "map"), ("string", "key")], "void"),
+    "substr": ([("string", "text"), ("int", "start"), ("int", "length")], "string"),
+    "replace": ([("string", "text"), ("string", "old"), ("string", "new")], "string"),
+    "starts_with": ([("string", "text"), ("string", "prefix")], "bool"),
+    "ends_with": ([("string", "text"), ("string", "suffix")], "bool"),
+    "index_of": ([("string", "text"), ("string", "part")], "int"),
+    "upper": ([("string", "text")], "string"),
+    "lower": ([("string", "text")], "string"),
+    "trim": ([("string", "text")], "string"),
+    "read_all": ([], "string"),
+    "read_file": ([("string", "path")], "string"),
+    "read_lines": ([], "string[]"),
+}
+# Builtins changing the array or map given first
+CHANGING_BUILTINS = {"append", "delete"}
+COLLECTION_PARAMS = {"array": is_array, "map": is_map, "collection": is_collection}
+
+
+class TypeChecker:
+    def __init__(self, functions):
+        self.functions = functions  # name -> FuncDecl
+        self.function = None  # the FuncDecl being checked, None at the top level
+        self.runtime = set()  # the runtime.HELPERS the program needs
+        self.visited = 0
+
+    def fail(self, message):
+        if self.function is not None:
+            message += f" in function {self.function.name}"
+        raise AshTypeError(message)
+
+    def expect(self, expr, type_, what):
+        """Check expr, which must be of type_; what names it in the error."""
+        actual = self.expr(expr)
+        if actual != type_:
+            self.fail(f"{what} must be {type_}, not {actual}")
+
+    def expr(self, expr):
+        """Set .type on expr and on every expression below it; returns expr's type."""
+        self.visited += 1
+        if isinstance(expr, Identifier):
+            expr.type = expr.symbol.type
+        elif isinstance(expr, BinOp):
+            expr.type = self.binop(expr.op, *(self.expr(child) for child in expr.children))
+        elif isinstance(expr, UnOp):
+            operand = self.expr(expr.children[0])
+            wanted = "bool" if expr.op in ("!", "NOT") else "int"
+            if operand != wanted:
+                self.fail(f"Operator {OPERATOR_NAMES.get(expr.op, expr.op)} cannot be applied to {operand}")
+            expr.type = wanted
+        elif isinstance(expr, (FuncCall, Builtin)):
+            expr.type = self.call(expr)
+            if expr.type == "void":
+                self.fail(f"Function {expr.name} returns no value")
+            if is_collection(expr.type):
+                # Codegen fills the variable in place, see assign_collection
+                self.fail(f"{expr.name}() can only be the whole value of a let or an assignment, "
+                          "or looped over")
+        elif isinstance(expr, Index):
+            expr.type = self.element(expr.array, expr.index)
+        elif isinstance(expr, (ArrayVal, MapVal)):
+            self.fail("An array or map literal can only be the whole value of a let or an assignment")
+        elif isinstance(expr, Spawn):
+            self.runtime.add("jobs")
+        elif isinstance(expr, Cached):
+            self.expect(expr.ttl, "int", "The time to live of cached")
+            self.runtime.update(("cache_get", "cache_put"))
+        elif isinstance(expr, Read):
+            # Codegen reads straight into the variable, see VarDecl.emit
+            self.fail("read() can only be the whole value of a let or an assignment")
+        return expr.type
+
+    def element(self, collection, index):
+        """Check arr[index] or map[key]; returns the type of the element."""
+        type_ = self.expr(collection)
+        if is_array(type_):
+            self.expect(index, "int", f"An index of {collection.name}")
+        elif is_map(type_):
+            self.expect(index, "string", f"A key of {collection.name}")
+        else:
+            self.fail(f"{collection.name} is a {type_}, not an array or a map")
+        return element_type(type_)
+
+    def binop(self, op, left, right):
+        if is_collection(left) or is_collection(right):
+            pass  # arrays and maps are only indexed, looped over and given to builtins
+        elif op == "PLUS":
+            if left == right == "int":
+                return "int"
+            if "string" in (left, right):
+                return "string"  # the other operand is converted to text
+        elif op in ARITHMETIC_OPS or op in ORDERING_OPS:
+            if left == right == "int":
+                return "int" if op in ARITHMETIC_OPS else "bool"
+        elif op in ("EQ", "NEQ"):
+            if left == right:
+                return "bool"
+        elif op in LOGICAL_OPS:
+            if left == right == "bool":
+                return "bool"
+        self.fail(f"Operator {OPERATOR_NAMES.get(op, op)} cannot be applied to {left} and {right}")
+
+    def call(self, call):
+        """Check a call's arguments against the declaration; returns the function's return type."""
+        if call.name in BUILTINS:
+            params, return_type = BUILTINS[call.name]
+            if isinstance(call, FuncCall):
+                call.builtin = True
+                self.runtime.add(call.name)
+        else:
+            func = self.functions.get(call.name)
+            if func is None:
+                self.fail(f"Undeclared function {call.name}")
+            params, return_type = func.params, func.return_type
+        if len(call.args) != len(params):
+            self.fail(f"Function {call.name} takes {len(params)} arguments, not {len(call.args)}")
+        element = None
+        for i, (arg, (type_, name)) in enumerate(zip(call.args, params)):
+            what = f"Argument {i + 1} ({name}) of {call.name}"
+            if type_ == "sized":
+                actual = self.expr(arg)
+                if actual != "string" and not (isinstance(arg, Identifier) and is_collection(actual)):
+                    self.fail(f"{what} must be a string, an array or a map, not {actual}")
+            elif type_ in COLLECTION_PARAMS:
+                actual = self.expr(arg)
+                if not (isinstance(arg, Identifier) and COLLECTION_PARAMS[type_](actual)):
+                    wanted = "an array or a map" if type_ == "collection" else f"a {type_}"
+                    self.fail(f"{what} must be {wanted} variable, not {actual}")
+                element = element_type(actual)
+            else:
+                self.expect(arg, element if type_ == "element" else type_, what)
+        return return_type
+
+    def value(self, value, type_, name):
+        """Check the value given to a variable of type_."""
+        if isinstance(value, Read):
+            self.visited += 1
+            if value.prompt is not None:
+                self.expect(value.prompt, "string", "The prompt of read()")
+            actual = "string"
+        elif isinstance(value, ArrayVal):
+            self.visited += 1
+            if not is_array(type_):
+                self.fail(f"Variable {name} is declared as {type_} but given an array")
+            for i, element in enumerate(value.elements):
+                self.expect(element, element_type(type_), f"Element {i + 1} of the array given to {name}")
+            actual = value.type = type_  # [] has the type of the variable
+        elif isinstance(value, Builtin) and is_collection(BUILTINS[value.name][1]):
+            self.visited += 1
+            actual = value.type = self.call(value)
+        elif isinstance(value, MapVal):
+            self.visited += 1
+            if not is_map(type_):
+                self.fail(f"Variable {name} is declared as {type_} but given a map")
+            for key, element in zip(value.entries[::2], value.entries[1::2]):
+                self.expect(key, "string", f"A key of the map given to {name}")
+                self.expect(element, element_type(type_), f"A value of the map given to {name}")
+            actual = value.type = type_
+        else:
+            actual = self.expr(value)
+        if type_ == "int" and isinstance(value, (Read, CaptureCommand, Cached)):
+            # Text read or captured into an int variable is evaluated as a
+            # number by bash (declare -i), as it always was
+            actual = "int"
+        if actual != type_:
+            self.fail(f"Variable {name} is declared as {type_} but given a {actual}")
+
+    def statement(self, stmt):
+        self.visited += 1
+        if isinstance(stmt, VarDecl):
+            if stmt.value is not None:
+                self.value(stmt.value, stmt.var_type, stmt.name)
+        elif isinstance(stmt, Assignment):
+            self.value(stmt.value, stmt.symbol.type, stmt.name)
+        elif isinstance(stmt, IndexAssignment):
+            self.value(stmt.value, self.element(stmt.array, stmt.index), f"{stmt.array.name}[...]")
+        elif isinstance(stmt, Echo):
+            if is_map(self.expr(stmt.expr)):
+                self.fail("echo() cannot print a map, loop over its keys")
+        elif isinstance(stmt, (FuncCall, Builtin)):
+            # The result, if any, is thrown away
+            stmt.type = self.call(stmt)
+        elif isinstance(stmt, Return):
+            self.return_(stmt)
+        elif isinstance(stmt, If):
+            self.expect(stmt.condition, "bool", "The condition of an if")
+            self.statement(stmt.then_block)
+            if stmt.else_block is not None:
+                self.statement(stmt.else_block)
+        elif isinstance(stmt, While):
+            self.expect(stmt.condition, "bool", "The condition of a while")
+            self.statement(stmt.body)
+        elif isinstance(stmt, For):
+            for bound in (stmt.start, stmt.end, stmt.step):
+                if bound is not None:
+                    self.expect(bound, "int", f"A bound of the loop over {stmt.var}")
+            self.statement(stmt.body)
+        elif isinstance(stmt, ForEach):
+            if isinstance(stmt.iterable, Builtin) and is_collection(BUILTINS[stmt.iterable.name][1]):
+                self.visited += 1
+                stmt.iterable.type = self.call(stmt.iterable)
+            elif not isinstance(stmt.iterable, CaptureCommand):
+                iterable = self.expr(stmt.iterable)
+                if not (isinstance(stmt.iterable, Identifier) and is_collection(iterable)):
+                    self.fail("A for loop goes over a range, a command, an array or the keys of a map, "
+                              f"not {iterable}")
+            self.statement(stmt.body)
+        elif isinstance(stmt, ParallelFor):
+            self.expect(stmt.limit, "int", "The limit of a parallel loop")
+            self.parallel_body(stmt.loop)
+            self.statement(stmt.loop)
+        elif isinstance(stmt, Block):
+            for child in stmt.children:
+                self.statement(child)
+        elif isinstance(stmt, FuncDecl):
+            if stmt.name in BUILTINS:
+                self.fail(f"Function {stmt.name} is a builtin and cannot be declared again")
+            if is_collection(stmt.return_type) or any(is_collection(type_) for type_, _ in stmt.params):
+                # Bash functions take and give back strings only
+                self.fail(f"Function {stmt.name} cannot take or return an array or a map")
+            outer, self.function = self.function, stmt
+            self.statement(stmt.body)
+            self.function = outer
+
+    def parallel_body(self, loop):
+        """Reject what cannot work in iterations that run in processes of their own."""
+        own = {loop.var}
+        own.update(node.name for node in walk(loop.body) if isinstance(node, VarDecl))
+        own.update(node.var for node in walk(loop.body) if isinstance(node, (For, ForEach)))
+        for node in walk(loop.body):
+            if isinstance(node, Return):
+                self.fail("A parallel loop cannot return from the function")
+            if isinstance(node, Assignment) and node.name not in own:
+                self.fail(f"Assigning {node.name} in a parallel loop would be lost: "
+                          "each iteration runs in a process of its own")
+            changed = node.array if isinstance(node, IndexAssignment) else \
+                node.args[0] if isinstance(node, Builtin) and node.name in CHANGING_BUILTINS else None
+            if changed is not None and changed.name not in own:
+                self.fail(f"Changing {changed.name} in a parallel loop would be lost: "
+                          "each iteration runs in a process of its own")
+
+    def return_(self, stmt):
+        if self.function is None:
+            if stmt.expr is not None:
+                self.expr(stmt.expr)
+            return
+        expected = self.function.return_type
+        if stmt.expr is None:
+            if expected != "void":
+                self.fail(f"Missing return value, the function returns {expected}")
+        elif expected == "void":
+            self.fail("A void function cannot return a value")
+        else:
+            self.expect(stmt.expr, expected, "The return value")
+
+
+def check_types(program, stats=None):
+    """Check that every expression fits where it is used, and record its type.
+
+    Runs on a resolved program (see resolve.resolve): sets .type ("int",
+    "string", "bool", "job", or an array or map type such as "int[]" or
+    "map<string, int>") on every Identifier, BinOp, UnOp, Index, FuncCall,
+    Builtin and array or map literal, which codegen relies on, and raises
+    AshTypeError for a mismatch, a call to an undeclared function or with
+    the wrong arguments, and a void call used as a value. Literals, commands,
+    spawn, cached and read() have a fixed type. Calls to BUILTINS are marked, and
+    the runtime helpers the program needs recorded in program.runtime.
+    stats, when given, gets the nodes visited added to it.
+    """
+    functions = {node.name: node for node in program.children if isinstance(node, FuncDecl)}
+    checker = TypeChecker(functions)
+    for stmt in program.children:
+        checker.statement(stmt)
+    program.runtime = checker.runtime
+    if stats is not None:
+        stats.visited += checker.visited
+    return program
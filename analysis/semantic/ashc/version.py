@@ -0,0 +1,3 @@
+# Bump when the generated Bash changes for the same source, so cached
+# output from older compilers is never reused.
+COMPILER_VERSION = "1.3.0"
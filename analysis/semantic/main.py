@@ -1,43 +1,190 @@
-import subprocess
-import sys
+import argparse
 import os
-from parser import AshParser  # Your working Python compiler
+import signal
+import sys
+from ashc import client
+from ashc.cache import CompileCache, compiler_fingerprint, default_cache_dir
+from ashc.version import COMPILER_VERSION
+# The compiler itself (compiler, build, server) is imported lazily: a request
+# answered by the compile server should not pay for loading it.
+
+
+def print_cache_stats(cache):
+    stats = cache.stats()
+    print(f"📦 Cache {stats['directory']}: {stats['entries']} entries, {stats['bytes']} bytes, "
+          f"{stats.get('hits', 0)} hits, {stats.get('misses', 0)} misses, "
+          f"{stats.get('evictions', 0)} evictions")
 
-def main():
-    if len(sys.argv) != 3:
-        print("Usage: python3 main.py <source.ash> <output.sh>")
-        sys.exit(1)
 
-    source = sys.argv[1]
-    output = sys.argv[2]
+def compile_options(args):
+    """compile_string options selected on the command line (None keeps the default)."""
+    return {
+        "external_check": args.external_check,
+        "ash_binary": args.ash_binary,
+        "opt_level": args.opt_level,
+        "enable_passes": args.enable_passes,
+        "disable_passes": args.disable_passes,
+        "memo_limit": args.memo_limit,
+        "inline_limit": args.inline_limit,
+    }
 
-    # ✅ Step 1: Syntax check using Flex/Bison
-    with open(source, 'r') as src_file:
-        result = subprocess.run(["./ash"], stdin=src_file, capture_output=True, text=True)
 
-    if result.returncode != 0:
-        print("❌ Syntax error:")
-        print(result.stderr or result.stdout)
+def compile_file(args):
+    request = dict(compile_options(args),
+                   source=os.path.abspath(args.source),
+                   output=os.path.abspath(args.output),
+                   no_cache=args.no_cache,
+                   cache_dir=os.path.abspath(args.cache_dir or default_cache_dir()))
+    reply = None
+    if not args.no_server:
+        # The server refuses requests from another compiler than its own
+        reply = client.request(args.socket, dict(request, version=COMPILER_VERSION,
+                                                 fingerprint=compiler_fingerprint()))
+    if reply is None or reply.get("error") == "version":
+        # No compile server running, or one running other code: compile in this process
+        from ashc.compiler import compile_request
+        reply = compile_request(request, open_cache(args))
+
+    if not reply["ok"]:
+        if reply["error"] == "reference":
+            print("❌ Syntax error (reference parser):")
+            print(reply["message"])
+        elif reply["error"] == "syntax":
+            print(f"❌ Syntax error in {args.source}: {reply['message']}")
+        else:
+            print("❌ Semantic or generation error:", reply["message"])
         sys.exit(1)
 
-    print("✅ Syntax OK — continuing with compilation...")
+    # In JSON mode stdout carries only the pass statistics, for a program to read
+    out = sys.stderr if args.time_passes == "json" else sys.stdout
+    status = "Up to date (cached)" if reply["cached"] else "Compilation successful"
+    print(f"✅ {status}. Output written to {args.output}", file=out)
+    if args.report:
+        if reply["cached"]:
+            print("🔧 No optimization report for cached output (use --no-cache)", file=out)
+        for line in reply.get("report", []):
+            print(f"🔧 {line}", file=out)
+    if args.time_passes:
+        from ashc.passes import format_pass_stats
+        if args.time_passes == "text":
+            print(f"⏱️ Passes for {args.source}:")
+        for line in format_pass_stats(reply.get("passes", []), args.time_passes, source=args.source):
+            print(line)
+
+
+def add_compile_options(arg_parser):
+    """Options shared by single-file mode and `build`."""
+    arg_parser.add_argument("--external-check", action="store_true",
+                            help="also validate syntax with the Flex/Bison reference parser")
+    arg_parser.add_argument("--ash-binary", help="path of the reference parser (default: analysis/ash)")
+    arg_parser.add_argument("--no-cache", action="store_true",
+                            help="always compile, without reading or writing the compile cache")
+    arg_parser.add_argument("--cache-dir", help=f"compile cache location (default: {default_cache_dir()})")
+    arg_parser.add_argument("-O", dest="opt_level", type=int, choices=[0, 1, 2],
+                            help="optimization level: -O0 none (only @memo), -O1 folding, tail calls "
+                                 "and memoization, -O2 also inlining (default)")
+    arg_parser.add_argument("--enable-pass", dest="enable_passes", action="append", default=[], metavar="PASS",
+                            help="run PASS whatever the level (repeatable; see --list-passes)")
+    arg_parser.add_argument("--disable-pass", dest="disable_passes", action="append", default=[], metavar="PASS",
+                            help="skip PASS (repeatable)")
+    arg_parser.add_argument("--time-passes", nargs="?", const="text", choices=["text", "json"],
+                            help="print wall time, nodes visited and nodes changed per pass, "
+                                 "as a table or JSON (implies --no-cache)")
+    arg_parser.add_argument("--memo-limit", type=int, default=0, metavar="N",
+                            help="keep at most N results per memoized function (default: unbounded)")
+    arg_parser.add_argument("--inline-limit", type=int, metavar="N",
+                            help="inline functions of up to N AST nodes, 0 to disable (default: 24)")
 
-    # ✅ Step 2: Compile using your Python AST → Bash generator
-    with open(source) as f:
-        code = f.read()
 
+def parse_compile_args(arg_parser, argv=None):
+    args = arg_parser.parse_args(argv)
+    if args.time_passes:
+        args.no_cache = True  # cached results were never run through the passes
+    return args
+
+
+def open_cache(args):
+    if args.no_cache:
+        return None
     try:
-        ast = AshParser(code).parse()
-        bash_code = ast.generate()
+        return CompileCache(args.cache_dir)
+    except OSError as e:
+        print(f"⚠️ Compile cache disabled: {e}")
+        return None
 
-        with open(output, "w") as out_file:
-            out_file.write("#!/bin/bash\n" + bash_code)
 
-        os.chmod(output, 0o755)
-        print(f"✅ Compilation successful. Output written to {output}")
-    except Exception as e:
-        print("❌ Semantic or generation error:", e)
-        sys.exit(1)
+def positive_int(text):
+    value = int(text)
+    if value < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1, not {value}")
+    return value
+
+
+def build_main(argv):
+    arg_parser = argparse.ArgumentParser(prog="ashc build",
+                                         description="Compile many Ash sources in one process.")
+    arg_parser.add_argument("paths", nargs="+", help=".ash files or directories to search recursively")
+    arg_parser.add_argument("-o", "--output-dir", required=True, help="directory for the generated scripts")
+    arg_parser.add_argument("-j", "--jobs", type=positive_int, help="worker processes (default: CPU count)")
+    add_compile_options(arg_parser)
+    args = parse_compile_args(arg_parser, argv)
+
+    from ashc.build import build
+    failed = build(args.paths, args.output_dir, args.jobs, args.cache_dir, not args.no_cache,
+                   time_passes=args.time_passes, **compile_options(args))
+    sys.exit(1 if failed else 0)
+
+
+def main():
+    if sys.argv[1:2] == ["build"]:
+        build_main(sys.argv[2:])
+        return
+
+    arg_parser = argparse.ArgumentParser(description="Compile Ash source to Bash.",
+                                         epilog="Use `build <paths...> -o <dir>` to compile many files at once.")
+    arg_parser.add_argument("source", nargs="?", help="Ash source file")
+    arg_parser.add_argument("output", nargs="?", help="Bash script to write")
+    add_compile_options(arg_parser)
+    arg_parser.add_argument("--report", action="store_true",
+                            help="list the functions the optimizer rewrote or memoized")
+    arg_parser.add_argument("--list-passes", action="store_true",
+                            help="list the optimization passes and the level enabling each")
+    arg_parser.add_argument("--cache-stats", action="store_true",
+                            help="print compile cache statistics (sources are optional)")
+    arg_parser.add_argument("--serve", action="store_true",
+                            help="run a compile server that later invocations forward to")
+    arg_parser.add_argument("--socket", default=client.default_socket_path(),
+                            help="compile server socket (default: %(default)s)")
+    arg_parser.add_argument("--no-server", action="store_true",
+                            help="compile in this process even if a compile server is running")
+    args = parse_compile_args(arg_parser)
+
+    if args.list_passes:
+        from ashc.passes import PASSES
+        for p in PASSES.values():
+            print(f"{p.name:10} -O{p.level}  {p.description}")
+        return
+
+    if args.serve:
+        # Let `kill` stop the server as cleanly as Ctrl-C does
+        signal.signal(signal.SIGTERM, signal.default_int_handler)
+        from ashc.server import serve
+        try:
+            serve(args.socket)
+        except OSError as e:
+            print(f"❌ Cannot start compile server: {e}")
+            sys.exit(1)
+        return
+
+    if (args.source is None) != (args.output is None) or (args.source is None and not args.cache_stats):
+        arg_parser.error("expected <source.ash> <output.sh>")
+
+    if args.source is not None:
+        compile_file(args)
+    if args.cache_stats:
+        cache = open_cache(args)
+        if cache:
+            print_cache_stats(cache)
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,66 @@
+"""Templated scripts compiled through the in-process API versus one subprocess each.
+
+    python3 benchmarks/bench_api.py [--scripts 2000]
+"""
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from common import SEMANTIC_DIR, arg_parser, print_table
+
+sys.path.insert(0, SEMANTIC_DIR)
+from ashc import compile_string  # noqa: E402
+
+TEMPLATE = """
+let host: string = "web-{i}";
+let retries: int = {i} % 5 + 1;
+int function backoff(int attempt) {{
+    return attempt * attempt * 100;
+}}
+for (attempt in 1..retries) {{
+    echo(backoff(attempt));
+}}
+echo(host);
+"""
+
+
+def main():
+    parser = arg_parser(__doc__, baseline=False)
+    parser.add_argument("--scripts", type=int, default=2000)
+    parser.add_argument("--subprocess-scripts", type=int, default=50,
+                        help="scripts compiled through `main.py` subprocesses (slow)")
+    args = parser.parse_args()
+    sources = [TEMPLATE.format(i=i) for i in range(args.scripts)]
+
+    rows = []
+    start = time.perf_counter()
+    for source in sources:
+        compile_string(source)
+    elapsed = time.perf_counter() - start
+    rows.append(["compile_string, 1 thread", args.scripts, f"{args.scripts / elapsed:,.0f}"])
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(8) as pool:
+        list(pool.map(compile_string, sources))
+    elapsed = time.perf_counter() - start
+    rows.append(["compile_string, 8 threads", args.scripts, f"{args.scripts / elapsed:,.0f}"])
+
+    count = args.subprocess_scripts
+    with tempfile.TemporaryDirectory() as work:
+        start = time.perf_counter()
+        for i, source in enumerate(sources[:count]):
+            src = os.path.join(work, f"s{i}.ash")
+            with open(src, "w") as f:
+                f.write(source)
+            subprocess.run([sys.executable, os.path.join(SEMANTIC_DIR, "main.py"), "--no-cache",
+                            "--no-server", src, src + ".sh"], check=True, stdout=subprocess.DEVNULL)
+        elapsed = time.perf_counter() - start
+    rows.append(["main.py subprocess each", count, f"{count / elapsed:,.1f}"])
+    print_table(["mode", "scripts", "scripts/s"], rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""Wall time of tight arithmetic loops in the generated scripts.
+
+Compare expression code generation against an older compiler with:
+
+    python3 benchmarks/bench_arith.py --baseline /path/to/old/analysis/semantic
+"""
+import os
+
+from common import arg_parser, compile_ash, compilers, print_table, run_script
+
+PROGRAMS = {
+    "count primes <= 3000": """
+bool function is_prime(int n) {
+    if (n <= 1) {
+        return false;
+    }
+    let i: int = 2;
+    while (i * i <= n) {
+        if (n % i == 0) {
+            return false;
+        }
+        i = i + 1;
+    }
+    return true;
+}
+
+let count: int = 0;
+for (k in 1..3000) {
+    if (is_prime(k)) {
+        count = count + 1;
+    }
+}
+echo(count);
+""",
+    "gcd of 40000 pairs": """
+int function gcd(int a, int b) {
+    while (b != 0) {
+        let t: int = b;
+        b = a % b;
+        a = t;
+    }
+    return a;
+}
+
+let total: int = 0;
+for (k in 1..40000) {
+    total = total + gcd(k * 7 + 3, k % 97 + 1);
+}
+echo(total);
+""",
+    "polynomial, 100000 steps": """
+let acc: int = 0;
+let x: int = 0;
+while (x < 100000 and acc >= 0) {
+    acc = (acc + x * x * 3 - x * 2 + 7) % 1000003;
+    x = x + 1;
+}
+echo(acc);
+""",
+}
+
+
+def main():
+    parser = arg_parser(__doc__)
+    parser.add_argument("--repeat", type=int, default=3, help="runs per script, the fastest is kept")
+    args = parser.parse_args()
+
+    rows = []
+    for name, source in PROGRAMS.items():
+        for label, semantic_dir in compilers(args):
+            script = compile_ash(source, semantic_dir)
+            runs = [run_script(script) for _ in range(args.repeat)]
+            os.unlink(script)
+            best = min(elapsed for elapsed, _, _ in runs)
+            rows.append([name, label, runs[0][2].strip(), f"{best * 1000:.0f}"])
+    print_table(["program", "compiler", "result", "ms"], rows)
+
+
+if __name__ == "__main__":
+    main()
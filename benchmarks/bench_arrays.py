@@ -0,0 +1,63 @@
+"""Forks and wall time of building a list, reading each item by position and looping over it.
+
+The split variant is how a script kept a list before int[] and string[]: a
+space-joined string, cut apart by a pipeline for each item it reads and
+split into lines to loop over. The array variant does the same on a bash
+indexed array, in the script's own process:
+
+    python3 benchmarks/bench_arrays.py [--sizes 100,1000]
+"""
+import os
+
+from common import arg_parser, compile_ash, print_table, run_script
+
+PROGRAMS = {
+    "split": """
+let list: string = "";
+for (i in 1..%(n)d) {
+    list = list + (i * 7) + " ";
+}
+for (i in 1..%(n)d) {
+    echo(!(echo $list | cut -d' ' -f$i));
+}
+for (item in !(tr ' ' '\\n' <<< "$list")) {
+    echo(item);
+}
+""",
+    "array": """
+let items: int[];
+for (i in 1..%(n)d) {
+    append(items, i * 7);
+}
+for (i in 0..len(items) - 1) {
+    echo(items[i]);
+}
+for (item in items) {
+    echo(item);
+}
+""",
+}
+
+
+def main():
+    parser = arg_parser(__doc__, baseline=False)
+    parser.add_argument("--sizes", default="100,1000", help="numbers of items")
+    args = parser.parse_args()
+
+    rows = []
+    for n in map(int, args.sizes.split(",")):
+        outputs = {}
+        for name, program in PROGRAMS.items():
+            script = compile_ash(program % {"n": n})
+            try:
+                elapsed, forks, out = run_script(script)
+            finally:
+                os.unlink(script)
+            outputs[name] = [line for line in out.splitlines() if line]
+            rows.append([n, name, forks, f"{elapsed * 1000:.0f}", f"{elapsed / n * 1e6:.0f}"])
+        assert outputs["split"] == outputs["array"], "the variants disagree"
+    print_table(["items", "variant", "forks", "ms", "us/item"], rows)
+
+
+if __name__ == "__main__":
+    main()
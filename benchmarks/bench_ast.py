@@ -0,0 +1,107 @@
+"""AST memory per node and compile time of a program of many statements.
+
+Parses a generated program (10 statements per function-and-globals unit)
+under tracemalloc, divides what stays allocated by the number of AST nodes,
+then times a full compile_string:
+
+    python3 benchmarks/bench_ast.py [--statements 100000] [--baseline DIR]
+"""
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+from common import arg_parser, compilers, print_table
+
+UNIT = """
+int function f{i}(int n) {{
+    let t: int = n * 2;
+    for (k in 1..n) {{
+        t = t + k % 3;
+    }}
+    return t;
+}}
+let a{i}: int = f{i}({i} % 10);
+let s{i}: string = "v{i}";
+if (a{i} > 5 and a{i} < 100) {{
+    echo(s{i});
+}} else {{
+    a{i} = a{i} - 1;
+}}
+echo(a{i});
+"""
+STATEMENTS_PER_UNIT = 10
+
+# Runs in a fresh interpreter per compiler so their modules never mix
+_SNIPPET = """
+import json, sys, time, tracemalloc
+sys.path.insert(0, sys.argv[1])
+from ashc import compile_string
+from ashc.nodes import Node
+from ashc.parser import AshParser
+
+code = open(sys.argv[2]).read()
+tracemalloc.start()
+program = AshParser(code).parse()
+retained = tracemalloc.get_traced_memory()[0]
+tracemalloc.stop()
+
+def fields(node):
+    if hasattr(node, "__dict__"):
+        return list(vars(node).values())
+    return [getattr(node, slot, None) for cls in type(node).__mro__ for slot in getattr(cls, "__slots__", ())]
+
+nodes = instance_bytes = 0
+stack = [program]
+while stack:
+    node = stack.pop()
+    nodes += 1
+    instance_bytes += sys.getsizeof(node) + (sys.getsizeof(vars(node)) if hasattr(node, "__dict__") else 0)
+    for value in fields(node):
+        if isinstance(value, Node):
+            stack.append(value)
+        elif isinstance(value, list):
+            stack.extend(v for v in value if isinstance(v, Node))
+del program
+
+best = None
+for _ in range(int(sys.argv[3])):
+    start = time.perf_counter()
+    compile_string(code)
+    elapsed = time.perf_counter() - start
+    best = elapsed if best is None else min(best, elapsed)
+print(json.dumps({"nodes": nodes, "retained": retained, "instance": instance_bytes, "seconds": best}))
+"""
+
+
+def main():
+    parser = arg_parser(__doc__)
+    parser.add_argument("--statements", type=int, default=100000)
+    parser.add_argument("--repeat", type=int, default=3, help="compiles per compiler, the fastest is kept")
+    args = parser.parse_args()
+
+    units = max(1, args.statements // STATEMENTS_PER_UNIT)
+    fd, path = tempfile.mkstemp(suffix=".ash")
+    with os.fdopen(fd, "w") as f:
+        f.write("".join(UNIT.format(i=i) for i in range(units)))
+    size = os.path.getsize(path)
+
+    rows = []
+    try:
+        for label, semantic_dir in compilers(args):
+            out = subprocess.run([sys.executable, "-c", _SNIPPET, semantic_dir, path, str(args.repeat)],
+                                 check=True, capture_output=True, text=True).stdout
+            result = json.loads(out)
+            rows.append([label, units * STATEMENTS_PER_UNIT, f"{size / 1024:.0f}", result["nodes"],
+                         f"{result['instance'] / result['nodes']:.0f}",
+                         f"{result['retained'] / result['nodes']:.0f}",
+                         f"{result['retained'] / 1024 / 1024:.1f}", f"{result['seconds'] * 1000:.0f}"])
+    finally:
+        os.unlink(path)
+    print_table(["compiler", "statements", "KiB", "nodes", "B/node (object)", "B/node (retained)",
+                 "AST MiB", "compile ms"], rows)
+
+
+if __name__ == "__main__":
+    main()
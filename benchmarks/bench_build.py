@@ -0,0 +1,58 @@
+"""One `main.py` process per file versus `main.py build` over the same tree.
+
+    python3 benchmarks/bench_build.py [--files 200]
+"""
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+from common import SEMANTIC_DIR, arg_parser, generate_corpus, print_table
+
+MAIN = os.path.join(SEMANTIC_DIR, "main.py")
+
+
+def timed(commands):
+    start = time.perf_counter()
+    for command in commands:
+        subprocess.run(command, check=True, stdout=subprocess.DEVNULL)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = arg_parser(__doc__, baseline=False)
+    parser.add_argument("--files", type=int, default=200, help="number of generated sources")
+    parser.add_argument("--kb", type=int, default=4, help="size of each source in KiB")
+    args = parser.parse_args()
+
+    work = tempfile.mkdtemp(prefix="ashc-bench-build-")
+    src_dir = os.path.join(work, "src")
+    os.makedirs(src_dir)
+    sources = []
+    for i in range(args.files):
+        path = os.path.join(src_dir, f"script_{i}.ash")
+        with open(path, "w") as f:
+            f.write(generate_corpus(args.kb * 1024))
+        sources.append(path)
+    out_dir = os.path.join(work, "out")
+    os.makedirs(out_dir)
+
+    build = [sys.executable, MAIN, "build", src_dir, "-o", out_dir, "--no-cache"]
+    modes = [
+        ("one process per file", [[sys.executable, MAIN, "--no-cache", src, os.path.join(out_dir, "x.sh")]
+                                  for src in sources]),
+        ("build -j 1", [build + ["-j", "1"]]),
+        (f"build -j {os.cpu_count()}", [build]),
+    ]
+    rows = []
+    for label, commands in modes:
+        elapsed = timed(commands)
+        rows.append([label, args.files, f"{elapsed:.2f}", f"{args.files / elapsed:.1f}"])
+    shutil.rmtree(work)
+    print_table(["mode", "files", "seconds", "files/s"], rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""Wall time and forks of a script repeating slow captures, with and without cached(ttl).
+
+The script captures --commands different slow commands, each standing in
+for an inventory query or a listing that takes --delay seconds. It is run
+--runs times in a row, as a script run again within seconds would be. The
+cached variant runs them once, on the first (cold) run, and reads them from
+the cache afterwards:
+
+    python3 benchmarks/bench_cached.py [--commands 5] [--delay 0.2] [--runs 5]
+"""
+import os
+import shutil
+import tempfile
+
+from common import arg_parser, compile_ash, print_table, run_script
+
+PROGRAMS = {
+    "!(cmd)": """
+for (i in 1..%(commands)d) {
+    echo(!(sleep %(delay)s; echo "host $i: up"));
+}
+""",
+    "cached(60) !(cmd)": """
+for (i in 1..%(commands)d) {
+    echo(cached(60) !(sleep %(delay)s; echo "host $i: up"));
+}
+""",
+}
+
+
+def main():
+    parser = arg_parser(__doc__, baseline=False)
+    parser.add_argument("--commands", type=int, default=5)
+    parser.add_argument("--delay", default="0.2", help="seconds each command takes")
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    cache_dir = tempfile.mkdtemp()
+    os.environ["ASH_CACHE_DIR"] = cache_dir  # the scripts' cache, left out of the user's
+    rows = []
+    try:
+        outputs = {}
+        for name, program in PROGRAMS.items():
+            script = compile_ash(program % {"commands": args.commands, "delay": args.delay})
+            try:
+                runs = [run_script(script) for _ in range(args.runs)]
+            finally:
+                os.unlink(script)
+            outputs[name] = {out for _, _, out in runs}
+            (cold, cold_forks, _), warm = runs[0], runs[1:]
+            warm_ms = sum(elapsed for elapsed, _, _ in warm) / len(warm) * 1000
+            warm_forks = sum(forks for _, forks, _ in warm) / len(warm)
+            rows.append([name, cold_forks, f"{cold * 1000:.0f}", f"{warm_forks:.0f}", f"{warm_ms:.0f}"])
+        assert len(set.union(*outputs.values())) == 1, "the variants disagree"
+    finally:
+        shutil.rmtree(cache_dir)
+    print_table(["capture", "cold forks", "cold ms", "warm forks", "warm ms"], rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,36 @@
+"""Fork count and wall time of recursive function calls.
+
+Runs the recursive programs from analysis/tests/positive with growing
+arguments. Compare calling conventions with:
+
+    python3 benchmarks/bench_calls.py --baseline /path/to/old/analysis/semantic
+"""
+import os
+import re
+
+from common import TESTS_DIR, arg_parser, compile_ash, compilers, print_table, run_script
+
+CASES = [
+    ("factorial.ash", r"fact\(5\)", "fact({})", [5, 10, 20]),
+    ("fibonacci.ash", r"fib\(6\)", "fib({})", [6, 10, 15]),
+]
+
+
+def main():
+    args = arg_parser(__doc__).parse_args()
+    rows = []
+    for test, pattern, call, sizes in CASES:
+        with open(os.path.join(TESTS_DIR, test)) as f:
+            template = f.read()
+        for n in sizes:
+            source = re.sub(pattern, call.format(n), template)
+            for label, semantic_dir in compilers(args):
+                script = compile_ash(source, semantic_dir)
+                elapsed, forks, out = run_script(script)
+                os.unlink(script)
+                rows.append([call.format(n), label, out.strip(), forks, f"{elapsed * 1000:.1f}"])
+    print_table(["program", "compiler", "result", "forks", "ms"], rows)
+
+
+if __name__ == "__main__":
+    main()
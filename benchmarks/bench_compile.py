@@ -0,0 +1,70 @@
+"""Compile latency of `main.py` on large generated programs.
+
+Times a full `python3 main.py` run per input size: compiling in-process,
+with `--external-check` (only when the Flex/Bison reference parser in
+analysis/ash can be run), and answering from a warm compile cache.
+
+    python3 benchmarks/bench_compile.py [--max-kb 4096]
+"""
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+from common import ROOT, SEMANTIC_DIR, arg_parser, generate_corpus, print_table
+
+MAIN = os.path.join(SEMANTIC_DIR, "main.py")
+ASH_BINARY = os.path.join(ROOT, "analysis", "ash")
+
+
+def reference_parser_works():
+    try:
+        return subprocess.run([ASH_BINARY], input="", capture_output=True).returncode == 0
+    except OSError:
+        return False
+
+
+def time_compile(src, extra_args, repeat=3):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, MAIN, *extra_args, src, src + ".sh"],
+                       check=True, stdout=subprocess.DEVNULL)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    os.unlink(src + ".sh")
+    return best
+
+
+def main():
+    parser = arg_parser(__doc__, baseline=False)
+    parser.add_argument("--max-kb", type=int, default=4096, help="largest program size in KiB")
+    args = parser.parse_args()
+
+    cache_dir = tempfile.mkdtemp(prefix="ashc-bench-cache-")
+    modes = [("in-process", ["--no-cache"])]
+    if reference_parser_works():
+        modes.append(("--external-check", ["--no-cache", "--external-check"]))
+    else:
+        print(f"note: {ASH_BINARY} cannot run here, skipping --external-check\n")
+    # The first of the repeated runs fills the cache, the best one is a hit
+    modes.append(("cache hit", ["--cache-dir", cache_dir]))
+
+    rows = []
+    kb = 16
+    while kb <= args.max_kb:
+        with tempfile.NamedTemporaryFile("w", suffix=".ash", delete=False) as f:
+            f.write(generate_corpus(kb * 1024))
+        for label, extra in modes:
+            elapsed = time_compile(f.name, extra)
+            rows.append([kb, label, f"{elapsed * 1000:.0f}", f"{kb / 1024 / elapsed:.2f}"])
+        os.unlink(f.name)
+        kb *= 4
+    shutil.rmtree(cache_dir)
+    print_table(["KiB", "mode", "ms", "MiB/s"], rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""Compile time and peak memory of code generation over nesting depth and program size.
+
+Each program is compiled with compile_file straight to an output file, in
+a fresh interpreter per compiler; peak memory is what tracemalloc saw
+allocated at once during the compile, the AST included:
+
+    python3 benchmarks/bench_emit.py [--depths 25,50,100,200] [--sizes 1,4,16] [--baseline DIR]
+"""
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+from common import arg_parser, compilers, generate_corpus, print_table
+
+# Statements at every level of the nested program
+LEVEL = """
+x = x + {i};
+echo(x);
+let y{i}: int = x * 2 - {i};
+if (y{i} % 3 == 0) {{
+    echo(y{i});
+}}
+"""
+
+_SNIPPET = """
+import json, sys, time, tracemalloc
+sys.path.insert(0, sys.argv[1])
+from ashc import compile_file
+
+source, output = sys.argv[2], sys.argv[3]
+compile_file(source, output)  # warm up imports
+best = None
+for _ in range(int(sys.argv[4])):
+    start = time.perf_counter()
+    compile_file(source, output)
+    elapsed = time.perf_counter() - start
+    best = elapsed if best is None else min(best, elapsed)
+tracemalloc.start()
+compile_file(source, output)
+peak = tracemalloc.get_traced_memory()[1]
+print(json.dumps({"seconds": best, "peak": peak}))
+"""
+
+
+def nested(depth):
+    """A program whose statements sit in depth nested ifs, the same number at every level."""
+    lines = ["let x: int = 0;"]
+    for i in range(depth):
+        lines.append(LEVEL.format(i=i))
+        lines.append(f"if (x > {-i - 1}) {{")
+    lines.append("echo(x);")
+    lines.append("}" * depth)
+    return "\n".join(lines)
+
+
+def main():
+    parser = arg_parser(__doc__)
+    parser.add_argument("--depths", default="25,50,100,200", help="nesting depths")
+    parser.add_argument("--sizes", default="1,4,16", help="flat program sizes in MiB")
+    parser.add_argument("--repeat", type=int, default=3, help="compiles per program, the fastest is kept")
+    args = parser.parse_args()
+
+    programs = [(f"depth {d}", nested(int(d))) for d in args.depths.split(",")]
+    programs += [(f"{size} MiB flat", generate_corpus(int(size) * 1024 * 1024)) for size in args.sizes.split(",")]
+
+    rows = []
+    workdir = tempfile.mkdtemp()
+    source, output = os.path.join(workdir, "program.ash"), os.path.join(workdir, "program.sh")
+    try:
+        for name, program in programs:
+            with open(source, "w") as f:
+                f.write(program)
+            for label, semantic_dir in compilers(args):
+                out = subprocess.run([sys.executable, "-c", _SNIPPET, semantic_dir, source, output,
+                                      str(args.repeat)], check=True, capture_output=True, text=True).stdout
+                result = json.loads(out)
+                rows.append([name, label, f"{len(program) / 1024:.0f}", f"{os.path.getsize(output) / 1024:.0f}",
+                             f"{result['seconds'] * 1000:.0f}", f"{result['peak'] / 1024 / 1024:.1f}"])
+    finally:
+        for path in (source, output):
+            if os.path.exists(path):
+                os.unlink(path)
+        os.rmdir(workdir)
+    print_table(["program", "compiler", "source KiB", "script KiB", "ms", "peak MiB"], rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""Wall time of loops calling small helper functions, with inlining on and off.
+
+    python3 benchmarks/bench_inline.py [--limit 24] [--repeat 3]
+"""
+import os
+
+from common import arg_parser, compile_ash, print_table, run_script
+
+PROGRAMS = {
+    "square in a for loop": """
+int function square(int n) {
+    return n * n;
+}
+
+let total: int = 0;
+for (i in 1..50000) {
+    total = total + square(i) % 7;
+}
+echo(total);
+""",
+    "predicate in a while condition": """
+bool function below(int n, int limit) {
+    return n * n < limit;
+}
+
+let i: int = 0;
+while (below(i, 2500000000)) {
+    i = i + 1;
+}
+echo(i);
+""",
+    "clamp statement": """
+int function clamp(int v, int lo, int hi) {
+    let r: int = v;
+    if (v < lo) {
+        r = lo;
+    }
+    if (v > hi) {
+        r = hi;
+    }
+    return r;
+}
+
+let total: int = 0;
+for (i in 1..30000) {
+    let c: int = clamp(i % 100, 10, 90);
+    total = total + c;
+}
+echo(total);
+""",
+}
+
+
+def main():
+    parser = arg_parser(__doc__, baseline=False)
+    parser.add_argument("--limit", type=int, default=24, help="inline_limit for the inlined runs (default 24)")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per script, the fastest is kept")
+    args = parser.parse_args()
+
+    rows = []
+    for name, source in PROGRAMS.items():
+        for label, limit in (("calls", 0), ("inlined", args.limit)):
+            script = compile_ash(source, inline_limit=limit)
+            runs = [run_script(script) for _ in range(args.repeat)]
+            os.unlink(script)
+            best = min(elapsed for elapsed, _, _ in runs)
+            rows.append([name, label, runs[0][2].strip(), f"{best * 1000:.0f}"])
+    print_table(["program", "variant", "result", "ms"], rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""Forks and wall time of a lookup-heavy loop, in a map and by grepping a file per key.
+
+A table of --keys hosts and their roles is queried --lookups times. The
+grep variant is how a script looked a key up before map<string, T>: one
+`grep | cut` pipeline through the table file per lookup. The map variant
+fills a map<string, string> with the same table first:
+
+    python3 benchmarks/bench_maps.py [--keys 100,1000] [--lookups 1000]
+"""
+import os
+import tempfile
+
+from common import arg_parser, compile_ash, print_table, run_script
+
+PROGRAMS = {
+    "grep": """
+for (i in 1..%(lookups)d) {
+    let host: string = "host" + (i * 7 %% %(keys)d);
+    echo(!(grep -m1 "^$host " %(table)s | cut -d' ' -f2));
+}
+""",
+    "map": """
+let roles: map<string, string>;
+for (i in 0..%(keys)d - 1) {
+    roles["host" + i] = "role" + i %% 5;
+}
+for (i in 1..%(lookups)d) {
+    echo(roles["host" + (i * 7 %% %(keys)d)]);
+}
+""",
+}
+
+
+def main():
+    parser = arg_parser(__doc__, baseline=False)
+    parser.add_argument("--keys", default="100,1000", help="sizes of the table")
+    parser.add_argument("--lookups", type=int, default=1000)
+    args = parser.parse_args()
+
+    rows = []
+    for keys in map(int, args.keys.split(",")):
+        fd, table = tempfile.mkstemp(suffix=".txt")
+        with os.fdopen(fd, "w") as f:
+            f.writelines(f"host{i} role{i % 5}\n" for i in range(keys))
+        outputs = {}
+        try:
+            for name, program in PROGRAMS.items():
+                script = compile_ash(program % {"keys": keys, "lookups": args.lookups, "table": table})
+                try:
+                    elapsed, forks, outputs[name] = run_script(script)
+                finally:
+                    os.unlink(script)
+                rows.append([keys, name, forks, f"{elapsed * 1000:.0f}",
+                             f"{elapsed / args.lookups * 1e6:.0f}"])
+        finally:
+            os.unlink(table)
+        assert outputs["grep"] == outputs["map"], "the variants disagree"
+    print_table(["keys", "variant", "forks", "ms", "us/lookup"], rows)
+
+
+if __name__ == "__main__":
+    main()
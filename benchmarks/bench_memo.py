@@ -0,0 +1,40 @@
+"""Wall time of naive recursive fibonacci with and without memoization.
+
+tests/positive/fibonacci.ash is memoized automatically; `@memo(false)`
+gives the plain exponential version for comparison:
+
+    python3 benchmarks/bench_memo.py [--plain-max 20]
+"""
+import os
+import re
+
+from common import TESTS_DIR, arg_parser, compile_ash, print_table, run_script
+
+SIZES = [10, 15, 20, 25, 40, 80]
+
+
+def main():
+    parser = arg_parser(__doc__, baseline=False)
+    parser.add_argument("--plain-max", type=int, default=20,
+                        help="largest n to run without memoization (default 20)")
+    args = parser.parse_args()
+
+    with open(os.path.join(TESTS_DIR, "fibonacci.ash")) as f:
+        template = f.read()
+
+    rows = []
+    for n in SIZES:
+        source = re.sub(r"fib\(6\)", f"fib({n})", template)
+        variants = [("memo", source)]
+        if n <= args.plain_max:
+            variants.insert(0, ("plain", "@memo(false)\n" + source))
+        for label, program in variants:
+            script = compile_ash(program)
+            elapsed, forks, out = run_script(script)
+            os.unlink(script)
+            rows.append([f"fib({n})", label, out.strip(), forks, f"{elapsed * 1000:.1f}"])
+    print_table(["program", "variant", "result", "forks", "ms"], rows)
+
+
+if __name__ == "__main__":
+    main()
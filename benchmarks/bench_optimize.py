@@ -0,0 +1,60 @@
+"""Output size and run time with and without constant folding.
+
+Compiles every program in analysis/tests/positive, plus a loop full of
+constant expressions and disabled debug branches, at -O0 and with only the
+folding pass enabled:
+
+    python3 benchmarks/bench_optimize.py [--repeat 5]
+"""
+import glob
+import os
+
+from common import TESTS_DIR, arg_parser, compile_ash, print_table, run_script
+
+CONSTANT_HEAVY = """
+let total: int = 0;
+for (i in 1..20000) {
+    total = total + 60 * 60 * 24 - (1000 / 8) % 7;
+    if (1 > 2 or false) {
+        echo("debug: " + "iteration");
+    }
+    if (not (3 * 4 == 12)) {
+        total = 0;
+    }
+}
+echo(total);
+"""
+
+
+def measure(name, source, stdin, repeat):
+    row = [name]
+    for enable in ([], ["fold"]):
+        script = compile_ash(source, opt_level=0, enable_passes=enable)
+        size = os.path.getsize(script)
+        best = min(run_script(script, stdin)[0] for _ in range(repeat))
+        os.unlink(script)
+        row += [size, f"{best * 1000:.1f}"]
+    return row
+
+
+def main():
+    parser = arg_parser(__doc__, baseline=False)
+    parser.add_argument("--repeat", type=int, default=5, help="runs per script, the fastest is kept")
+    args = parser.parse_args()
+
+    rows = []
+    for path in sorted(glob.glob(os.path.join(TESTS_DIR, "*.ash"))):
+        with open(path) as f:
+            source = f.read()
+        rows.append(measure(os.path.basename(path), source, "TestInput\n", args.repeat))
+    rows.append(measure("constant loop", CONSTANT_HEAVY, None, args.repeat))
+
+    totals = ["total"]
+    for col in (1, 3):
+        totals += [sum(r[col] for r in rows), ""]
+    rows.append(totals)
+    print_table(["program", "bytes", "ms", "bytes folded", "ms folded"], rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+"""Wall time of a loop of slow, independent iterations, sequential and with parallel(N).
+
+Each iteration waits --delay seconds, standing in for a command that spends
+its time on the network or on another host (an ssh to each host of a list):
+
+    python3 benchmarks/bench_parallel.py [--iterations 32] [--delay 0.2] [--limits 2,4,8,16]
+"""
+import os
+
+from common import arg_parser, compile_ash, print_table, run_script
+
+SEQUENTIAL = """
+for (i in 1..%(n)d) {
+    !sleep %(delay)s;
+    echo("host " + i);
+}
+"""
+
+PARALLEL = """
+parallel(%(limit)d%(ordered)s) for (i in 1..%(n)d) {
+    !sleep %(delay)s;
+    echo("host " + i);
+}
+"""
+
+
+def main():
+    parser = arg_parser(__doc__, baseline=False)
+    parser.add_argument("--iterations", type=int, default=32)
+    parser.add_argument("--delay", default="0.2", help="seconds each iteration waits")
+    parser.add_argument("--limits", default="2,4,8,16", help="parallel(N) limits to run")
+    args = parser.parse_args()
+
+    params = {"n": args.iterations, "delay": args.delay}
+    variants = [("for", SEQUENTIAL % params)]
+    for limit in args.limits.split(","):
+        for ordered in ("", ", ordered"):
+            source = PARALLEL % dict(params, limit=int(limit), ordered=ordered)
+            variants.append((f"parallel({limit}{ordered})", source))
+
+    rows = []
+    sequential = None
+    for name, source in variants:
+        script = compile_ash(source)
+        try:
+            elapsed, forks, out = run_script(script)
+        finally:
+            os.unlink(script)
+        sequential = sequential or elapsed
+        rows.append([name, len(out.splitlines()), forks, f"{elapsed * 1000:.0f}", f"{sequential / elapsed:.1f}x"])
+    print_table(["loop", "lines", "forks", "ms", "speedup"], rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""Compile time spent in each optimization pass at -O0, -O1 and -O2.
+
+Compiles the positive tests and generated programs of growing size through
+the in-process API and splits the time between the passes and the rest
+(parsing and code generation):
+
+    python3 benchmarks/bench_passes.py [--sizes 16,256,1024] [--repeat 3]
+"""
+import glob
+import os
+import sys
+import time
+
+from common import SEMANTIC_DIR, TESTS_DIR, arg_parser, generate_corpus, print_table
+
+sys.path.insert(0, SEMANTIC_DIR)
+from ashc import compile_string  # noqa: E402
+
+
+def measure(sources, level, repeat):
+    """Fastest total compile time of sources and the pass stats of that run."""
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        passes = {}
+        for source in sources:
+            for p in compile_string(source, opt_level=level).passes:
+                totals = passes.setdefault(p["name"], [0.0, 0, 0])
+                totals[0] += p["seconds"]
+                totals[1] += p["visited"]
+                totals[2] += p["changed"]
+        elapsed = time.perf_counter() - start
+        if best is None or elapsed < best[0]:
+            best = (elapsed, passes)
+    return best
+
+
+def main():
+    parser = arg_parser(__doc__, baseline=False)
+    parser.add_argument("--sizes", default="16,256,1024", help="generated program sizes in KiB")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per corpus, the fastest is kept")
+    args = parser.parse_args()
+
+    corpora = []
+    tests = []
+    for path in sorted(glob.glob(os.path.join(TESTS_DIR, "*.ash"))):
+        with open(path) as f:
+            tests.append(f.read())
+    corpora.append((f"{len(tests)} positive tests", tests))
+    for kib in args.sizes.split(","):
+        corpora.append((f"{kib} KiB program", [generate_corpus(int(kib) * 1024)]))
+
+    rows = []
+    for name, sources in corpora:
+        for level in (0, 1, 2):
+            elapsed, passes = measure(sources, level, args.repeat)
+            in_passes = sum(seconds for seconds, _, _ in passes.values())
+            detail = ", ".join(f"{p} {seconds * 1000:.1f}" for p, (seconds, _, _) in passes.items())
+            rows.append([name, f"-O{level}", f"{elapsed * 1000:.1f}", f"{in_passes * 1000:.1f}",
+                         f"{in_passes / elapsed * 100:.0f}%", sum(v for _, v, _ in passes.values()),
+                         sum(c for _, _, c in passes.values()), detail])
+    print_table(["corpus", "level", "total ms", "passes ms", "share", "visited", "changed", "per pass ms"], rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,35 @@
+"""Time and peak memory of `for (i in a..b)` as the range grows.
+
+    python3 benchmarks/bench_ranges.py [--max 1e7] [--baseline /path/to/old/analysis/semantic]
+"""
+import os
+
+from common import arg_parser, compile_ash, compilers, print_table, run_script_rss
+
+PROGRAM = """
+let sum: int = 0;
+for (i in 1..%d) {
+    sum = sum + 1;
+}
+"""
+
+
+def main():
+    parser = arg_parser(__doc__)
+    parser.add_argument("--max", type=float, default=1e7, help="largest range size (default 1e7)")
+    args = parser.parse_args()
+
+    rows = []
+    size = 1000
+    while size <= args.max:
+        for label, semantic_dir in compilers(args):
+            script = compile_ash(PROGRAM % size, semantic_dir)
+            elapsed, rss = run_script_rss(script)
+            os.unlink(script)
+            rows.append([f"{size:.0e}", label, f"{elapsed:.2f}", f"{rss / 1024:.1f}"])
+        size *= 10
+    print_table(["range", "compiler", "seconds", "peak MiB"], rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""Throughput and peak memory of reading a file whole, as lines and line by line.
+
+The script's input is a file of --sizes MiB of 100-byte lines. Each variant
+reads all of it: `!(cat file)` is how a script took a whole file before
+read_file(); a loop of read() calls how it took lines before read_lines(),
+which fills an array with one mapfile, and `for (line in read_lines())`,
+which streams the lines in constant memory:
+
+    python3 benchmarks/bench_read.py [--sizes 1,16,256,1024]
+"""
+import os
+import subprocess
+import tempfile
+import time
+
+from common import arg_parser, compile_ash, print_table
+
+LINE = "x" * 99 + "\n"
+
+PROGRAMS = {
+    "!(cat file)": """
+let all: string = !(cat %(path)s);
+echo(len(all));
+""",
+    "read_file": """
+let all: string = read_file("%(path)s");
+echo(len(all));
+""",
+    "read_all": """
+let all: string = read_all();
+echo(len(all));
+""",
+    "read() loop": """
+let n: int = 0;
+for (i in 1..%(lines)d) {
+    let line: string = read();
+    n = n + 1;
+}
+echo(n);
+""",
+    "read_lines": """
+let lines: string[] = read_lines();
+echo(len(lines));
+""",
+    "stream": """
+let n: int = 0;
+for (line in read_lines()) {
+    n = n + 1;
+}
+echo(n);
+""",
+}
+
+
+def run(path, stdin):
+    """Run a script with stdin as its input, returning (seconds, peak RSS of bash in KiB, stdout)."""
+    start = time.perf_counter()
+    with open(stdin) as f:
+        proc = subprocess.Popen(["bash", path], stdin=f, stdout=subprocess.PIPE)
+        out = proc.stdout.read()
+        _, status, usage = os.wait4(proc.pid, 0)
+    elapsed = time.perf_counter() - start
+    proc.stdout.close()
+    proc.returncode = os.waitstatus_to_exitcode(status)
+    if proc.returncode != 0:
+        raise subprocess.CalledProcessError(proc.returncode, path)
+    return elapsed, usage.ru_maxrss, out.decode()
+
+
+def main():
+    parser = arg_parser(__doc__, baseline=False)
+    parser.add_argument("--sizes", default="1,16,256,1024", help="input sizes in MiB")
+    args = parser.parse_args()
+
+    rows = []
+    for size in args.sizes.split(","):
+        lines = int(float(size) * 1024 * 1024) // len(LINE)
+        fd, data = tempfile.mkstemp(suffix=".txt")
+        with os.fdopen(fd, "w") as f:
+            for _ in range(lines // 1024):
+                f.write(LINE * 1024)
+            f.write(LINE * (lines % 1024))
+        mib = lines * len(LINE) / 1024 / 1024
+        try:
+            for name, program in PROGRAMS.items():
+                script = compile_ash(program % {"path": data, "lines": lines})
+                try:
+                    elapsed, rss, out = run(script, data)
+                finally:
+                    os.unlink(script)
+                assert int(out) in (lines, lines * len(LINE) - 1), f"{name} read {out.strip()}"
+                rows.append([f"{size} MiB", name, f"{elapsed * 1000:.0f}", f"{mib / elapsed:.1f}",
+                             f"{rss / 1024:.1f}"])
+        finally:
+            os.unlink(data)
+    print_table(["input", "variant", "ms", "MiB/s", "peak MiB"], rows)
+
+
+if __name__ == "__main__":
+    main()
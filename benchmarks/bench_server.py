@@ -0,0 +1,69 @@
+"""Latency of a compile forwarded to `main.py --serve` versus a cold in-process compile.
+
+    python3 benchmarks/bench_server.py [--runs 20]
+"""
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+from common import SEMANTIC_DIR, arg_parser, generate_corpus, print_table
+
+MAIN = os.path.join(SEMANTIC_DIR, "main.py")
+sys.path.insert(0, SEMANTIC_DIR)
+from ashc import client  # noqa: E402
+from ashc.cache import compiler_fingerprint  # noqa: E402
+from ashc.version import COMPILER_VERSION  # noqa: E402
+
+
+def best_of(runs, fn):
+    best = None
+    for _ in range(runs):
+        start = time.perf_counter()
+        fn()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    parser = arg_parser(__doc__, baseline=False)
+    parser.add_argument("--runs", type=int, default=20)
+    args = parser.parse_args()
+
+    work = tempfile.mkdtemp(prefix="ashc-bench-server-")
+    sock = os.path.join(work, "ashc.sock")
+    daemon = subprocess.Popen([sys.executable, MAIN, "--serve", "--socket", sock], stdout=subprocess.DEVNULL)
+    while client.request(sock, {"ping": True}) is None:
+        time.sleep(0.05)
+
+    rows = []
+    try:
+        for kb in (1, 16, 256):
+            src = os.path.join(work, f"prog_{kb}.ash")
+            out = src[:-4] + ".sh"
+            with open(src, "w") as f:
+                f.write(generate_corpus(kb * 1024))
+            command = [sys.executable, MAIN, "--no-cache", "--socket", sock, src, out]
+            modes = [
+                ("cold (--no-server)", lambda: subprocess.run(command + ["--no-server"], check=True,
+                                                              stdout=subprocess.DEVNULL)),
+                ("client -> server", lambda: subprocess.run(command, check=True, stdout=subprocess.DEVNULL)),
+                ("raw socket request", lambda: client.request(sock, {"source": src, "output": out,
+                                                                     "no_cache": True,
+                                                                     "version": COMPILER_VERSION,
+                                                                     "fingerprint": compiler_fingerprint()})),
+            ]
+            for label, fn in modes:
+                rows.append([kb, label, f"{best_of(args.runs, fn) * 1000:.1f}"])
+    finally:
+        daemon.terminate()
+        daemon.wait()
+        shutil.rmtree(work)
+    print_table(["KiB", "mode", "best ms"], rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""Wall time of N independent slow commands, run one after the other and spawned then awaited.
+
+Each command waits --delay seconds before printing, standing in for a
+request to another host; `spawn` starts them all before the first `await`:
+
+    python3 benchmarks/bench_spawn.py [--counts 1,4,16] [--delay 0.2]
+"""
+import os
+
+from common import arg_parser, compile_ash, print_table, run_script
+
+SEQUENTIAL = """
+let total: int = 0;
+%(captures)s
+echo(total);
+"""
+CAPTURE = """let out%(i)d: string = !(sleep %(delay)s; echo %(i)d);
+total = total + 1;"""
+
+OVERLAPPED = """
+let total: int = 0;
+%(spawns)s
+%(awaits)s
+echo(total);
+"""
+SPAWN = "let job%(i)d: job = spawn !(sleep %(delay)s; echo %(i)d);"
+AWAIT = """let out%(i)d: string = await(job%(i)d);
+total = total + 1;"""
+
+
+def main():
+    parser = arg_parser(__doc__, baseline=False)
+    parser.add_argument("--counts", default="1,4,16", help="numbers of commands to run")
+    parser.add_argument("--delay", default="0.2", help="seconds each command waits")
+    args = parser.parse_args()
+
+    rows = []
+    for count in map(int, args.counts.split(",")):
+        params = [{"i": i, "delay": args.delay} for i in range(count)]
+        variants = [
+            ("sequential", SEQUENTIAL % {"captures": "\n".join(CAPTURE % p for p in params)}),
+            ("spawn/await", OVERLAPPED % {"spawns": "\n".join(SPAWN % p for p in params),
+                                          "awaits": "\n".join(AWAIT % p for p in params)}),
+        ]
+        sequential = None
+        for name, source in variants:
+            script = compile_ash(source)
+            try:
+                elapsed, forks, out = run_script(script)
+            finally:
+                os.unlink(script)
+            assert out.split() == [str(count)], out
+            sequential = sequential or elapsed
+            rows.append([count, name, forks, f"{elapsed * 1000:.0f}", f"{sequential / elapsed:.1f}x"])
+    print_table(["commands", "variant", "forks", "ms", "speedup"], rows)
+
+
+if __name__ == "__main__":
+    main()
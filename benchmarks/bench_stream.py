@@ -0,0 +1,80 @@
+"""Wall time, time to first line and peak memory of looping over a command's output.
+
+`for (line in !(cmd))` reads the lines as the command prints them; the
+capture variant is what a script had to do before, take the whole output
+with `let all: string = !(cmd);` first. The command prints --sizes MiB of
+100-byte lines:
+
+    python3 benchmarks/bench_stream.py [--sizes 1,4,16]
+"""
+import os
+import subprocess
+import time
+
+from common import arg_parser, compile_ash, print_table
+
+LINE = "x" * 99
+COMMAND = f"yes {LINE} | head -c {{size}}"
+
+PROGRAMS = {
+    "stream": """
+let n: int = 0;
+for (line in !(%s)) {
+    if (n == 0) {
+        echo(line);
+    }
+    n = n + 1;
+}
+echo(n);
+""",
+    "capture": """
+let all: string = !(%s);
+echo(all);
+""",
+}
+
+
+def run(path):
+    """Run a script, returning (seconds, seconds to its first line of output, peak RSS of bash in KiB).
+
+    The peak is the script's own: the shell sources it and reports its high
+    water mark at the end, leaving out the command and its pipes.
+    """
+    start = time.perf_counter()
+    proc = subprocess.Popen(["bash", "-c", '. "$0" && grep VmHWM /proc/$$/status >&2', path],
+                            stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    proc.stdout.readline()
+    first = time.perf_counter() - start
+    while proc.stdout.read(1 << 16):
+        pass
+    stderr = proc.stderr.read().decode()
+    proc.wait()
+    elapsed = time.perf_counter() - start
+    proc.stdout.close()
+    proc.stderr.close()
+    if proc.returncode != 0:
+        raise subprocess.CalledProcessError(proc.returncode, path, stderr=stderr)
+    return elapsed, first, int(stderr.split()[-2])
+
+
+def main():
+    parser = arg_parser(__doc__, baseline=False)
+    parser.add_argument("--sizes", default="1,4,16", help="command output sizes in MiB")
+    args = parser.parse_args()
+
+    rows = []
+    for size in args.sizes.split(","):
+        command = COMMAND.format(size=int(float(size) * 1024 * 1024))
+        for name, program in PROGRAMS.items():
+            script = compile_ash(program % command)
+            try:
+                elapsed, first, rss = run(script)
+            finally:
+                os.unlink(script)
+            rows.append([f"{size} MiB", name, f"{elapsed * 1000:.0f}", f"{first * 1000:.1f}",
+                         f"{rss / 1024:.1f}"])
+    print_table(["output", "variant", "ms", "first line ms", "peak MiB"], rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+"""Forks and wall time of a text-processing loop, with string builtins and with pipelines.
+
+Each of --lines `  Key<i> = some value <i>  ` entries is split at its `=`,
+the key lowercased with its spaces removed and the value trimmed with its
+spaces turned into underscores. The pipeline variant is how a script did
+that before the string builtins: an `echo | cut | tr` or `sed` pipeline
+per step. The builtin variant uses index_of, substr, trim, replace and
+lower, which are parameter expansions and fork nothing:
+
+    python3 benchmarks/bench_strings.py [--lines 100,1000]
+"""
+import os
+
+from common import arg_parser, compile_ash, print_table, run_script
+
+PROGRAMS = {
+    "pipeline": """
+for (i in 1..%(lines)d) {
+    let entry: string = "  Key" + i + " = some value " + i + "  ";
+    let key: string = !(echo "$entry" | cut -d= -f1 | tr -d ' ' | tr A-Z a-z);
+    let value: string = !(echo "$entry" | cut -d= -f2- | sed 's/^ *//; s/ *$//; s/ /_/g');
+    echo(key + ": " + value);
+}
+""",
+    "builtins": """
+for (i in 1..%(lines)d) {
+    let entry: string = "  Key" + i + " = some value " + i + "  ";
+    let at: int = index_of(entry, "=");
+    let key: string = lower(replace(substr(entry, 0, at), " ", ""));
+    let value: string = replace(trim(substr(entry, at + 1, len(entry))), " ", "_");
+    echo(key + ": " + value);
+}
+""",
+}
+
+
+def main():
+    parser = arg_parser(__doc__, baseline=False)
+    parser.add_argument("--lines", default="100,1000", help="numbers of entries to process")
+    args = parser.parse_args()
+
+    rows = []
+    for lines in map(int, args.lines.split(",")):
+        outputs = {}
+        for name, program in PROGRAMS.items():
+            script = compile_ash(program % {"lines": lines})
+            try:
+                elapsed, forks, outputs[name] = run_script(script)
+            finally:
+                os.unlink(script)
+            rows.append([lines, name, forks, f"{elapsed * 1000:.0f}", f"{elapsed / lines * 1e6:.0f}"])
+        assert outputs["pipeline"] == outputs["builtins"], "the variants disagree"
+    print_table(["lines", "variant", "forks", "ms", "us/line"], rows)
+
+
+if __name__ == "__main__":
+    main()
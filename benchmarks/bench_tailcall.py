@@ -0,0 +1,62 @@
+"""Wall time and peak memory of deep self-recursion, as written and rewritten as loops.
+
+The recursive version is compiled with the tailcall pass disabled; it is only run up to
+--plain-max, beyond that bash's call stack makes it take minutes or crash
+(a crash is reported in the table):
+
+    python3 benchmarks/bench_tailcall.py [--max 1e6] [--plain-max 2e4]
+"""
+import os
+import subprocess
+
+from common import arg_parser, compile_ash, print_table, run_script_rss
+
+PROGRAMS = {
+    "countdown": """
+int function countdown(int n) {
+    if (n == 0) {
+        return 0;
+    }
+    return countdown(n - 1);
+}
+echo(countdown(%d));
+""",
+    "sum_to": """
+int function sum_to(int n) {
+    if (n == 0) {
+        return 0;
+    }
+    return n + sum_to(n - 1);
+}
+echo(sum_to(%d));
+""",
+}
+
+
+def main():
+    parser = arg_parser(__doc__, baseline=False)
+    parser.add_argument("--max", type=float, default=1e6, help="deepest recursion (default 1e6)")
+    parser.add_argument("--plain-max", type=float, default=2e4,
+                        help="deepest recursion run without the rewrite (default 2e4)")
+    args = parser.parse_args()
+
+    rows = []
+    for name, program in PROGRAMS.items():
+        depth = 1000
+        while depth <= args.max:
+            for label, disable in (("recursive", ["tailcall"]), ("loop", [])):
+                if disable and depth > args.plain_max:
+                    continue
+                script = compile_ash(program % depth, disable_passes=disable)
+                try:
+                    elapsed, rss = run_script_rss(script)
+                    rows.append([name, f"{depth:.0e}", label, f"{elapsed * 1000:.0f}", f"{rss / 1024:.1f}"])
+                except subprocess.CalledProcessError as e:
+                    rows.append([name, f"{depth:.0e}", label, f"crashed ({e.returncode})", "-"])
+                os.unlink(script)
+            depth *= 10
+    print_table(["program", "depth", "variant", "ms", "peak MiB"], rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+"""Tokenizer throughput (tokens/s) on generated programs from 1 KB to 50 MB.
+
+    python3 benchmarks/bench_tokenizer.py [--max-mb 50] [--baseline /path/to/old/analysis/semantic]
+"""
+import json
+import os
+import subprocess
+import sys
+
+from common import arg_parser, compilers, print_table
+
+# Each measurement runs in its own interpreter so a baseline tokenizer can be loaded too.
+_SNIPPET = """
+import json, sys, time
+sys.path.insert(0, sys.argv[1])
+sys.path.insert(0, sys.argv[2])
+from common import generate_corpus
+try:
+    from ashc.tokenizer import Tokenizer
+except ImportError:  # compilers from before the ashc package
+    from tokenizer import Tokenizer
+source = generate_corpus(int(sys.argv[3]))
+tokenizer = Tokenizer(source)
+count = 0
+start = time.perf_counter()
+tokenizer.select_next()
+while tokenizer.next.type != "EOF":
+    count += 1
+    tokenizer.select_next()
+print(json.dumps([count, time.perf_counter() - start]))
+"""
+
+
+def main():
+    parser = arg_parser(__doc__)
+    parser.add_argument("--max-mb", type=float, default=50, help="largest input in MB (default 50)")
+    args = parser.parse_args()
+    here = os.path.dirname(os.path.abspath(__file__))
+
+    sizes = [1_000, 10_000, 100_000, 1_000_000, 10_000_000, 50_000_000]
+    rows = []
+    for size in [s for s in sizes if s <= args.max_mb * 1_000_000]:
+        for label, semantic_dir in compilers(args):
+            out = subprocess.run([sys.executable, "-c", _SNIPPET, semantic_dir, here, str(size)],
+                                 check=True, capture_output=True, text=True).stdout
+            count, elapsed = json.loads(out)
+            rows.append([f"{size / 1e6:g} MB", label, count, f"{elapsed:.3f}", f"{count / elapsed:,.0f}"])
+    print_table(["input", "tokenizer", "tokens", "seconds", "tokens/s"], rows)
+
+
+if __name__ == "__main__":
+    main()
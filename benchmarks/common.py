@@ -0,0 +1,137 @@
+"""Shared helpers for the scripts in this directory.
+
+Every benchmark compiles Ash through a compiler directory (by default the
+`analysis/semantic` of this checkout) so a second checkout can be passed with
+`--baseline` to get before/after numbers from the same run.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SEMANTIC_DIR = os.path.join(ROOT, "analysis", "semantic")
+TESTS_DIR = os.path.join(ROOT, "analysis", "tests", "positive")
+
+# Runs in a fresh interpreter so two compiler versions never share sys.modules.
+_COMPILE_SNIPPET = """
+import json, sys
+sys.path.insert(0, sys.argv[1])
+code = open(sys.argv[2]).read()
+try:
+    from ashc import compile_string
+    bash = compile_string(code, **json.loads(sys.argv[4])).bash
+except ImportError:  # compilers from before the ashc package
+    from parser import AshParser
+    bash = "#!/bin/bash\\n" + AshParser(code).parse().generate()
+with open(sys.argv[3], "w") as out:
+    out.write(bash)
+"""
+
+
+_CORPUS_UNIT = """
+int function f{i}(int n) {{
+    let total: int = 0;
+    for (k in 1..n) {{
+        if (k % 3 == 0) {{
+            total = total + k * 2;
+        }} else {{
+            total = total - 1;
+        }}
+    }}
+    while (total > 100) {{
+        total = total / 2;
+    }}
+    return total;
+}}
+
+let r{i}: int = f{i}({i} % 50);
+let s{i}: string = "item {i}";
+echo(r{i});
+"""
+
+
+def generate_corpus(size):
+    """Return a valid Ash program of at least `size` bytes."""
+    parts = []
+    total = 0
+    i = 0
+    while total < size:
+        unit = _CORPUS_UNIT.format(i=i)
+        parts.append(unit)
+        total += len(unit)
+        i += 1
+    return "".join(parts)
+
+
+def arg_parser(description, baseline=True):
+    parser = argparse.ArgumentParser(description=description)
+    if baseline:
+        parser.add_argument("--baseline", metavar="SEMANTIC_DIR",
+                            help="also benchmark the compiler in this directory")
+    return parser
+
+
+def compilers(args):
+    result = [("current", SEMANTIC_DIR)]
+    if args.baseline:
+        result.insert(0, ("baseline", os.path.abspath(args.baseline)))
+    return result
+
+
+def compile_ash(source, semantic_dir=SEMANTIC_DIR, **options):
+    """Compile Ash source text and return the path of the generated script.
+
+    options are passed on to ashc.compile_string; compilers that predate the
+    ashc package ignore them.
+    """
+    fd, src_path = tempfile.mkstemp(suffix=".ash")
+    with os.fdopen(fd, "w") as f:
+        f.write(source)
+    out_path = src_path[:-4] + ".sh"
+    subprocess.run([sys.executable, "-c", _COMPILE_SNIPPET, semantic_dir, src_path, out_path,
+                    json.dumps(options)],
+                   check=True, stdout=subprocess.DEVNULL)
+    os.unlink(src_path)
+    os.chmod(out_path, 0o755)
+    return out_path
+
+
+def _last_pid():
+    with open("/proc/sys/kernel/ns_last_pid") as f:
+        return int(f.read())
+
+
+def run_script(path, stdin=None):
+    """Run a generated script, returning (seconds, forks, stdout).
+
+    Forks are counted from the kernel's last allocated PID, so keep the rest
+    of the machine quiet while measuring.
+    """
+    before = _last_pid()
+    start = time.perf_counter()
+    proc = subprocess.run(["bash", path], input=stdin, capture_output=True, text=True, check=True)
+    elapsed = time.perf_counter() - start
+    forks = _last_pid() - before - 1  # minus the bash process itself
+    return elapsed, forks, proc.stdout
+
+
+def run_script_rss(path):
+    """Run a generated script, returning (seconds, peak RSS in KiB) of its bash process."""
+    start = time.perf_counter()
+    proc = subprocess.Popen(["bash", path], stdout=subprocess.DEVNULL)
+    _, status, usage = os.wait4(proc.pid, 0)
+    elapsed = time.perf_counter() - start
+    proc.returncode = os.waitstatus_to_exitcode(status)
+    if proc.returncode != 0:
+        raise subprocess.CalledProcessError(proc.returncode, path)
+    return elapsed, usage.ru_maxrss
+
+
+def print_table(headers, rows):
+    widths = [max(len(str(x)) for x in col) for col in zip(headers, *rows)]
+    for row in [headers] + rows:
+        print("  ".join(str(x).rjust(w) for x, w in zip(row, widths)))